@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+import cv2
+import numpy as np
+
+# A source position that disagrees with the grab time by more than this is a
+# seek, loop or stall: the mapping is re-anchored on the next frame.
+CAPTURE_CLOCK_RESYNC_MS = 1000.0
+
+
+def wall_clock_ms() -> int:
+    """Server wall clock in epoch milliseconds, the time base of every `*_timestamp_ms` field."""
+    return int(time.time() * 1000)
+
+
+class CaptureClock:
+    """Capture time of source frames on the server wall clock.
+
+    The grab time alone includes decoder/network buffering jitter. When the
+    source reports its own position (`CAP_PROP_POS_MSEC`), the capture time is
+    `position + offset` where the offset is the smallest `grab - position`
+    seen so far, i.e. the frame that arrived with the least delay. Sources
+    without a usable position fall back to the grab time.
+    """
+
+    def __init__(self) -> None:
+        self._offset_ms: float | None = None
+        self._last_position_ms: float | None = None
+
+    def reset(self) -> None:
+        self._offset_ms = None
+        self._last_position_ms = None
+
+    def stamp(self, grabbed_ms: float, position_ms: float | None = None) -> int:
+        if position_ms is None or not position_ms > 0.0:
+            self.reset()
+            return int(grabbed_ms)
+
+        offset = grabbed_ms - position_ms
+        moved_back = self._last_position_ms is not None and position_ms <= self._last_position_ms
+        self._last_position_ms = position_ms
+        if self._offset_ms is None or moved_back or abs(offset - self._offset_ms) > CAPTURE_CLOCK_RESYNC_MS:
+            self._offset_ms = offset
+        else:
+            self._offset_ms = min(self._offset_ms, offset)
+        return int(position_ms + self._offset_ms)
+
+
+def read_stamped(capture: cv2.VideoCapture, clock: CaptureClock) -> tuple[np.ndarray, int] | None:
+    """Reads one frame as `(frame, capture_timestamp_ms)`, None when the source has none.
+
+    The grab time is taken before decoding (`retrieve`) so decode cost does
+    not shift it. Video files are read at the server's pace rather than their
+    own, so only live sources (no frame count) use the source position.
+    """
+    if not capture.isOpened() or not capture.grab():
+        return None
+    grabbed_ms = time.time() * 1000.0
+    ok, frame = capture.retrieve()
+    if not ok or frame is None:
+        return None
+    position_ms = None if capture.get(cv2.CAP_PROP_FRAME_COUNT) > 0 else float(capture.get(cv2.CAP_PROP_POS_MSEC))
+    return frame, clock.stamp(grabbed_ms, position_ms)
+
+
+def pong_message(payload: dict[str, Any], received_ms: int) -> dict[str, Any]:
+    """Reply to a clock-sync `ping`.
+
+    The client sends `{"type": "ping", "client_time_ms": t0}` and notes its
+    receive time t3 of the pong; with t1/t2 = server receive/send times,
+    offset = ((t1 - t0) + (t2 - t3)) / 2 and round trip = (t3 - t0) - (t2 - t1).
+    """
+    message: dict[str, Any] = {
+        "type": "pong",
+        "server_receive_ms": received_ms,
+    }
+    if "client_time_ms" in payload:
+        message["client_time_ms"] = payload["client_time_ms"]
+    message["server_send_ms"] = message["timestamp_ms"] = wall_clock_ms()
+    return message
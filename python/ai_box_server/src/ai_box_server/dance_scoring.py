@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from .kinematics import (
+    ScoreConfig,
+    bone_unit_vectors_batch,
+    center_and_scale_batch,
+    joint_angles_batch,
+    mirror_and_swap_points,
+    score_pairs_numpy,
+    swap_left_right,
+)
+from .template_pack import TemplatePack
+
+
+# The tracker needs a band of at least two reference rows to follow a dancer.
+MIN_PACK_ROWS = 2
+
+
+@dataclass
+class DanceScoringConfig:
+    window_ms: float = 1000.0  # used when the pack has no `beat_ms`
+    band_sec: float = 2.0  # reference span scored per live frame
+    max_tempo: float = 2.0  # fastest user/reference tempo ratio the tracker follows
+    tempo_penalty: float = 0.1  # cost of deviating from the expected reference step
+    score: ScoreConfig = field(default_factory=ScoreConfig)
+
+
+@dataclass(frozen=True)
+class LivePose:
+    """Features of one live pose, as-is (row 0) and mirrored (row 1).
+
+    Computed once per captured frame and shared by every tracker.
+    """
+
+    normalized: np.ndarray  # (2,33,3)
+    weights: np.ndarray  # (2,33) min(vis, pres)
+    angles: np.ndarray  # (2,K)
+    bones: np.ndarray  # (2,B+1,3)
+
+    @classmethod
+    def from_arrays(cls, points: np.ndarray, vis: np.ndarray, pres: np.ndarray | None = None) -> LivePose:
+        points = np.asarray(points, dtype=np.float32)
+        weights = np.clip(np.asarray(vis, dtype=np.float32), 0.0, 1.0)
+        if pres is not None:
+            weights = np.minimum(weights, np.clip(np.asarray(pres, dtype=np.float32), 0.0, 1.0))
+        both = np.stack([points, mirror_and_swap_points(points)])
+        normalized = center_and_scale_batch(both, out=both)
+        return cls(
+            normalized=normalized,
+            weights=np.stack([weights, swap_left_right(weights)]),
+            angles=joint_angles_batch(normalized),
+            bones=bone_unit_vectors_batch(normalized),
+        )
+
+
+class ChoreographyTracker:
+    """Follows a live dancer through a reference pack and scores it window by window.
+
+    Online time warping: every live frame advances the reference by 0..S rows
+    (S covers `max_tempo` times the expected step), and the accumulated cost
+    `D[r] = cost(frame, r) + min_s(D_prev[r - s] + penalty(s))` is kept only
+    for a band of `band_sec` around the current position. Each update scores
+    the live pose against the band rows in one batch, so its cost depends on
+    the band, not on the length of the song.
+
+    `update` returns `dance_window` messages for windows the position has
+    moved past; `finish` closes the last window and returns `dance_result`.
+    """
+
+    def __init__(
+        self,
+        pack: TemplatePack,
+        *,
+        config: DanceScoringConfig | None = None,
+        start_ms: float = 0.0,
+    ) -> None:
+        self.pack = pack
+        self.config = config or DanceScoringConfig()
+        self.window_ms = float(pack.meta.get("beat_ms") or self.config.window_ms)
+        self._rows = len(pack)
+        if self._rows < MIN_PACK_ROWS:
+            raise ValueError(
+                f"template pack {pack.name!r} has {self._rows} frame(s); dance tracking needs at least {MIN_PACK_ROWS}"
+            )
+        # Never wider than the pack, or band rows would fall outside it.
+        self._band = min(self._rows, max(2, int(math.ceil(self.config.band_sec * pack.fps))))
+        self._back = self._band // 4
+        self._lock = threading.Lock()
+
+        self.position = pack.row_at(max(0.0, start_ms))
+        self._lo = self._window_start(self.position)
+        self._acc = np.full(self._band, np.inf)
+        self._acc[self.position - self._lo] = 0.0
+        self._last_ms: float | None = None
+        self.tempo = 1.0
+        self.finished = False
+
+        self._window = self._window_index(self.position)
+        self._window_sum = 0.0
+        self._window_scored = 0
+        self._window_frames = 0
+        self._window_scores: list[float | None] = []
+        self._frame_sum = 0.0
+        self._frames_scored = 0
+        self._frames = 0
+
+    def update(self, live: LivePose | None, timestamp_ms: float) -> list[dict[str, Any]]:
+        """Advances with one live frame (None: no usable pose) captured at `timestamp_ms`."""
+        with self._lock:
+            if self.finished:
+                return []
+            elapsed_ms = 1000.0 / self.pack.fps if self._last_ms is None else max(0.0, timestamp_ms - self._last_ms)
+            self._last_ms = timestamp_ms
+            expected = elapsed_ms * self.pack.fps / 1000.0
+            max_step = int(math.ceil(expected * self.config.max_tempo)) + 1
+
+            prev_lo, prev_acc = self._lo, self._acc
+            lo = self._window_start(self.position + int(round(expected)))
+            rows = lo + np.arange(self._band)
+
+            steps = np.arange(max_step + 1)
+            src = rows[:, None] - steps[None, :] - prev_lo
+            inside = (src >= 0) & (src < self._band)
+            penalty = self.config.tempo_penalty * np.abs(steps - expected) / max(expected, 1.0)
+            best = np.where(inside, prev_acc[np.clip(src, 0, self._band - 1)], np.inf) + penalty[None, :]
+            best = best.min(axis=1)
+
+            if live is None:
+                # No pose this frame: only time moves on.
+                scores = np.full(self._band, np.nan)
+                cost = np.zeros(self._band)
+            else:
+                scores = self._score_rows(live, lo)
+                cost = np.where(np.isfinite(scores), 1.0 - scores / 100.0, 1.0)
+            acc = best + cost
+            if not np.isfinite(acc).any():
+                acc = cost.copy()
+            acc -= np.min(acc)
+
+            offset = int(np.argmin(acc))
+            position = lo + offset
+            step = position - self.position
+            if expected > 0:
+                self.tempo = 0.8 * self.tempo + 0.2 * (step / expected)
+            self._lo, self._acc, self.position = lo, acc, position
+
+            messages = self._advance_windows(self._window_index(position))
+            score = float(scores[offset])
+            self._frames += 1
+            self._window_frames += 1
+            if math.isfinite(score):
+                self._frame_sum += score
+                self._frames_scored += 1
+                self._window_sum += score
+                self._window_scored += 1
+
+            if position >= self._rows - 1:
+                messages.extend(self._finish_locked())
+            return messages
+
+    def finish(self) -> list[dict[str, Any]]:
+        with self._lock:
+            if self.finished:
+                return []
+            return self._finish_locked()
+
+    def _finish_locked(self) -> list[dict[str, Any]]:
+        messages = self._advance_windows(self._window + 1)
+        self.finished = True
+        window_scores = [s for s in self._window_scores if s is not None]
+        messages.append(
+            {
+                "type": "dance_result",
+                "name": self.pack.name,
+                "score": float(np.mean(window_scores)) if window_scores else None,
+                "window_scores": self._window_scores,
+                "frames": self._frames,
+                "scored_frames": self._frames_scored,
+                "frame_score": self._frame_sum / self._frames_scored if self._frames_scored else None,
+                "position_ms": self._position_ms(),
+                "completed": self.position >= self._rows - 1,
+            }
+        )
+        return messages
+
+    def _score_rows(self, live: LivePose, lo: int) -> np.ndarray:
+        """Best of as-is/mirrored live pose against reference rows [lo, lo + band)."""
+        pack = self.pack
+        hi = lo + self._band
+        ref_w = np.clip(np.minimum(pack.vis[lo:hi], pack.pres[lo:hi]), 0.0, 1.0)
+        ref_w = np.where(pack.valid[lo:hi, None], ref_w, 0.0)
+
+        def _twice(arr: np.ndarray) -> np.ndarray:
+            return np.concatenate([arr, arr])
+
+        def _each(arr: np.ndarray) -> np.ndarray:
+            return np.repeat(arr, self._band, axis=0)
+
+        scores = score_pairs_numpy(
+            ref_norm=_twice(pack.normalized[lo:hi]),
+            cur_norm=_each(live.normalized),
+            joint_w=np.minimum(_twice(ref_w), _each(live.weights)),
+            ref_angles=_twice(pack.angles[lo:hi]),
+            cur_angles=_each(live.angles),
+            ref_bones=_twice(pack.bones[lo:hi]),
+            cur_bones=_each(live.bones),
+            config=self.config.score,
+        ).reshape(2, self._band)
+        return np.fmax(scores[0], scores[1])
+
+    def _advance_windows(self, window: int) -> list[dict[str, Any]]:
+        messages: list[dict[str, Any]] = []
+        while self._window < window:
+            score = self._window_sum / self._window_scored if self._window_scored else None
+            self._window_scores.append(score)
+            messages.append(
+                {
+                    "type": "dance_window",
+                    "index": self._window,
+                    "start_ms": int(round(self._window * self.window_ms)),
+                    "end_ms": int(round((self._window + 1) * self.window_ms)),
+                    "score": score,
+                    "frames": self._window_frames,
+                    "scored_frames": self._window_scored,
+                    "position_ms": self._position_ms(),
+                    "tempo": round(self.tempo, 3),
+                }
+            )
+            self._window += 1
+            self._window_sum = 0.0
+            self._window_scored = 0
+            self._window_frames = 0
+        return messages
+
+    def _window_start(self, position: int) -> int:
+        return max(0, min(self._rows - self._band, position - self._back))
+
+    def _window_index(self, position: int) -> int:
+        return int(float(self.pack.timestamps_ms[position]) // self.window_ms)
+
+    def _position_ms(self) -> int:
+        return int(round(float(self.pack.timestamps_ms[self.position])))
@@ -0,0 +1,460 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import logging
+import math
+import os
+import ssl
+from collections import OrderedDict
+from typing import Any
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+LOGGER = logging.getLogger("ai_box_stand_hold")
+
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# Attempts whose metrics round to the same buckets get the same cached feedback.
+FEEDBACK_CACHE_SCORE_STEP = 5.0
+FEEDBACK_CACHE_ANGLE_STEP = 10.0
+
+# Person crop around the confident landmarks, as a fraction of the box size.
+FEEDBACK_CROP_MARGIN = 0.15
+FEEDBACK_JPEG_QUALITY = 85
+
+
+class AsyncHttpClient:
+    """Small HTTP/1.1 client on asyncio streams that keeps connections alive.
+
+    Requests go to paths under `base_url` (`http` or `https`). At most
+    `max_connections` requests are in flight; finished connections are kept
+    for reuse unless the server closes them, and a request that fails on a
+    reused connection is retried once on a fresh one.
+    """
+
+    def __init__(self, base_url: str, *, max_connections: int = 4, timeout_sec: float = 45.0) -> None:
+        parts = urlsplit(base_url)
+        if parts.scheme not in {"http", "https"} or not parts.hostname:
+            raise ValueError(f"unsupported base url: {base_url}")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.timeout_sec = float(timeout_sec)
+        self.connections_opened = 0
+        self._ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self._host_header = parts.netloc.rpartition("@")[2]
+        self._prefix = parts.path.rstrip("/")
+        self._slots = asyncio.Semaphore(max(1, int(max_connections)))
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def post_json(self, path: str, payload: dict[str, Any], *, headers: dict[str, str]) -> tuple[int, bytes]:
+        """POSTs `payload` as JSON; returns `(status, body)`."""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [
+            f"POST {self._prefix}{path} HTTP/1.1",
+            f"Host: {self._host_header}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: keep-alive",
+            *(f"{name}: {value}" for name, value in headers.items()),
+        ]
+        request = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+        async with self._slots:
+            return await asyncio.wait_for(self._send(request), self.timeout_sec)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    async def _send(self, request: bytes) -> tuple[int, bytes]:
+        while True:
+            reused = bool(self._idle)
+            conn = await self._connection()
+            try:
+                status, body, keep_alive = await self._exchange(conn, request)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                conn[1].close()
+                if reused:
+                    # The server dropped idle keep-alive connections; retry once on a new one.
+                    await self.close()
+                    continue
+                raise
+            except BaseException:
+                conn[1].close()
+                raise
+            if keep_alive:
+                self._idle.append(conn)
+            else:
+                conn[1].close()
+            return status, body
+
+    async def _connection(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        conn = await asyncio.open_connection(
+            self.host,
+            self.port,
+            ssl=self._ssl,
+            server_hostname=self.host if self._ssl is not None else None,
+        )
+        self.connections_opened += 1
+        return conn
+
+    @staticmethod
+    async def _exchange(
+        conn: tuple[asyncio.StreamReader, asyncio.StreamWriter],
+        request: bytes,
+    ) -> tuple[int, bytes, bool]:
+        reader, writer = conn
+        writer.write(request)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before the response")
+        version, status = status_line.decode("latin-1").split()[:2]
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in {b"\r\n", b"\n", b""}:
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await _read_chunked(reader)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return int(status), body, keep_alive
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    chunks: list[bytes] = []
+    while True:
+        size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+        if size == 0:
+            while (await reader.readline()) not in {b"\r\n", b"\n", b""}:
+                pass
+            return b"".join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readline()
+
+
+def person_box(landmarks: np.ndarray | None, *, min_visibility: float = 0.5) -> tuple[float, float, float, float] | None:
+    """Normalized `(x0, y0, x1, y1)` around the visible landmarks of a (33,3) `[x, y, visibility]` array.
+
+    None when there are too few visible landmarks or they are not image
+    coordinates (world landmarks).
+    """
+    if landmarks is None or len(landmarks) == 0:
+        return None
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    xy = landmarks[landmarks[:, 2] >= min_visibility, :2]
+    if xy.shape[0] < 4 or not np.isfinite(xy).all() or xy.min() < -0.1 or xy.max() > 1.1:
+        return None
+    (x0, y0), (x1, y1) = xy.min(axis=0), xy.max(axis=0)
+    margin_x = FEEDBACK_CROP_MARGIN * max(float(x1 - x0), 0.05)
+    margin_y = FEEDBACK_CROP_MARGIN * max(float(y1 - y0), 0.05)
+    return (
+        max(0.0, float(x0) - margin_x),
+        max(0.0, float(y0) - margin_y),
+        min(1.0, float(x1) + margin_x),
+        min(1.0, float(y1) + margin_y),
+    )
+
+
+def prepare_feedback_image(image_base64: str, landmarks: np.ndarray | None, *, max_side: int) -> str:
+    """JPEG base64 of the person crop, long side <= `max_side` (0: no resize); the input when undecodable."""
+    try:
+        data = np.frombuffer(base64.b64decode(image_base64), dtype=np.uint8)
+    except Exception:
+        return image_base64
+    image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if image is None:
+        return image_base64
+
+    height, width = image.shape[:2]
+    box = person_box(landmarks)
+    if box is not None:
+        x0, y0 = int(box[0] * width), int(box[1] * height)
+        x1, y1 = int(math.ceil(box[2] * width)), int(math.ceil(box[3] * height))
+        if x1 - x0 >= 16 and y1 - y0 >= 16:
+            image = image[y0:y1, x0:x1]
+            height, width = image.shape[:2]
+
+    scale = max_side / float(max(height, width)) if max_side > 0 else 1.0
+    if scale < 1.0:
+        image = cv2.resize(image, (int(round(width * scale)), int(round(height * scale))), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, FEEDBACK_JPEG_QUALITY])
+    if not ok:
+        return image_base64
+    return base64.b64encode(encoded.tobytes()).decode("ascii")
+
+
+def feedback_cache_key(template_name: str, model: str, metrics: dict[str, Any]) -> tuple[Any, ...]:
+    """Cache key of an attempt: template, model and its metrics rounded to coarse buckets."""
+    angle_diffs = metrics.get("angle_diffs", {})
+    if not isinstance(angle_diffs, dict):
+        angle_diffs = {}
+    angles = tuple(
+        sorted(
+            (str(name), round(float(diff) / FEEDBACK_CACHE_ANGLE_STEP))
+            for name, diff in angle_diffs.items()
+            if isinstance(diff, (int, float)) and math.isfinite(float(diff))
+        )
+    )
+    score = float(metrics.get("score", 0.0) or 0.0)
+    mode = str(metrics.get("mode", "NORMAL") or "NORMAL")
+    return template_name, model, mode, round(score / FEEDBACK_CACHE_SCORE_STEP), angles
+
+
+class FeedbackGenerator:
+    """Posture feedback text from the remote model, or the local coach as a fallback.
+
+    One generator is shared by all clients: requests go through one pooled
+    `AsyncHttpClient`, identical requests in flight are coalesced into one
+    call, and remote answers are cached (LRU, `cache_size` entries) under
+    `feedback_cache_key`, so near-identical attempts skip the remote call.
+    Images are cropped to the person and downscaled before upload.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        model: str,
+        timeout_sec: float,
+        base_url: str = DEFAULT_OPENAI_BASE_URL,
+        max_connections: int = 4,
+        cache_size: int = 128,
+        image_max_side: int = 512,
+    ) -> None:
+        self.enabled = enabled
+        self.model = model
+        self.timeout_sec = timeout_sec
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.cache_size = max(0, int(cache_size))
+        self.image_max_side = max(0, int(image_max_side))
+        self._client: AsyncHttpClient | None = None
+        self._cache: OrderedDict[tuple[Any, ...], str] = OrderedDict()
+        self._inflight: dict[tuple[Any, ...], asyncio.Task[str]] = {}
+
+    def wants_remote(self, reference_image_base64: str) -> bool:
+        """True when `generate` would ask the remote model (it can still fall back to the local coach)."""
+        api_key = str(os.environ.get("OPENAI_API_KEY", "")).strip()
+        return bool(self.enabled and api_key and reference_image_base64)
+
+    def local(self, metrics: dict[str, Any]) -> tuple[str, str]:
+        return self._build_local_feedback(metrics), "local-fallback"
+
+    async def generate(
+        self,
+        *,
+        template_name: str,
+        reference_image_base64: str,
+        candidate_image_base64: str,
+        metrics: dict[str, Any],
+        reference_landmarks: np.ndarray | None = None,
+        candidate_landmarks: np.ndarray | None = None,
+    ) -> tuple[str, str]:
+        """`(text, model)`; the landmarks ((33,3) `[x, y, visibility]`) locate the person in each image."""
+        if not self.wants_remote(reference_image_base64):
+            return self.local(metrics)
+
+        key = feedback_cache_key(template_name, self.model, metrics)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            LOGGER.info("feedback cache hit for %s", template_name)
+            return cached, self.model
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._request_openai(
+                    api_key=str(os.environ.get("OPENAI_API_KEY", "")).strip(),
+                    reference_image_base64=reference_image_base64,
+                    candidate_image_base64=candidate_image_base64,
+                    reference_landmarks=reference_landmarks,
+                    candidate_landmarks=candidate_landmarks,
+                    metrics=metrics,
+                )
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._request_done(key, done))
+        try:
+            # Shielded: a waiter that goes away does not cancel the call for the others.
+            text = await asyncio.shield(task)
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.warning("openai feedback failed. fallback to local coach: %s", exc)
+            return self.local(metrics)
+        return text, self.model
+
+    async def close(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def _request_done(self, key: tuple[Any, ...], task: asyncio.Task[str]) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self.cache_size:
+            self._cache[key] = task.result()
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def _request_openai(
+        self,
+        *,
+        api_key: str,
+        reference_image_base64: str,
+        candidate_image_base64: str,
+        reference_landmarks: np.ndarray | None,
+        candidate_landmarks: np.ndarray | None,
+        metrics: dict[str, Any],
+    ) -> str:
+        ref_jpeg, cand_jpeg = await asyncio.to_thread(
+            self._prepare_images,
+            (reference_image_base64, reference_landmarks),
+            (candidate_image_base64, candidate_landmarks),
+        )
+        ref_url = f"data:image/jpeg;base64,{ref_jpeg}"
+        cand_url = f"data:image/jpeg;base64,{cand_jpeg}"
+
+        score = float(metrics.get("score", 0) or 0)
+        valid_joints = int(metrics.get("valid_joints", 0) or 0)
+        mode = str(metrics.get("mode", "NORMAL") or "NORMAL")
+        coord_err = metrics.get("coord_err", None)
+        angle_err = metrics.get("angle_err", None)
+        angle_diffs = metrics.get("angle_diffs", {})
+
+        prompt = (
+            "첫 번째 이미지는 기준 자세, 두 번째 이미지는 사용자의 최고점 프레임입니다. "
+            "얼굴/배경은 무시하고 신체 정렬만 비교하세요.\n"
+            f"score={score:.1f}, valid_joints={valid_joints}, mode={mode}, "
+            f"coord_err={coord_err}, angle_err={angle_err}, angle_diffs={angle_diffs}.\n"
+            "한국어로 작성하고 아래 형식을 정확히 지키세요.\n"
+            "1) 핵심 오차 요약 2줄\n"
+            "2) 수정 포인트 5개 (각 항목: 문제 / 교정 방법)\n"
+            "3) 20초 교정 루틴 1개\n"
+            "짧고 실행 가능하게 작성하세요."
+        )
+
+        payload = {
+            "model": self.model,
+            "temperature": 0.2,
+            "max_tokens": 500,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "너는 공원 체육기기용 자세 코칭 전문가다. 기준 사진과 사용자 프레임을 비교해 즉시 적용 가능한 교정 지침을 준다.",
+                },
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {"type": "image_url", "image_url": {"url": ref_url}},
+                        {"type": "image_url", "image_url": {"url": cand_url}},
+                    ],
+                },
+            ],
+        }
+
+        if self._client is None:
+            self._client = AsyncHttpClient(
+                self.base_url,
+                max_connections=self.max_connections,
+                timeout_sec=max(5.0, float(self.timeout_sec)),
+            )
+        try:
+            status, body = await self._client.post_json(
+                "/chat/completions",
+                payload,
+                headers={"Authorization": f"Bearer {api_key}"},
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as exc:
+            raise RuntimeError(str(exc) or type(exc).__name__) from exc
+        if status >= 400:
+            raise RuntimeError(body.decode("utf-8", errors="replace")[-1200:])
+
+        data = json.loads(body)
+        choices = data.get("choices") or []
+        if not choices:
+            raise RuntimeError("OpenAI returned no choices")
+
+        content = choices[0].get("message", {}).get("content", "")
+        if isinstance(content, list):
+            text_parts = []
+            for item in content:
+                if isinstance(item, dict) and item.get("type") == "text":
+                    text_parts.append(str(item.get("text", "")))
+            content = "\n".join(text_parts)
+
+        text = str(content).strip()
+        if not text:
+            raise RuntimeError("OpenAI returned empty content")
+        return text
+
+    def _prepare_images(self, *images: tuple[str, np.ndarray | None]) -> list[str]:
+        return [prepare_feedback_image(image, landmarks, max_side=self.image_max_side) for image, landmarks in images]
+
+    @staticmethod
+    def _build_local_feedback(metrics: dict[str, Any]) -> str:
+        score = float(metrics.get("score", 0.0) or 0.0)
+        mode = str(metrics.get("mode", "NORMAL") or "NORMAL")
+        angle_diffs = metrics.get("angle_diffs", {})
+        if not isinstance(angle_diffs, dict):
+            angle_diffs = {}
+
+        sorted_angles = sorted(
+            (
+                (str(k), float(v))
+                for k, v in angle_diffs.items()
+                if isinstance(v, (int, float)) and math.isfinite(float(v))
+            ),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        worst = sorted_angles[:3]
+
+        lines: list[str] = []
+        lines.append(f"점수 {score:.1f}점 ({mode}) 기준 자동 교정 결과입니다.")
+        if score >= 85:
+            lines.append("자세가 전반적으로 안정적입니다. 유지한 상태에서 호흡만 더 정리하면 좋습니다.")
+        elif score >= 70:
+            lines.append("자세가 거의 맞지만, 관절 정렬 오차가 일부 남아 있습니다.")
+        else:
+            lines.append("기준 자세와 차이가 큽니다. 아래 3가지부터 먼저 고정하세요.")
+
+        if worst:
+            lines.append("핵심 오차 부위:")
+            for name, diff in worst:
+                lines.append(f"- {name}: 약 {diff:.1f}도 차이")
+
+        lines.append("수정 가이드:")
+        lines.append("- 어깨: 양쪽 높이를 맞추고 가슴을 과하게 열지 않기")
+        lines.append("- 팔꿈치: 기준 사진 각도까지 천천히 접거나 펴기")
+        lines.append("- 골반: 좌우 회전 없이 정면 유지, 허리 과신전 방지")
+        lines.append("- 무릎: 발끝 방향과 동일한 축으로 정렬")
+        lines.append("- 발목/발끝: 체중을 발 중앙에 두고 흔들림 최소화")
+
+        lines.append("20초 교정 루틴:")
+        lines.append("1) 10초간 골반-어깨 수평 맞추기")
+        lines.append("2) 10초간 팔꿈치/무릎 각도만 기준 사진에 맞추기")
+        return "\n".join(lines)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import uuid
+from collections.abc import Callable, Coroutine
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+LOGGER = logging.getLogger("ai_box_stand_hold")
+
+T = TypeVar("T")
+
+
+class BackgroundJobs:
+    """Bounded pool for work that outlives the session that started it.
+
+    A job is a coroutine run as a task next to the client loops; its blocking
+    steps go through `run`, a thread pool of `workers` threads shared by every
+    job. At most `max_jobs` jobs are in flight at once and `start` refuses
+    more, so a burst of sessions cannot pile up unbounded post-processing and
+    feedback requests.
+    """
+
+    def __init__(self, *, workers: int = 2, max_jobs: int = 8) -> None:
+        self.workers = max(1, int(workers))
+        self.max_jobs = max(1, int(max_jobs))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ai-box-job")
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    @property
+    def full(self) -> bool:
+        return len(self._tasks) >= self.max_jobs
+
+    @staticmethod
+    def new_job_id() -> str:
+        return uuid.uuid4().hex[:16]
+
+    def start(self, job_id: str, job: Coroutine[Any, Any, None]) -> bool:
+        """Schedules `job` under `job_id`; False (and `job` is discarded) when the pool is full."""
+        if self.full:
+            job.close()
+            return False
+        task = asyncio.create_task(job, name=f"job-{job_id}")
+        self._tasks[job_id] = task
+        task.add_done_callback(functools.partial(self._job_done, job_id))
+        return True
+
+    def cancel(self, job_id: str) -> None:
+        """Drops a job whose result is no longer wanted; a step already running in a thread still completes."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+
+    async def run(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def close(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _job_done(self, job_id: str, task: asyncio.Task[None]) -> None:
+        self._tasks.pop(job_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            LOGGER.warning("background job %s failed: %s", job_id, task.exception())
@@ -0,0 +1,744 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+# Pose geometry and scoring on MediaPipe's 33 pose landmarks, shared by both
+# servers and the template compiler without importing either server. numpy
+# only; the `*_torch` variants take the torch module as an argument, so torch
+# is never imported here. The `*_batch` functions take (N,33,3) arrays, accept
+# an `out=` buffer and keep float32 input in float32; everything else is
+# computed in float64.
+
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+LEFT_HEEL = 29
+RIGHT_HEEL = 30
+LEFT_FOOT_INDEX = 31
+RIGHT_FOOT_INDEX = 32
+
+POSE_SELECTED_INDICES = np.array(
+    [
+        LEFT_SHOULDER,
+        RIGHT_SHOULDER,
+        LEFT_ELBOW,
+        RIGHT_ELBOW,
+        LEFT_WRIST,
+        RIGHT_WRIST,
+        LEFT_HIP,
+        RIGHT_HIP,
+        LEFT_KNEE,
+        RIGHT_KNEE,
+        LEFT_ANKLE,
+        RIGHT_ANKLE,
+        LEFT_HEEL,
+        RIGHT_HEEL,
+        LEFT_FOOT_INDEX,
+        RIGHT_FOOT_INDEX,
+    ],
+    dtype=np.int32,
+)
+
+LEFT_RIGHT_SWAP_PAIRS: list[tuple[int, int]] = [
+    (1, 4),
+    (2, 5),
+    (3, 6),
+    (7, 8),
+    (9, 10),
+    (11, 12),
+    (13, 14),
+    (15, 16),
+    (17, 18),
+    (19, 20),
+    (21, 22),
+    (23, 24),
+    (25, 26),
+    (27, 28),
+    (29, 30),
+    (31, 32),
+]
+
+ANGLE_TRIPLETS: list[tuple[str, int, int, int]] = [
+    ("left_elbow", LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    ("right_elbow", RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+    ("left_knee", LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+    ("right_knee", RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+    ("left_hip", LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+    ("right_hip", RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+    ("left_shoulder", LEFT_ELBOW, LEFT_SHOULDER, LEFT_HIP),
+    ("right_shoulder", RIGHT_ELBOW, RIGHT_SHOULDER, RIGHT_HIP),
+]
+
+BONE_DEFS: list[tuple[str, int, int]] = [
+    ("left_upper_arm", LEFT_SHOULDER, LEFT_ELBOW),
+    ("right_upper_arm", RIGHT_SHOULDER, RIGHT_ELBOW),
+    ("left_forearm", LEFT_ELBOW, LEFT_WRIST),
+    ("right_forearm", RIGHT_ELBOW, RIGHT_WRIST),
+    ("left_thigh", LEFT_HIP, LEFT_KNEE),
+    ("right_thigh", RIGHT_HIP, RIGHT_KNEE),
+    ("left_shin", LEFT_KNEE, LEFT_ANKLE),
+    ("right_shin", RIGHT_KNEE, RIGHT_ANKLE),
+]
+
+TORSO_FALLBACK_PAIRS: list[tuple[int, int]] = [
+    (LEFT_SHOULDER, LEFT_ELBOW),
+    (LEFT_ELBOW, LEFT_WRIST),
+    (RIGHT_SHOULDER, RIGHT_ELBOW),
+    (RIGHT_ELBOW, RIGHT_WRIST),
+    (LEFT_HIP, LEFT_KNEE),
+    (LEFT_KNEE, LEFT_ANKLE),
+    (RIGHT_HIP, RIGHT_KNEE),
+    (RIGHT_KNEE, RIGHT_ANKLE),
+    (LEFT_HIP, RIGHT_HIP),
+    (LEFT_SHOULDER, RIGHT_SHOULDER),
+]
+
+
+@dataclass
+class ScoreConfig:
+    sigma_coord: float = 0.12
+    sigma_angle: float = 15.0
+    w_coord: float = 0.4
+    w_angle: float = 0.4
+    w_bone: float = 0.2
+    conf_threshold: float = 0.5
+    min_valid_joints: int = 6
+    min_valid_angles: int = 2
+    min_valid_bones: int = 3
+
+
+def _left_right_permutation() -> np.ndarray:
+    perm = np.arange(33, dtype=np.int64)
+    for left_idx, right_idx in LEFT_RIGHT_SWAP_PAIRS:
+        perm[left_idx] = right_idx
+        perm[right_idx] = left_idx
+    return perm
+
+
+LEFT_RIGHT_PERMUTATION = _left_right_permutation()
+
+_ANGLE_IDX = np.asarray([(i0, i1, i2) for _, i0, i1, i2 in ANGLE_TRIPLETS], dtype=np.intp)
+_BONE_IDX = np.asarray([(i0, i1) for _, i0, i1 in BONE_DEFS], dtype=np.intp)
+_TORSO_FALLBACK_IDX = np.asarray(TORSO_FALLBACK_PAIRS, dtype=np.intp)
+
+
+def _float_dtype(*arrays: np.ndarray) -> np.dtype:
+    """float32 when every input is float32 (the fast path), float64 otherwise."""
+    if all(np.asarray(arr).dtype == np.float32 for arr in arrays):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def _output(out: np.ndarray | None, shape: tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if out.shape != shape:
+        raise ValueError(f"out has shape {out.shape}, expected {shape}")
+    return out
+
+
+def _norm(vectors: np.ndarray) -> np.ndarray:
+    return np.sqrt(np.einsum("...i,...i->...", vectors, vectors))
+
+
+def swap_left_right(values: np.ndarray, *, axis: int = 0) -> np.ndarray:
+    """Copy of `values` with left and right landmarks exchanged along `axis`."""
+    return np.take(values, LEFT_RIGHT_PERMUTATION, axis=axis)
+
+
+def mirror_and_swap_points(points: np.ndarray) -> np.ndarray:
+    """Horizontal mirror of (33,3) or (N,33,3) points, left/right landmarks exchanged."""
+    mirrored = swap_left_right(points, axis=-2)
+    mirrored[..., 0] *= -1.0
+    return mirrored
+
+
+def center_and_scale(points_33: np.ndarray) -> np.ndarray:
+    if points_33.shape != (33, 3):
+        raise ValueError(f"Expected (33,3), got {points_33.shape}")
+    return center_and_scale_batch(points_33[None])[0]
+
+
+def center_and_scale_batch(points: np.ndarray, *, out: np.ndarray | None = None) -> np.ndarray:
+    """Hip-centered points in torso lengths, over (N,33,3). Rows containing NaN stay NaN.
+
+    The torso is hip-mid -> shoulder-mid; when it collapses, the mean length of
+    the usable TORSO_FALLBACK_PAIRS is used instead (1.0 if there is none).
+    `out` may be `points` itself.
+    """
+    dtype = _float_dtype(points)
+    points = np.asarray(points, dtype=dtype)
+    hip_mid = points[:, LEFT_HIP] + points[:, RIGHT_HIP]
+    hip_mid *= 0.5
+    torso = points[:, LEFT_SHOULDER] + points[:, RIGHT_SHOULDER]
+    torso *= 0.5
+    torso -= hip_mid
+    torso_len = _norm(torso)
+
+    short = np.flatnonzero(torso_len < 1e-6)
+    if short.size:
+        pts = points[short]
+        lengths = _norm(pts[:, _TORSO_FALLBACK_IDX[:, 0]] - pts[:, _TORSO_FALLBACK_IDX[:, 1]])
+        usable = lengths > 1e-6
+        count = usable.sum(axis=1)
+        fallback = np.where(usable, lengths, 0.0).sum(axis=1) / np.maximum(count, 1)
+        torso_len[short] = np.where((count > 0) & (fallback >= 1e-6), fallback, 1.0)
+
+    result = _output(out, points.shape, dtype)
+    np.subtract(points, hip_mid[:, None, :], out=result)
+    result /= torso_len[:, None, None]
+    return result
+
+
+def angles_deg(a: np.ndarray, b: np.ndarray, c: np.ndarray, *, out: np.ndarray | None = None) -> np.ndarray:
+    """Angle a-b-c in degrees over (...,3) points; NaN where an arm is shorter than 1e-8."""
+    dtype = _float_dtype(a, b, c)
+    v1 = np.subtract(a, b, dtype=dtype)
+    v2 = np.subtract(c, b, dtype=dtype)
+    n1 = _norm(v1)
+    n2 = _norm(v2)
+    defined = (n1 >= 1e-8) & (n2 >= 1e-8)
+    cos_theta = np.einsum("...i,...i->...", v1, v2)
+    n1 *= n2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cos_theta /= n1
+    np.clip(cos_theta, -1.0, 1.0, out=cos_theta)
+
+    result = _output(out, cos_theta.shape, dtype)
+    np.arccos(cos_theta, out=result)
+    np.degrees(result, out=result)
+    result[~defined] = np.nan
+    return result
+
+
+def unit_vectors(vectors: np.ndarray, *, out: np.ndarray | None = None) -> np.ndarray:
+    """(...,3) vectors scaled to unit length; NaN where shorter than 1e-8. `out` may be `vectors`."""
+    dtype = _float_dtype(vectors)
+    vectors = np.asarray(vectors, dtype=dtype)
+    norm = _norm(vectors)[..., None]
+    result = _output(out, vectors.shape, dtype)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        np.divide(vectors, norm, out=result)
+    result[~(norm[..., 0] >= 1e-8)] = np.nan
+    return result
+
+
+def joint_angles_batch(points: np.ndarray, *, out: np.ndarray | None = None) -> np.ndarray:
+    """(N,K) angles of every ANGLE_TRIPLETS entry; NaN where the angle is undefined."""
+    return angles_deg(
+        points[:, _ANGLE_IDX[:, 0]],
+        points[:, _ANGLE_IDX[:, 1]],
+        points[:, _ANGLE_IDX[:, 2]],
+        out=out,
+    )
+
+
+def bone_unit_vectors_batch(points: np.ndarray, *, out: np.ndarray | None = None) -> np.ndarray:
+    """(N,B+1,3) unit vectors of BONE_DEFS followed by the hip->shoulder torso; NaN where undefined."""
+    dtype = _float_dtype(points)
+    vec = _output(out, (points.shape[0], len(BONE_DEFS) + 1, 3), dtype)
+    np.subtract(points[:, _BONE_IDX[:, 1]], points[:, _BONE_IDX[:, 0]], out=vec[:, :-1])
+    np.subtract(
+        0.5 * (points[:, LEFT_SHOULDER] + points[:, RIGHT_SHOULDER]),
+        0.5 * (points[:, LEFT_HIP] + points[:, RIGHT_HIP]),
+        out=vec[:, -1],
+    )
+    return unit_vectors(vec, out=vec)
+
+
+def angle_weights(joint_weights: np.ndarray) -> np.ndarray:
+    """(...,K) weight of every ANGLE_TRIPLETS entry: the smallest of its three joints."""
+    return np.min(joint_weights[..., _ANGLE_IDX], axis=-1)
+
+
+def bone_weights(joint_weights: np.ndarray) -> np.ndarray:
+    """(...,B+1) weight of every BONE_DEFS entry and the torso: the smallest of their joints."""
+    bones = np.min(joint_weights[..., _BONE_IDX], axis=-1)
+    torso = np.min(joint_weights[..., [LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP]], axis=-1)
+    return np.concatenate([bones, torso[..., None]], axis=-1)
+
+
+def procrustes_align_batch(
+    ref_points: np.ndarray,
+    cur_points: np.ndarray,
+    weights: np.ndarray,
+    *,
+    out: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Weighted similarity transform of each `cur_points` row onto `ref_points`, over (N,J,3).
+
+    Joints with weight <= 0 or a non-finite coordinate are left out of the fit.
+    Returns `(aligned, err, rot, scale, trans)` with `aligned = scale * cur @ rot
+    + trans` (N,J,3) and `err` (N,) the weighted mean distance of the fitted
+    joints; rows with fewer than three usable joints get err = inf and the
+    identity transform.
+    """
+    if ref_points.shape != cur_points.shape:
+        raise ValueError("ref_points and cur_points shape mismatch")
+    dtype = _float_dtype(ref_points, cur_points, weights)
+    n, joints = ref_points.shape[:2]
+    w = np.asarray(weights, dtype=dtype).reshape(n, joints)
+
+    usable = (w > 0.0) & np.isfinite(ref_points).all(axis=2) & np.isfinite(cur_points).all(axis=2)
+    w = np.where(usable, w, 0.0)
+    w_sum = w.sum(axis=1)
+    ok = (usable.sum(axis=1) >= 3) & (w_sum > 1e-12)
+    w /= np.maximum(w_sum, 1e-12)[:, None]
+
+    xa = np.where(usable[:, :, None], ref_points, 0.0).astype(dtype, copy=False)
+    xb = np.where(usable[:, :, None], cur_points, 0.0).astype(dtype, copy=False)
+    mu_a = np.einsum("nj,nji->ni", w, xa)
+    mu_b = np.einsum("nj,nji->ni", w, xb)
+    xa -= mu_a[:, None, :]
+    xb -= mu_b[:, None, :]
+
+    h = np.einsum("nj,nji,njk->nik", w, xb, xa)
+    h[~ok] = np.eye(3, dtype=dtype)
+    u, svals, vt = np.linalg.svd(h)
+    reflected = np.linalg.det(np.matmul(vt.transpose(0, 2, 1), u.transpose(0, 2, 1))) < 0
+    vt[reflected, 2, :] *= -1.0
+    rot = np.matmul(vt.transpose(0, 2, 1), u.transpose(0, 2, 1))
+
+    denom = np.einsum("nj,nji,nji->n", w, xb, xb)
+    scale = svals.sum(axis=1) / np.maximum(denom, 1e-12)
+    rot[~ok] = np.eye(3, dtype=dtype)
+    scale[~ok] = 1.0
+    trans = mu_a - scale[:, None] * np.einsum("ni,nij->nj", mu_b, rot)
+    trans[~ok] = 0.0
+
+    resid = np.matmul(xb, rot)
+    resid *= scale[:, None, None]
+    resid -= xa
+    err = np.einsum("nj,nj->n", w, _norm(resid))
+    err[~ok] = np.inf
+
+    aligned = _output(out, cur_points.shape, dtype)
+    np.matmul(cur_points, rot, out=aligned)
+    aligned *= scale[:, None, None]
+    aligned += trans[:, None, :]
+    return aligned, err, rot, scale, trans
+
+
+def procrustes_align_numpy(
+    ref_points: np.ndarray,
+    cur_points: np.ndarray,
+    weights: np.ndarray,
+) -> tuple[np.ndarray, float, np.ndarray, float, np.ndarray]:
+    """`procrustes_align_batch` of one (J,3) pair, err and scale as floats."""
+    w = np.asarray(weights).reshape(-1)
+    if w.shape[0] != ref_points.shape[0]:
+        raise ValueError("weights length mismatch")
+    aligned, err, rot, scale, trans = procrustes_align_batch(ref_points[None], cur_points[None], w[None])
+    return (
+        aligned[0].astype(np.float32, copy=False),
+        float(err[0]),
+        rot[0].astype(np.float32, copy=False),
+        float(scale[0]),
+        trans[0].astype(np.float32, copy=False),
+    )
+
+
+def angle_scores_batch(
+    ref_angles: np.ndarray,
+    cur_angles: np.ndarray,
+    joint_weights: np.ndarray,
+    *,
+    conf_threshold: float,
+    sigma_angle: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Angle agreement of N pose pairs from their (N,K) `joint_angles_batch`.
+
+    Returns `(angle_err, angle_score, matched, diffs)`: the weighted mean
+    wrapped difference in degrees, `exp(-err / sigma_angle)`, the number of
+    angles used and the (N,K) differences. Unused angles and rows without any
+    are NaN.
+    """
+    w = angle_weights(joint_weights).astype(np.float64)
+    valid = (w >= conf_threshold) & np.isfinite(ref_angles) & np.isfinite(cur_angles)
+    diffs = np.abs(np.subtract(ref_angles, cur_angles, dtype=np.float64))
+    np.minimum(diffs, 360.0 - diffs, out=diffs)
+    diffs[~valid] = np.nan
+    w[~valid] = 0.0
+
+    matched = valid.sum(axis=1)
+    angle_err = np.einsum("nk,nk->n", w, np.nan_to_num(diffs)) / np.maximum(w.sum(axis=1), 1e-12)
+    angle_err[matched == 0] = np.nan
+    angle_score = np.exp(-angle_err / max(sigma_angle, 1e-6))
+    return angle_err, angle_score, matched, diffs
+
+
+def bone_scores_batch(
+    ref_bones: np.ndarray,
+    cur_bones: np.ndarray,
+    joint_weights: np.ndarray,
+    *,
+    conf_threshold: float,
+    rotation: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Bone direction agreement of N pose pairs from their (N,B+1,3) `bone_unit_vectors_batch`.
+
+    `rotation` (N,3,3), if given, is applied to the current bones first
+    (row vectors, as in `procrustes_align_batch`). Returns `(bone_score,
+    matched)`: the weighted mean of `(cos + 1) / 2` and the number of bones
+    used; rows without any are NaN.
+    """
+    w = bone_weights(joint_weights).astype(np.float64)
+    valid = (w >= conf_threshold) & np.isfinite(ref_bones).all(axis=2) & np.isfinite(cur_bones).all(axis=2)
+    cur = np.nan_to_num(np.asarray(cur_bones, dtype=np.float64))
+    if rotation is not None:
+        cur = np.matmul(cur, rotation)
+    cos_sim = np.einsum("nki,nki->nk", np.nan_to_num(np.asarray(ref_bones, dtype=np.float64)), cur)
+    np.clip(cos_sim, -1.0, 1.0, out=cos_sim)
+    w[~valid] = 0.0
+
+    matched = valid.sum(axis=1)
+    bone_score = np.einsum("nk,nk->n", w, 0.5 * (cos_sim + 1.0)) / np.maximum(w.sum(axis=1), 1e-12)
+    bone_score[matched == 0] = np.nan
+    return bone_score, matched
+
+
+def score_pairs_numpy(
+    *,
+    ref_norm: np.ndarray,
+    cur_norm: np.ndarray,
+    joint_w: np.ndarray,
+    ref_angles: np.ndarray,
+    cur_angles: np.ndarray,
+    ref_bones: np.ndarray,
+    cur_bones: np.ndarray,
+    config: ScoreConfig,
+) -> np.ndarray:
+    """Final scores of N (reference, current) pose pairs with precomputed features.
+
+    Same math as the stand-hold server's per-frame scorer for every pair at
+    once: `*_norm` are (N,33,3) `center_and_scale` points, `joint_w` (N,33)
+    the combined joint weights, `*_angles` (N,K) `joint_angles_batch` and
+    `*_bones` (N,B+1,3) `bone_unit_vectors_batch` of the normalized points.
+    Angles and bone directions of the current pose are taken before
+    alignment; angles do not change under the similarity transform and bone
+    directions are rotated here. Returns (N,) scores in [0,100], NaN where the
+    pair is not reliable.
+    """
+    sel = POSE_SELECTED_INDICES
+    w_sel = joint_w[:, sel]
+    reliable = w_sel >= config.conf_threshold
+    _, coord_err, rot, _, _ = procrustes_align_batch(ref_norm[:, sel], cur_norm[:, sel], np.where(reliable, w_sel, 0.0))
+    coord_score = np.exp(-coord_err / max(config.sigma_coord, 1e-6))
+
+    _, angle_score, matched_angles, _ = angle_scores_batch(
+        ref_angles,
+        cur_angles,
+        joint_w,
+        conf_threshold=config.conf_threshold,
+        sigma_angle=config.sigma_angle,
+    )
+    bone_score, matched_bones = bone_scores_batch(
+        ref_bones,
+        cur_bones,
+        joint_w,
+        conf_threshold=config.conf_threshold,
+        rotation=rot,
+    )
+
+    final = 100.0 * (config.w_coord * coord_score + config.w_angle * angle_score + config.w_bone * bone_score)
+    reliable_pair = (
+        np.isfinite(coord_err)
+        & (reliable.sum(axis=1) >= config.min_valid_joints)
+        & (matched_angles >= max(1, config.min_valid_angles))
+        & (matched_bones >= max(1, config.min_valid_bones))
+    )
+    return np.where(reliable_pair, np.clip(final, 0.0, 100.0), np.nan)
+
+
+def center_and_scale_torch(torch: Any, points: Any) -> Any:
+    """`center_and_scale_batch` of an (N,33,3) tensor."""
+    hip_mid = 0.5 * (points[:, LEFT_HIP] + points[:, RIGHT_HIP])
+    shoulder_mid = 0.5 * (points[:, LEFT_SHOULDER] + points[:, RIGHT_SHOULDER])
+    torso_len = torch.linalg.norm(shoulder_mid - hip_mid, dim=1)
+
+    pairs = torch.as_tensor(_TORSO_FALLBACK_IDX, device=points.device)
+    lengths = torch.linalg.norm(points[:, pairs[:, 0]] - points[:, pairs[:, 1]], dim=2)
+    usable = lengths > 1e-6
+    count = usable.sum(dim=1)
+    fallback = torch.where(usable, lengths, torch.zeros_like(lengths)).sum(dim=1) / count.clamp(min=1)
+    fallback = torch.where((count > 0) & (fallback >= 1e-6), fallback, torch.ones_like(fallback))
+    torso_len = torch.where(torso_len < 1e-6, fallback, torso_len)
+    return (points - hip_mid[:, None, :]) / torso_len[:, None, None]
+
+
+def joint_angles_torch(torch: Any, points: Any) -> tuple[Any, Any]:
+    """`joint_angles_batch` of an (N,33,3) tensor as `(degrees, defined)`; undefined angles are not NaN."""
+    idx = torch.as_tensor(_ANGLE_IDX, device=points.device)
+    v1 = points[:, idx[:, 0]] - points[:, idx[:, 1]]
+    v2 = points[:, idx[:, 2]] - points[:, idx[:, 1]]
+    n1 = torch.linalg.norm(v1, dim=2)
+    n2 = torch.linalg.norm(v2, dim=2)
+    defined = (n1 >= 1e-8) & (n2 >= 1e-8)
+    cos_theta = (v1 * v2).sum(dim=2) / (n1 * n2).clamp(min=1e-16)
+    return torch.rad2deg(torch.arccos(cos_theta.clamp(-1.0, 1.0))), defined
+
+
+def bone_vectors_torch(torch: Any, points: Any) -> Any:
+    """(N,B+1,3) BONE_DEFS and torso vectors of an (N,33,3) tensor, not normalized."""
+    idx = torch.as_tensor(_BONE_IDX, device=points.device)
+    vec = points[:, idx[:, 1]] - points[:, idx[:, 0]]
+    shoulder_mid = 0.5 * (points[:, LEFT_SHOULDER] + points[:, RIGHT_SHOULDER])
+    hip_mid = 0.5 * (points[:, LEFT_HIP] + points[:, RIGHT_HIP])
+    return torch.cat([vec, (shoulder_mid - hip_mid)[:, None, :]], dim=1)
+
+
+def angle_weights_torch(torch: Any, joint_weights: Any) -> Any:
+    """`angle_weights` of an (N,33) tensor."""
+    idx = torch.as_tensor(_ANGLE_IDX, device=joint_weights.device)
+    return joint_weights[:, idx].amin(dim=-1)
+
+
+def bone_weights_torch(torch: Any, joint_weights: Any) -> Any:
+    """`bone_weights` of an (N,33) tensor."""
+    idx = torch.as_tensor(_BONE_IDX, device=joint_weights.device)
+    torso = joint_weights[:, [LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP]].amin(dim=-1)
+    return torch.cat([joint_weights[:, idx].amin(dim=-1), torso[:, None]], dim=1)
+
+
+def compute_angle_score(
+    *,
+    ref_points: np.ndarray,
+    cur_points: np.ndarray,
+    joint_weights: np.ndarray,
+    conf_threshold: float,
+    sigma_angle: float,
+) -> tuple[float | None, float | None, int, dict[str, float]]:
+    angles = joint_angles_batch(np.stack([ref_points, cur_points]))
+    angle_err, angle_score, matched, diffs = angle_scores_batch(
+        angles[:1],
+        angles[1:],
+        np.asarray(joint_weights)[None],
+        conf_threshold=conf_threshold,
+        sigma_angle=sigma_angle,
+    )
+    angle_map = {
+        name: float(diff) for (name, *_), diff in zip(ANGLE_TRIPLETS, diffs[0].tolist()) if diff == diff
+    }
+    if not matched[0]:
+        return None, None, 0, angle_map
+    return float(angle_err[0]), float(angle_score[0]), int(matched[0]), angle_map
+
+
+def compute_bone_score(
+    *,
+    ref_points: np.ndarray,
+    cur_points: np.ndarray,
+    joint_weights: np.ndarray,
+    conf_threshold: float,
+) -> tuple[float | None, int]:
+    bones = bone_unit_vectors_batch(np.stack([ref_points, cur_points]))
+    bone_score, matched = bone_scores_batch(
+        bones[:1],
+        bones[1:],
+        np.asarray(joint_weights)[None],
+        conf_threshold=conf_threshold,
+    )
+    if not matched[0]:
+        return None, 0
+    return float(bone_score[0]), int(matched[0])
+
+
+def angle_deg(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> float | None:
+    v1 = a - b
+    v2 = c - b
+    n1 = float(np.linalg.norm(v1))
+    n2 = float(np.linalg.norm(v2))
+    if n1 < 1e-8 or n2 < 1e-8:
+        return None
+    cos_theta = float(np.dot(v1, v2) / (n1 * n2))
+    cos_theta = max(-1.0, min(1.0, cos_theta))
+    return float(np.degrees(np.arccos(cos_theta)))
+
+
+def wrapped_angle_diff(a: float, b: float) -> float:
+    diff = abs(a - b)
+    return min(diff, 360.0 - diff)
+
+
+def unit_vector(v: np.ndarray) -> np.ndarray | None:
+    n = float(np.linalg.norm(v))
+    if n < 1e-8:
+        return None
+    return v / n
+
+
+def motion_energy_batch(normalized: np.ndarray, joint_weights: np.ndarray, *, conf_threshold: float) -> np.ndarray:
+    """Per-frame motion energy of a (T,33,3) `center_and_scale_batch` sequence.
+
+    Row t is the mean displacement of the selected joints confident in both
+    frames t-1 and t; row 0 and rows with fewer than six such joints are NaN.
+    Frames without a pose should carry zero `joint_weights` (T,33).
+    """
+    total = normalized.shape[0]
+    vel = np.full((total,), np.nan, dtype=np.float32)
+    if total <= 1:
+        return vel
+
+    selected = normalized[:, POSE_SELECTED_INDICES]
+    pair_weight = np.minimum(joint_weights[:-1], joint_weights[1:])[:, POSE_SELECTED_INDICES]
+    valid = pair_weight >= conf_threshold
+    count = valid.sum(axis=1)
+    dist = _norm(selected[1:] - selected[:-1])
+    mean = np.where(valid, dist, 0.0).sum(axis=1) / np.maximum(count, 1)
+    vel[1:] = np.where(count >= 6, mean, np.nan)
+    return vel
+
+
+def rts_smooth_points(
+    points: np.ndarray,
+    conf: np.ndarray,
+    *,
+    fps: int,
+    min_conf: float,
+    r_base: float,
+    accel_var: float,
+    reset_gap_frames: int,
+) -> np.ndarray:
+    """(T,33,3) float32 points smoothed per joint and axis by `kalman_rts_smooth_1d`.
+
+    `conf` (T,33) weighs each measurement; frames without a pose should have
+    zero confidence and are filled in by the filter.
+    """
+    dt = 1.0 / max(float(fps), 1.0)
+    out = np.full(points.shape, np.nan, dtype=np.float32)
+    for joint_idx in range(points.shape[1]):
+        conf_joint = conf[:, joint_idx].astype(np.float64, copy=False)
+        for axis_idx in range(3):
+            out[:, joint_idx, axis_idx] = kalman_rts_smooth_1d(
+                z=points[:, joint_idx, axis_idx].astype(np.float64, copy=False),
+                w=conf_joint,
+                dt=dt,
+                r_base=float(r_base),
+                accel_var=float(accel_var),
+                min_w=float(min_conf),
+                reset_gap_frames=int(reset_gap_frames),
+            )
+    return out
+
+
+def kalman_rts_smooth_1d(
+    z: np.ndarray,
+    w: np.ndarray,
+    *,
+    dt: float,
+    r_base: float,
+    accel_var: float,
+    min_w: float,
+    reset_gap_frames: int,
+) -> np.ndarray:
+    total = int(z.shape[0])
+    if total == 0:
+        return z.astype(np.float32, copy=True)
+
+    z = np.asarray(z, dtype=np.float64).reshape(-1)
+    w = np.asarray(w, dtype=np.float64).reshape(-1)
+
+    valid = np.isfinite(z) & (w >= min_w)
+    if not bool(np.any(valid)):
+        return z.astype(np.float32, copy=True)
+
+    first_idx = int(np.argmax(valid))
+    init_val = float(z[first_idx])
+
+    f = np.array([[1.0, float(dt)], [0.0, 1.0]], dtype=np.float64)
+    h = np.array([1.0, 0.0], dtype=np.float64)
+    eye2 = np.eye(2, dtype=np.float64)
+
+    dt2 = float(dt) * float(dt)
+    q = float(accel_var) * np.array(
+        [
+            [dt2 * dt2 / 4.0, dt2 * float(dt) / 2.0],
+            [dt2 * float(dt) / 2.0, dt2],
+        ],
+        dtype=np.float64,
+    )
+
+    x_f = np.zeros((total, 2), dtype=np.float64)
+    p_f = np.zeros((total, 2, 2), dtype=np.float64)
+    x_p = np.zeros((total, 2), dtype=np.float64)
+    p_p = np.zeros((total, 2, 2), dtype=np.float64)
+
+    x = np.array([init_val, 0.0], dtype=np.float64)
+    p = np.eye(2, dtype=np.float64)
+    gap = 0
+
+    for k in range(total):
+        if k == 0:
+            x_pred = x
+            p_pred = p
+        else:
+            x_pred = f @ x
+            p_pred = f @ p @ f.T + q
+
+        x_p[k] = x_pred
+        p_p[k] = p_pred
+
+        zk = float(z[k]) if np.isfinite(z[k]) else float("nan")
+        wk = float(w[k]) if np.isfinite(w[k]) else 0.0
+        meas_ok = wk >= min_w and np.isfinite(zk)
+
+        if meas_ok:
+            if gap >= int(reset_gap_frames):
+                x_pred = np.array([zk, 0.0], dtype=np.float64)
+                p_pred = np.eye(2, dtype=np.float64)
+            gap = 0
+
+            r = float(r_base / max(wk * wk, 1e-6))
+            y = zk - float(h @ x_pred)
+            s = float(h @ p_pred @ h) + r
+            if s < 1e-12:
+                x = x_pred
+                p = p_pred
+            else:
+                k_gain = (p_pred @ h) / s
+                x = x_pred + k_gain * y
+                p = (eye2 - np.outer(k_gain, h)) @ p_pred
+        else:
+            gap += 1
+            x = x_pred
+            p = p_pred
+
+        x_f[k] = x
+        p_f[k] = p
+
+    x_s = np.zeros_like(x_f)
+    p_s = np.zeros_like(p_f)
+    x_s[total - 1] = x_f[total - 1]
+    p_s[total - 1] = p_f[total - 1]
+
+    for k in range(total - 2, -1, -1):
+        p_pred_next = p_p[k + 1]
+        det = float(p_pred_next[0, 0] * p_pred_next[1, 1] - p_pred_next[0, 1] * p_pred_next[1, 0])
+        if abs(det) < 1e-12:
+            x_s[k] = x_f[k]
+            p_s[k] = p_f[k]
+            continue
+        inv = (1.0 / det) * np.array(
+            [
+                [p_pred_next[1, 1], -p_pred_next[0, 1]],
+                [-p_pred_next[1, 0], p_pred_next[0, 0]],
+            ],
+            dtype=np.float64,
+        )
+        c = p_f[k] @ f.T @ inv
+        x_s[k] = x_f[k] + c @ (x_s[k + 1] - x_p[k + 1])
+        p_s[k] = p_f[k] + c @ (p_s[k + 1] - p_p[k + 1]) @ c.T
+
+    return x_s[:, 0].astype(np.float32, copy=False)
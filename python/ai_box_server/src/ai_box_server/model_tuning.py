@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+POSE_MODEL_VARIANTS = ("lite", "full", "heavy")
+
+# mediapipe.solutions model_complexity for each variant.
+SOLUTIONS_MODEL_COMPLEXITY = {"lite": 0, "full": 1, "heavy": 2}
+
+# Share of the frame interval that pose inference may use. The rest is left for
+# capture, JPEG encoding and socket writes.
+POSE_LATENCY_BUDGET_RATIO = 0.6
+
+
+@dataclass(frozen=True)
+class PoseModelLevel:
+    variant: str
+    max_side: int  # 0: native resolution
+
+    def as_dict(self) -> dict[str, object]:
+        return {"variant": self.variant, "input_max_side": self.max_side}
+
+
+def build_model_ladder(top_max_side: int) -> list[PoseModelLevel]:
+    """Levels ordered from cheapest to most accurate.
+
+    The cheap end lowers the inference resolution of the lite model, the
+    expensive end keeps `top_max_side` and moves to bigger models.
+    """
+    top = max(0, int(top_max_side))
+    ladder: list[PoseModelLevel] = []
+    for side in (320, 480):
+        if top == 0 or side < top:
+            ladder.append(PoseModelLevel("lite", side))
+    for variant in POSE_MODEL_VARIANTS:
+        ladder.append(PoseModelLevel(variant, top))
+    return ladder
+
+
+class LatencyAutoTuner:
+    """Steps the pose model up or down to keep inference within a latency budget.
+
+    Latency is tracked as an EMA of recent `detect_video` calls. After at least
+    `window` samples at the current level, the tuner steps down when the EMA is
+    over budget and steps up when it is under `up_ratio * budget`. A level that
+    had to be left for being too slow is not retried for `backoff_windows`
+    windows, which keeps the tuner from oscillating between two levels.
+    """
+
+    def __init__(
+        self,
+        *,
+        fps: int,
+        ladder: list[PoseModelLevel],
+        start_level: int,
+        window: int = 15,
+        up_ratio: float = 0.5,
+        backoff_windows: int = 10,
+        ema_alpha: float = 0.2,
+    ) -> None:
+        if not ladder:
+            raise ValueError("ladder must not be empty")
+        self.ladder = ladder
+        self.level = max(0, min(len(ladder) - 1, int(start_level)))
+        self.budget_ms = 1000.0 / max(int(fps), 1) * POSE_LATENCY_BUDGET_RATIO
+        self.window = max(1, int(window))
+        self.up_ratio = float(up_ratio)
+        self.backoff_samples = max(1, int(backoff_windows)) * self.window
+        self.ema_alpha = float(ema_alpha)
+        self.avg_ms: float | None = None
+        self._samples = 0
+        self._samples_at_level = 0
+        self._blocked_until: dict[int, int] = {}
+
+    @property
+    def current(self) -> PoseModelLevel:
+        return self.ladder[self.level]
+
+    def observe(self, latency_ms: float) -> PoseModelLevel | None:
+        """Records one inference latency. Returns the new level when it changes."""
+        latency_ms = float(latency_ms)
+        if self.avg_ms is None:
+            self.avg_ms = latency_ms
+        else:
+            self.avg_ms += self.ema_alpha * (latency_ms - self.avg_ms)
+        self._samples += 1
+        self._samples_at_level += 1
+        if self._samples_at_level < self.window:
+            return None
+
+        target = self.level
+        if self.avg_ms > self.budget_ms and self.level > 0:
+            self._blocked_until[self.level] = self._samples + self.backoff_samples
+            target = self.level - 1
+        elif (
+            self.avg_ms < self.up_ratio * self.budget_ms
+            and self.level < len(self.ladder) - 1
+            and self._blocked_until.get(self.level + 1, 0) <= self._samples
+        ):
+            target = self.level + 1
+
+        if target == self.level:
+            return None
+        self.level = target
+        self._samples_at_level = 0
+        self.avg_ms = None
+        return self.current
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+from typing import Any
+
+LOGGER = logging.getLogger("ai_box_server")
+
+# mediapipe and torch take seconds to import, so they are loaded on first use
+# instead of at module import. `--help` and CPU-only scoring never touch them.
+_MODULES: dict[str, Any] = {}
+_LOCK = threading.Lock()
+
+
+def _load_optional(name: str) -> Any | None:
+    if name in _MODULES:
+        return _MODULES[name]
+    with _LOCK:
+        if name not in _MODULES:
+            try:
+                _MODULES[name] = importlib.import_module(name)
+            except Exception as exc:  # noqa: BLE001
+                LOGGER.debug("optional dependency %s is unavailable: %s", name, exc)
+                _MODULES[name] = None
+    return _MODULES[name]
+
+
+def load_mediapipe() -> Any | None:
+    return _load_optional("mediapipe")
+
+
+def load_torch() -> Any | None:
+    return _load_optional("torch")
+
+
+def load_pyarrow_parquet() -> Any | None:
+    return _load_optional("pyarrow.parquet")
+
+
+def torch_cuda_available() -> bool:
+    torch = load_torch()
+    return bool(torch is not None and torch.cuda.is_available())
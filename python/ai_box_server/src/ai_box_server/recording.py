@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import logging
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import BinaryIO
+
+import cv2
+import numpy as np
+
+LOGGER = logging.getLogger("ai_box_server")
+
+RECORDING_MAGIC = b"AIBXREC1"
+
+# Record kinds.
+RECORD_JPEG = 1  # camera frame, re-encoded as JPEG
+RECORD_RAW = 2  # camera frame, uncompressed BGR (bit-exact replay)
+RECORD_CLIENT_JPEG = 3  # `client_frame` upload, JPEG bytes as received
+
+REPLAY_SPEEDS = ("original", "max")
+
+# kind, rotation_degrees, width, height, capture_timestamp_ms, payload length
+_RECORD_HEADER = struct.Struct("<BxhHHqI")
+
+
+@dataclass(frozen=True)
+class RecordedFrame:
+    kind: int
+    capture_timestamp_ms: int
+    width: int
+    height: int
+    rotation_degrees: int
+    payload: bytes
+
+    def decode(self) -> np.ndarray | None:
+        """BGR image of the record (client frames are not rotated yet)."""
+        if self.kind == RECORD_RAW:
+            return np.frombuffer(self.payload, dtype=np.uint8).reshape(self.height, self.width, 3).copy()
+        return cv2.imdecode(np.frombuffer(self.payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class FrameRecorder:
+    """Appends captured frames to a recording file.
+
+    The file is `RECORDING_MAGIC` followed by records of `_RECORD_HEADER` and
+    payload, so a recording cut short by a crash is still readable up to the
+    last complete record. The stand-hold server opens one per client session
+    so records of different connections never interleave.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        raw: bool = False,
+        jpeg_quality: int = 95,
+        client_frames: bool = False,
+    ) -> None:
+        self.path = Path(path).expanduser()
+        self.raw = raw
+        self.jpeg_quality = int(jpeg_quality)
+        self.client_frames = client_frames
+        self.frames = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: BinaryIO | None = self.path.open("wb")
+        self._file.write(RECORDING_MAGIC)
+        LOGGER.info("recording frames to %s", self.path)
+
+    def write_frame(self, frame: np.ndarray, capture_timestamp_ms: int) -> None:
+        height, width = frame.shape[:2]
+        if self.raw:
+            self._write(RECORD_RAW, capture_timestamp_ms, width, height, 0, np.ascontiguousarray(frame).tobytes())
+            return
+        ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if ok:
+            self._write(RECORD_JPEG, capture_timestamp_ms, width, height, 0, data.tobytes())
+
+    def write_client_frame(self, jpeg: bytes, capture_timestamp_ms: int, *, rotation_degrees: int = 0) -> None:
+        if self.client_frames:
+            self._write(RECORD_CLIENT_JPEG, capture_timestamp_ms, 0, 0, rotation_degrees, jpeg)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        LOGGER.info("recording closed: %s (%d frames)", self.path, self.frames)
+
+    def _write(self, kind: int, capture_ms: int, width: int, height: int, rotation: int, payload: bytes) -> None:
+        header = _RECORD_HEADER.pack(kind, rotation, width, height, int(capture_ms), len(payload))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(header)
+            self._file.write(payload)
+            self._file.flush()
+            self.frames += 1
+
+
+def iter_recording(path: Path | str) -> Iterator[RecordedFrame]:
+    """Records of a recording in file order; the header is checked before returning."""
+    path = Path(path).expanduser()
+    src = path.open("rb")
+    if src.read(len(RECORDING_MAGIC)) != RECORDING_MAGIC:
+        src.close()
+        raise ValueError(f"not a frame recording: {path}")
+    return _iter_records(src, path)
+
+
+def _iter_records(src: BinaryIO, path: Path) -> Iterator[RecordedFrame]:
+    with src:
+        while True:
+            header = src.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            kind, rotation, width, height, capture_ms, length = _RECORD_HEADER.unpack(header)
+            payload = src.read(length)
+            if len(payload) < length:
+                LOGGER.warning("truncated record at the end of %s", path)
+                return
+            yield RecordedFrame(kind, capture_ms, width, height, rotation, payload)
+
+
+class ReplaySource:
+    """Plays a recording back record by record.
+
+    `original` speed waits until each record is due relative to the first
+    one; `max` returns records as fast as they are read. Every record is
+    delivered (none are skipped when the reader falls behind), and capture
+    timestamps are the recorded ones, shifted by the recording length on each
+    loop so they keep increasing.
+    """
+
+    def __init__(self, path: Path | str, *, speed: str = "original", loop: bool = False) -> None:
+        if speed not in REPLAY_SPEEDS:
+            raise ValueError(f"unknown replay speed: {speed}")
+        self.path = Path(path).expanduser()
+        self.speed = speed
+        self.loop = loop
+        self.finished = False
+        self._records = iter_recording(self.path)
+        self._first_ms: int | None = None
+        self._pass_last_ms = 0
+        self._pass_frames = 0
+        self._loop_offset_ms = 0
+        self._started_at = 0.0
+        self._delivered = 0
+
+    def read(self) -> RecordedFrame | None:
+        record = self._next_record()
+        if record is None:
+            return None
+        if self._first_ms is None:
+            self._first_ms = record.capture_timestamp_ms
+            self._started_at = time.monotonic()
+        self._pass_last_ms = record.capture_timestamp_ms
+        self._pass_frames += 1
+        capture_ms = record.capture_timestamp_ms + self._loop_offset_ms
+        if self.speed == "original":
+            delay = self._started_at + (capture_ms - self._first_ms) / 1000.0 - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self._delivered += 1
+        if self._loop_offset_ms:
+            record = replace(record, capture_timestamp_ms=capture_ms)
+        return record
+
+    def close(self) -> None:
+        self._records.close()
+        self.finished = True
+
+    def _next_record(self) -> RecordedFrame | None:
+        if self.finished:
+            return None
+        record = next(self._records, None)
+        if record is None and self.loop and self._first_ms is not None:
+            # The next pass starts one mean frame interval after the last record.
+            span_ms = self._pass_last_ms - self._first_ms
+            interval_ms = max(1, round(span_ms / (self._pass_frames - 1))) if self._pass_frames > 1 else 1
+            self._loop_offset_ms += span_ms + interval_ms
+            self._pass_frames = 0
+            self._records = iter_recording(self.path)
+            record = next(self._records, None)
+        if record is None:
+            self.finished = True
+            LOGGER.info("replay finished: %s (%d frames)", self.path, self._delivered)
+        return record
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Callable
+
+import numpy as np
+
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None
+
+
+LANDMARK_FORMAT_OBJECTS = "objects"
+LANDMARK_FORMAT_COMPACT = "compact"
+LANDMARK_FORMATS = (LANDMARK_FORMAT_OBJECTS, LANDMARK_FORMAT_COMPACT)
+
+# Column order of one compact keypoint row: [x, y, z, visibility, presence].
+COMPACT_LANDMARK_FIELDS = ["x", "y", "z", "visibility", "presence"]
+
+
+class JsonLineSerializer:
+    """Encodes protocol messages as newline-terminated UTF-8 JSON lines.
+
+    Uses orjson when it is installed and falls back to the stdlib encoder.
+    Both backends accept numpy arrays/scalars inside the payload, so callers
+    can hand over landmark arrays without converting them to Python lists,
+    and both write the same values: NaN/Infinity as `null` and float32 with
+    its shortest round-tripping digits.
+    """
+
+    def __init__(self, backend: str = "auto") -> None:
+        pref = backend.lower().strip()
+        if pref not in {"auto", "orjson", "json"}:
+            raise ValueError(f"unknown json backend: {backend}")
+        if pref == "orjson" and orjson is None:
+            raise RuntimeError("orjson is not installed. `pip install -e .[fast]`")
+
+        self.backend = "orjson" if pref != "json" and orjson is not None else "json"
+        self._dumps: Callable[[dict[str, Any]], bytes]
+        if self.backend == "orjson":
+            self._dumps = _dumps_orjson
+        else:
+            self._dumps = _dumps_stdlib
+
+    def dumps_line(self, payload: dict[str, Any]) -> bytes:
+        return self._dumps(payload)
+
+
+def _dumps_orjson(payload: dict[str, Any]) -> bytes:
+    return orjson.dumps(
+        payload,
+        default=_json_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE,
+    )
+
+
+def _dumps_stdlib(payload: dict[str, Any]) -> bytes:
+    try:
+        text = _stdlib_dumps(payload)
+    except ValueError:
+        # A non-finite Python float somewhere in the payload; rare, so only then walk it.
+        text = _stdlib_dumps(_replace_non_finite(payload))
+    return (text + "\n").encode("utf-8")
+
+
+def _stdlib_dumps(payload: Any) -> str:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, allow_nan=False, default=_json_default)
+
+
+def _replace_non_finite(value: Any) -> Any:
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _replace_non_finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_replace_non_finite(item) for item in value]
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "f":
+            return _float_array_to_list(value)
+        return value.tolist()
+    if isinstance(value, np.floating):
+        return _float_array_to_list(np.asarray(value))
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _float_array_to_list(values: np.ndarray) -> Any:
+    """Python floats as orjson writes the array: shortest digits of the dtype, non-finite as None."""
+    if values.dtype.itemsize < 8:
+        # float(np.float32(x)) carries float64 noise digits (0.1 -> 0.10000000149011612).
+        converted = values.astype(str).astype(np.float64)
+    else:
+        converted = values.astype(np.float64)
+    finite = np.isfinite(converted)
+    if not finite.all():
+        converted = converted.astype(object)
+        converted[~finite] = None
+    return converted.tolist()
+
+
+def normalize_landmark_format(raw: Any) -> str | None:
+    value = str(raw or "").strip().lower()
+    if value in LANDMARK_FORMATS:
+        return value
+    return None
+
+
+def keypoints_from_arrays(
+    points: np.ndarray,
+    vis: np.ndarray,
+    pres: np.ndarray | None,
+    *,
+    landmark_format: str = LANDMARK_FORMAT_OBJECTS,
+) -> Any:
+    """Builds the `keypoints` field of a landmarks message from (33,3) arrays.
+
+    `objects` keeps the key-per-field output (`{"x":..,"y":..}` per point).
+    `compact` returns a (33,5) float32 array that the serializer writes as an
+    array of `[x, y, z, visibility, presence]` rows.
+    """
+    if landmark_format == LANDMARK_FORMAT_COMPACT:
+        count = int(points.shape[0])
+        rows = np.empty((count, 5), dtype=np.float32)
+        rows[:, 0:3] = points
+        rows[:, 3] = vis
+        rows[:, 4] = 1.0 if pres is None else pres
+        return rows
+
+    if pres is None:
+        table = np.column_stack((points, vis)).astype(np.float64).tolist()
+        return [{"x": x, "y": y, "z": z, "visibility": v} for x, y, z, v in table]
+
+    table = np.column_stack((points, vis, pres)).astype(np.float64).tolist()
+    return [{"x": x, "y": y, "z": z, "visibility": v, "presence": p} for x, y, z, v, p in table]
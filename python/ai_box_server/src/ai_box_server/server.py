@@ -5,22 +5,40 @@ import asyncio
 import base64
 import json
 import logging
-import math
 import time
+from collections import deque
 from dataclasses import dataclass
 from typing import Any
 
 import cv2
 import numpy as np
 
-try:
-    import mediapipe as mp
-except Exception:  # pragma: no cover
-    mp = None
+from .clock import CaptureClock, pong_message, read_stamped, wall_clock_ms
+from .dance_scoring import MIN_PACK_ROWS, ChoreographyTracker, DanceScoringConfig, LivePose
+from .optional_deps import load_mediapipe
+from .serialization import (
+    COMPACT_LANDMARK_FIELDS,
+    LANDMARK_FORMAT_COMPACT,
+    LANDMARK_FORMAT_OBJECTS,
+    JsonLineSerializer,
+    keypoints_from_arrays,
+    normalize_landmark_format,
+)
+from .template_pack import COORDINATE_SPACE_IMAGE, TemplatePack, load_template_pack
 
 
 LOGGER = logging.getLogger("ai_box_server")
 
+# Broadcast rate while nobody is in front of the camera.
+IDLE_FPS = 3
+# Presence gate: frames are compared as small grayscale images, a pixel counts
+# as changed above PRESENCE_PIXEL_DELTA, and inference resumes when at least
+# PRESENCE_CHANGED_FRACTION of the pixels changed (or every PRESENCE_RECHECK_SEC).
+PRESENCE_GATE_SIZE = (64, 36)
+PRESENCE_PIXEL_DELTA = 20
+PRESENCE_CHANGED_FRACTION = 0.01
+PRESENCE_RECHECK_SEC = 2.0
+
 
 @dataclass
 class ServerConfig:
@@ -31,12 +49,19 @@ class ServerConfig:
     app_video_mode: str
     fps: int
     jpeg_quality: int
+    json_backend: str = "auto"
+    reference_pack: str | None = None
+    score_window_ms: float = 1000.0
+    presence_gate: bool = True
 
 
 class PoseEstimator:
     def __init__(self) -> None:
         self._pose = None
-        if mp is not None:
+        mp = load_mediapipe()
+        if mp is None:
+            LOGGER.warning("mediapipe is not installed; no landmarks will be sent")
+        else:
             self._pose = mp.solutions.pose.Pose(
                 static_image_mode=False,
                 model_complexity=1,
@@ -45,41 +70,52 @@ class PoseEstimator:
                 min_tracking_confidence=0.5,
             )
 
-    def detect(self, frame_bgr: np.ndarray) -> list[dict[str, float]]:
+    def detect(self, frame_bgr: np.ndarray) -> np.ndarray | None:
+        """Returns a (33,4) float32 array of [x, y, z, visibility] rows, None when no person is found."""
         if self._pose is None:
-            return self._synthetic_landmarks()
+            return None
 
         rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
         result = self._pose.process(rgb)
         if result.pose_landmarks is None:
-            return self._synthetic_landmarks()
+            return None
 
-        landmarks: list[dict[str, float]] = []
-        for lm in result.pose_landmarks.landmark:
-            landmarks.append(
-                {
-                    "x": float(lm.x),
-                    "y": float(lm.y),
-                    "z": float(lm.z),
-                    "visibility": float(lm.visibility),
-                }
-            )
-        return landmarks
+        return np.asarray(
+            [[lm.x, lm.y, lm.z, lm.visibility] for lm in result.pose_landmarks.landmark],
+            dtype=np.float32,
+        )
 
-    @staticmethod
-    def _synthetic_landmarks() -> list[dict[str, float]]:
-        t = time.time()
-        points: list[dict[str, float]] = []
-        for idx in range(33):
-            points.append(
-                {
-                    "x": 0.5 + 0.2 * math.sin(t * 1.8 + idx * 0.11),
-                    "y": 0.5 + 0.2 * math.cos(t * 1.6 + idx * 0.13),
-                    "z": 0.0,
-                    "visibility": 0.8,
-                }
-            )
-        return points
+
+class PresenceGate:
+    """Skips pose inference while the area in front of the camera is empty.
+
+    While a pose is found every frame goes to the model. After a frame without
+    a pose, frames are only compared with the previous one as tiny grayscale
+    images, and inference runs again once enough pixels change, or every
+    PRESENCE_RECHECK_SEC in case someone entered without visible motion.
+    """
+
+    def __init__(self) -> None:
+        self._prev: np.ndarray | None = None
+        self._person = True
+        self._checked_at = 0.0
+
+    @property
+    def idle(self) -> bool:
+        return not self._person
+
+    def should_detect(self, frame_bgr: np.ndarray, now: float) -> bool:
+        small = cv2.resize(frame_bgr, PRESENCE_GATE_SIZE, interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        prev, self._prev = self._prev, small
+        if self._person or prev is None or now - self._checked_at >= PRESENCE_RECHECK_SEC:
+            return True
+        changed = np.count_nonzero(cv2.absdiff(small, prev) > PRESENCE_PIXEL_DELTA)
+        return changed >= PRESENCE_CHANGED_FRACTION * small.size
+
+    def observe(self, detected: bool, now: float) -> None:
+        self._person = detected
+        self._checked_at = now
 
 
 class FrameProvider:
@@ -90,13 +126,14 @@ class FrameProvider:
         else:
             parsed = source
         self._capture = cv2.VideoCapture(parsed)
+        self._clock = CaptureClock()
 
-    def read(self) -> np.ndarray:
-        if self._capture.isOpened():
-            ok, frame = self._capture.read()
-            if ok and frame is not None:
-                return frame
-        return self._placeholder_frame()
+    def read(self) -> tuple[np.ndarray, int]:
+        """Next frame and its wall-clock capture time in ms."""
+        stamped = read_stamped(self._capture, self._clock)
+        if stamped is not None:
+            return stamped
+        return self._placeholder_frame(), wall_clock_ms()
 
     def close(self) -> None:
         if self._capture is not None:
@@ -118,76 +155,392 @@ class FrameProvider:
         return frame
 
 
+# Ticks a subscriber may fall behind before its oldest pending tick is dropped.
+SUBSCRIBER_QUEUE_TICKS = 2
+
+
+class Subscriber:
+    """Pending output of one connection.
+
+    Broadcast ticks (the serialized `landmarks`/`frame` lines of one capture)
+    are droppable: a client that reads slower than `--fps` loses its oldest
+    ticks instead of holding back the broadcast. Replies and scoring messages
+    are never dropped.
+    """
+
+    def __init__(self, landmark_format: str) -> None:
+        self.landmark_format = landmark_format
+        self.tracker: ChoreographyTracker | None = None
+        self.dropped = 0
+        self._items: deque[tuple[bool, bytes]] = deque()
+        self._ticks = 0
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def offer(self, data: bytes, *, droppable: bool = True) -> None:
+        if droppable:
+            if self._ticks >= SUBSCRIBER_QUEUE_TICKS:
+                for idx, (is_tick, _) in enumerate(self._items):
+                    if is_tick:
+                        del self._items[idx]
+                        break
+                self._ticks -= 1
+                self.dropped += 1
+            self._ticks += 1
+        self._items.append((droppable, data))
+        self._ready.set()
+
+    def close(self) -> None:
+        """Ends the stream once everything already offered has been taken."""
+        self._closed = True
+        self._ready.set()
+
+    async def next_batch(self) -> bytes:
+        """Everything pending, in order, as one write; empty once closed and drained."""
+        while not self._items:
+            if self._closed:
+                return b""
+            self._ready.clear()
+            await self._ready.wait()
+        data = b"".join(item for _, item in self._items)
+        self._items.clear()
+        self._ticks = 0
+        return data
+
+
+class PoseBroadcaster:
+    """Runs capture and pose inference once at `--fps` for all connections.
+
+    The video source is opened when the first client subscribes and released
+    after the last one leaves; the pose model is loaded once and kept. Every
+    payload is serialized once per tick (landmarks once per landmark format in
+    use) and the same bytes are queued to each subscriber.
+    """
+
+    def __init__(self, config: ServerConfig, *, mediapipe_available: bool) -> None:
+        self.config = config
+        # Probed once at startup in a worker thread; the import must not run on the event loop.
+        self.mediapipe_available = mediapipe_available
+        self.serializer = JsonLineSerializer(config.json_backend)
+        self._subscribers: set[Subscriber] = set()
+        self._task: asyncio.Task[None] | None = None
+        self._estimator: PoseEstimator | None = None
+        self._frame_provider: FrameProvider | None = None
+        self._gate = PresenceGate() if config.presence_gate else None
+
+    def subscribe(self, landmark_format: str) -> Subscriber:
+        subscriber = Subscriber(landmark_format)
+        self._subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    async def close(self) -> None:
+        self._subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        active_interval = 1.0 / max(self.config.fps, 1)
+        idle_interval = max(active_interval, 1.0 / IDLE_FPS)
+        try:
+            if self._estimator is None:
+                self._estimator = await asyncio.to_thread(PoseEstimator)
+            self._frame_provider = await asyncio.to_thread(FrameProvider, self.config.video_source)
+            LOGGER.info("broadcast started: %s", self.config.video_source)
+
+            while self._subscribers:
+                start = time.monotonic()
+                scoring = [sub for sub in self._subscribers if sub.tracker is not None]
+                capture_ms, landmarks, frame_line, scored = await asyncio.to_thread(self._capture_tick, scoring)
+                self._publish(capture_ms, landmarks, frame_line, scored)
+
+                interval = idle_interval if self._gate is not None and self._gate.idle else active_interval
+                elapsed = time.monotonic() - start
+                if elapsed < interval:
+                    await asyncio.sleep(interval - elapsed)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.exception("broadcast loop failed")
+            # Nothing more will be published to these connections: tell them
+            # why and end them; the next subscribe starts a fresh loop.
+            error = self.serializer.dumps_line(
+                {"type": "status", "level": "error", "message": f"pose broadcast failed: {exc}"}
+            )
+            for subscriber in list(self._subscribers):
+                subscriber.offer(error, droppable=False)
+                subscriber.close()
+            self._subscribers.clear()
+        finally:
+            if self._frame_provider is not None:
+                self._frame_provider.close()
+                self._frame_provider = None
+            if self._task is asyncio.current_task():
+                self._task = None
+            LOGGER.info("broadcast stopped")
+
+    def _capture_tick(
+        self, scoring: list[Subscriber]
+    ) -> tuple[int, np.ndarray | None, bytes, list[tuple[Subscriber, ChoreographyTracker, bytes]]]:
+        """Reads, detects, scores and (for embedded frames) encodes one frame. Runs in a worker thread."""
+        assert self._frame_provider is not None and self._estimator is not None
+        frame, capture_ms = self._frame_provider.read()
+        now = time.monotonic()
+        landmarks: np.ndarray | None = None
+        if self._gate is None or self._gate.should_detect(frame, now):
+            landmarks = self._estimator.detect(frame)
+            if self._gate is not None:
+                self._gate.observe(landmarks is not None, now)
+
+        scored: list[tuple[Subscriber, ChoreographyTracker, bytes]] = []
+        if scoring:
+            live = None if landmarks is None else LivePose.from_arrays(landmarks[:, :3], landmarks[:, 3])
+            for subscriber in scoring:
+                tracker = subscriber.tracker
+                if tracker is None:
+                    continue
+                try:
+                    messages = tracker.update(live, capture_ms)
+                except Exception as exc:  # noqa: BLE001
+                    # One broken session must not end the broadcast shared by everyone.
+                    LOGGER.exception("dance scoring failed")
+                    tracker.finished = True
+                    messages = [{"type": "error", "message": f"dance scoring failed: {exc}"}]
+                if messages:
+                    lines = (self.serializer.dumps_line({**msg, "capture_timestamp_ms": capture_ms}) for msg in messages)
+                    scored.append((subscriber, tracker, b"".join(lines)))
+
+        frame_line = b""
+        if self.config.app_video_mode in {"embedded_frames", "both"}:
+            frame_line = self.serializer.dumps_line(
+                {
+                    "type": "frame",
+                    "timestamp_ms": wall_clock_ms(),
+                    "capture_timestamp_ms": capture_ms,
+                    "width": int(frame.shape[1]),
+                    "height": int(frame.shape[0]),
+                    "jpeg_base64": self._encode_frame(frame),
+                }
+            )
+        return capture_ms, landmarks, frame_line, scored
+
+    def _publish(
+        self,
+        capture_ms: int,
+        landmarks: np.ndarray | None,
+        frame_line: bytes,
+        scored: list[tuple[Subscriber, ChoreographyTracker, bytes]],
+    ) -> None:
+        timestamp_ms = wall_clock_ms()
+        if landmarks is None:
+            # Same for every landmark format: no keypoints to send.
+            no_pose = {"type": "no_pose", "timestamp_ms": timestamp_ms, "capture_timestamp_ms": capture_ms}
+            data = self.serializer.dumps_line(no_pose) + frame_line
+            for subscriber in list(self._subscribers):
+                subscriber.offer(data)
+        else:
+            ticks: dict[str, bytes] = {}
+            for subscriber in list(self._subscribers):
+                data = ticks.get(subscriber.landmark_format)
+                if data is None:
+                    data = self._landmarks_line(landmarks, subscriber.landmark_format, timestamp_ms, capture_ms)
+                    data += frame_line
+                    ticks[subscriber.landmark_format] = data
+                subscriber.offer(data)
+        for subscriber, tracker, data in scored:
+            # A dance_stop/dance_start handled while this tick ran already replaced the tracker.
+            if subscriber in self._subscribers and subscriber.tracker is tracker:
+                subscriber.offer(data, droppable=False)
+                if tracker.finished:
+                    # Completed or failed: nothing more to score for this subscriber.
+                    subscriber.tracker = None
+
+    def _landmarks_line(self, landmarks: np.ndarray, landmark_format: str, timestamp_ms: int, capture_ms: int) -> bytes:
+        landmarks_message: dict[str, Any] = {
+            "type": "landmarks",
+            "timestamp_ms": timestamp_ms,
+            "capture_timestamp_ms": capture_ms,
+            "keypoints": keypoints_from_arrays(
+                landmarks[:, :3],
+                landmarks[:, 3],
+                None,
+                landmark_format=landmark_format,
+            ),
+        }
+        if landmark_format == LANDMARK_FORMAT_COMPACT:
+            landmarks_message["format"] = LANDMARK_FORMAT_COMPACT
+            landmarks_message["fields"] = COMPACT_LANDMARK_FIELDS
+        return self.serializer.dumps_line(landmarks_message)
+
+    def _encode_frame(self, frame: np.ndarray) -> str:
+        ok, data = cv2.imencode(
+            ".jpg",
+            frame,
+            [cv2.IMWRITE_JPEG_QUALITY, int(self.config.jpeg_quality)],
+        )
+        if not ok:
+            return ""
+        return base64.b64encode(data.tobytes()).decode("ascii")
+
+
 class ClientSession:
     def __init__(
         self,
         reader: asyncio.StreamReader,
         writer: asyncio.StreamWriter,
         config: ServerConfig,
+        broadcaster: PoseBroadcaster,
+        reference: TemplatePack | None = None,
     ) -> None:
         self.reader = reader
         self.writer = writer
         self.config = config
-        self.estimator = PoseEstimator()
-        self.frame_provider = FrameProvider(config.video_source)
+        self.broadcaster = broadcaster
+        self.reference = reference
+        self.serializer = JsonLineSerializer(config.json_backend)
+        self.landmark_format = LANDMARK_FORMAT_OBJECTS
+        self.subscriber: Subscriber | None = None
+        self._hello: dict[str, Any] | None = None
 
     async def run(self) -> None:
         addr = self.writer.get_extra_info("peername")
         LOGGER.info("client connected: %s", addr)
 
-        await self._send_json(
-            {
-                "type": "status",
-                "level": "info",
-                "message": "client connected",
-            }
-        )
-
-        if self.config.app_video_mode in {"rtsp_url", "both"} and self.config.hikvision_rtsp:
+        tasks: list[asyncio.Task[None]] = []
+        try:
             await self._send_json(
                 {
-                    "type": "camera",
-                    "rtsp_url": self.config.hikvision_rtsp,
+                    "type": "status",
+                    "level": "info",
+                    "message": "client connected",
                 }
             )
 
-        await self._consume_hello_if_any()
-
-        interval = 1.0 / max(self.config.fps, 1)
-        try:
-            while not self.writer.is_closing():
-                start = time.monotonic()
-                frame, landmarks = await asyncio.to_thread(self._next_inference)
-
+            if not self.broadcaster.mediapipe_available:
                 await self._send_json(
                     {
-                        "type": "landmarks",
-                        "timestamp_ms": int(time.time() * 1000),
-                        "keypoints": landmarks,
+                        "type": "status",
+                        "level": "warning",
+                        "message": "mediapipe is not installed; only no_pose messages will be sent",
                     }
                 )
 
-                if self.config.app_video_mode in {"embedded_frames", "both"}:
-                    encoded = self._encode_frame(frame)
-                    await self._send_json(
-                        {
-                            "type": "frame",
-                            "timestamp_ms": int(time.time() * 1000),
-                            "width": int(frame.shape[1]),
-                            "height": int(frame.shape[0]),
-                            "jpeg_base64": encoded,
-                        }
-                    )
+            if self.config.app_video_mode in {"rtsp_url", "both"} and self.config.hikvision_rtsp:
+                await self._send_json(
+                    {
+                        "type": "camera",
+                        "rtsp_url": self.config.hikvision_rtsp,
+                    }
+                )
 
-                elapsed = time.monotonic() - start
-                if elapsed < interval:
-                    await asyncio.sleep(interval - elapsed)
+            if self.reference is not None:
+                await self._send_json({"type": "reference", **self.reference.describe()})
+
+            await self._consume_hello_if_any()
+
+            self.subscriber = self.broadcaster.subscribe(self.landmark_format)
+            if self._hello is not None:
+                # The first line may already be a command (e.g. dance_start).
+                self._handle_command(self._hello)
+            tasks = [
+                asyncio.create_task(self._send_loop(self.subscriber)),
+                asyncio.create_task(self._read_loop()),
+            ]
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+            LOGGER.info("client disconnected: %s", addr)
         except (asyncio.IncompleteReadError, ConnectionError, BrokenPipeError):
             LOGGER.info("client disconnected: %s", addr)
         finally:
-            self.frame_provider.close()
+            for task in tasks:
+                task.cancel()
+            if self.subscriber is not None:
+                self.broadcaster.unsubscribe(self.subscriber)
+                if self.subscriber.dropped:
+                    LOGGER.info("client %s dropped %d slow ticks", addr, self.subscriber.dropped)
             self.writer.close()
-            await self.writer.wait_closed()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, BrokenPipeError):
+                pass
+
+    async def _send_loop(self, subscriber: Subscriber) -> None:
+        while not self.writer.is_closing():
+            data = await subscriber.next_batch()
+            if not data:
+                return
+            self.writer.write(data)
+            await self.writer.drain()
+
+    async def _read_loop(self) -> None:
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            try:
+                payload = json.loads(line.decode("utf-8", errors="ignore"))
+            except Exception:
+                continue
+            if isinstance(payload, dict):
+                self._handle_command(payload)
+
+    def _handle_command(self, payload: dict[str, Any]) -> None:
+        received_ms = wall_clock_ms()
+        subscriber = self.subscriber
+        if subscriber is None:
+            return
+        command = str(payload.get("type", "")).strip().lower()
+
+        landmark_format = normalize_landmark_format(payload.get("landmark_format"))
+        if landmark_format is not None:
+            self.landmark_format = subscriber.landmark_format = landmark_format
+
+        if command == "ping":
+            self._reply(pong_message(payload, received_ms))
+        elif command == "dance_start":
+            if self.reference is None:
+                self._reply({"type": "error", "message": "no reference pack loaded (--reference-pack)"})
+                return
+            try:
+                position_ms = max(0.0, float(payload.get("position_ms", 0) or 0))
+            except (TypeError, ValueError):
+                position_ms = 0.0
+            try:
+                subscriber.tracker = ChoreographyTracker(
+                    self.reference,
+                    config=DanceScoringConfig(window_ms=self.config.score_window_ms),
+                    start_ms=position_ms,
+                )
+            except ValueError as exc:
+                self._reply({"type": "error", "message": str(exc)})
+                return
+            self._reply(
+                {
+                    "type": "dance_started",
+                    "name": self.reference.name,
+                    "position_ms": int(position_ms),
+                    "window_ms": subscriber.tracker.window_ms,
+                    "duration_ms": int(round(self.reference.duration_ms)),
+                }
+            )
+        elif command == "dance_stop":
+            tracker, subscriber.tracker = subscriber.tracker, None
+            if tracker is not None:
+                for message in tracker.finish():
+                    self._reply(message)
+
+    def _reply(self, payload: dict[str, Any]) -> None:
+        if self.subscriber is not None:
+            self.subscriber.offer(self.serializer.dumps_line(payload), droppable=False)
 
     async def _consume_hello_if_any(self) -> None:
         try:
@@ -197,34 +550,48 @@ class ClientSession:
             payload = line.decode("utf-8", errors="ignore").strip()
             if payload:
                 LOGGER.info("client hello: %s", payload)
+                self._apply_hello(payload)
         except TimeoutError:
             return
         except Exception:
             return
 
-    def _next_inference(self) -> tuple[np.ndarray, list[dict[str, float]]]:
-        frame = self.frame_provider.read()
-        landmarks = self.estimator.detect(frame)
-        return frame, landmarks
-
-    def _encode_frame(self, frame: np.ndarray) -> str:
-        ok, data = cv2.imencode(
-            ".jpg",
-            frame,
-            [cv2.IMWRITE_JPEG_QUALITY, int(self.config.jpeg_quality)],
-        )
-        if not ok:
-            return ""
-        return base64.b64encode(data.tobytes()).decode("ascii")
+    def _apply_hello(self, payload: str) -> None:
+        try:
+            hello = json.loads(payload)
+        except Exception:
+            return
+        if not isinstance(hello, dict):
+            return
+        self._hello = hello
+        landmark_format = normalize_landmark_format(hello.get("landmark_format"))
+        if landmark_format is not None:
+            self.landmark_format = landmark_format
 
     async def _send_json(self, payload: dict[str, Any]) -> None:
-        self.writer.write((json.dumps(payload, separators=(",", ":")) + "\n").encode("utf-8"))
+        self.writer.write(self.serializer.dumps_line(payload))
         await self.writer.drain()
 
 
 async def run_server(config: ServerConfig) -> None:
+    # Memory-mapped once and shared read-only by every connection.
+    reference = load_template_pack(config.reference_pack) if config.reference_pack else None
+    if reference is not None and reference.coordinate_space != COORDINATE_SPACE_IMAGE:
+        raise ValueError(
+            f"{config.reference_pack} holds {reference.coordinate_space} landmarks; live dance scoring uses image landmarks"
+        )
+    if reference is not None and len(reference) < MIN_PACK_ROWS:
+        raise ValueError(
+            f"{config.reference_pack} has {len(reference)} frame(s); dance scoring needs at least {MIN_PACK_ROWS}"
+        )
+    if reference is not None:
+        LOGGER.info("reference pack %s: %d frames @ %.2f fps", reference.name, len(reference), reference.fps)
+
+    mediapipe_available = await asyncio.to_thread(load_mediapipe) is not None
+    broadcaster = PoseBroadcaster(config, mediapipe_available=mediapipe_available)
+
     async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
-        session = ClientSession(reader, writer, config)
+        session = ClientSession(reader, writer, config, broadcaster, reference)
         await session.run()
 
     server = await asyncio.start_server(_handle, host=config.host, port=config.port)
@@ -232,8 +599,11 @@ async def run_server(config: ServerConfig) -> None:
     for sock in sockets:
         LOGGER.info("listening on %s", sock.getsockname())
 
-    async with server:
-        await server.serve_forever()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await broadcaster.close()
 
 
 def parse_args() -> ServerConfig:
@@ -257,7 +627,33 @@ def parse_args() -> ServerConfig:
     )
     parser.add_argument("--fps", type=int, default=15)
     parser.add_argument("--jpeg-quality", type=int, default=80)
+    parser.add_argument(
+        "--json-backend",
+        choices=["auto", "orjson", "json"],
+        default="auto",
+        help="JSON encoder for outgoing messages. auto: orjson if installed, otherwise stdlib json",
+    )
+    parser.add_argument(
+        "--reference-pack",
+        default=None,
+        help="Compiled template pack (.tpack) of the reference choreography",
+    )
+    parser.add_argument(
+        "--score-window-ms",
+        type=float,
+        default=1000.0,
+        help="Length of one scored window when the reference pack has no beat length",
+    )
+    parser.add_argument(
+        "--no-presence-gate",
+        action="store_true",
+        help="Run pose inference on every frame even while nobody is in front of the camera",
+    )
     args = parser.parse_args()
+    try:
+        JsonLineSerializer(args.json_backend)
+    except RuntimeError as exc:
+        parser.error(str(exc))
 
     return ServerConfig(
         host=args.host,
@@ -267,6 +663,10 @@ def parse_args() -> ServerConfig:
         app_video_mode=args.app_video_mode,
         fps=args.fps,
         jpeg_quality=args.jpeg_quality,
+        json_backend=args.json_backend,
+        reference_pack=args.reference_pack,
+        score_window_ms=max(100.0, float(args.score_window_ms)),
+        presence_gate=not bool(args.no_presence_gate),
     )
 
 
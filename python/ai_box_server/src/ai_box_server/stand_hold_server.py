@@ -3,136 +3,81 @@ from __future__ import annotations
 import argparse
 import asyncio
 import base64
+import heapq
+import itertools
 import json
 import logging
 import math
 import os
 import platform
+import threading
 import time
+import zipfile
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
-from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
 import cv2
 import numpy as np
 
-try:
-    import mediapipe as mp
-except Exception:  # pragma: no cover
-    mp = None
-
-try:
-    import torch
-except Exception:  # pragma: no cover
-    torch = None
+from .clock import CaptureClock, pong_message, read_stamped, wall_clock_ms
+from .feedback import DEFAULT_OPENAI_BASE_URL, FeedbackGenerator
+from .jobs import BackgroundJobs
+from .kinematics import (
+    ANGLE_TRIPLETS,
+    LEFT_RIGHT_PERMUTATION,
+    POSE_SELECTED_INDICES,
+    ScoreConfig,
+    angle_weights_torch,
+    bone_vectors_torch,
+    bone_weights_torch,
+    center_and_scale,
+    center_and_scale_batch,
+    center_and_scale_torch,
+    compute_angle_score,
+    compute_bone_score,
+    joint_angles_torch,
+    mirror_and_swap_points,
+    motion_energy_batch,
+    procrustes_align_numpy,
+    rts_smooth_points,
+    swap_left_right,
+)
+from .model_tuning import (
+    POSE_MODEL_VARIANTS,
+    SOLUTIONS_MODEL_COMPLEXITY,
+    LatencyAutoTuner,
+    PoseModelLevel,
+    build_model_ladder,
+)
+from .optional_deps import load_mediapipe, load_torch, torch_cuda_available
+from .recording import REPLAY_SPEEDS, FrameRecorder, ReplaySource
+from .serialization import (
+    COMPACT_LANDMARK_FIELDS,
+    LANDMARK_FORMAT_COMPACT,
+    LANDMARK_FORMAT_OBJECTS,
+    JsonLineSerializer,
+    keypoints_from_arrays,
+    normalize_landmark_format,
+)
+from .template_pack import COORDINATE_SPACE_IMAGE, COORDINATE_SPACE_WORLD, TemplateLibrary, TemplatePack
+from .tracking import TORSO_INDICES, SubjectTracker
 
 
 LOGGER = logging.getLogger("ai_box_stand_hold")
 MAX_COMMAND_BYTES = 4 * 1024 * 1024
+COMMAND_QUEUE_SIZE = 32
 IDLE_PREVIEW_FPS = 3
 
 
-LEFT_SHOULDER = 11
-RIGHT_SHOULDER = 12
-LEFT_ELBOW = 13
-RIGHT_ELBOW = 14
-LEFT_WRIST = 15
-RIGHT_WRIST = 16
-LEFT_HIP = 23
-RIGHT_HIP = 24
-LEFT_KNEE = 25
-RIGHT_KNEE = 26
-LEFT_ANKLE = 27
-RIGHT_ANKLE = 28
-LEFT_HEEL = 29
-RIGHT_HEEL = 30
-LEFT_FOOT_INDEX = 31
-RIGHT_FOOT_INDEX = 32
-
-POSE_SELECTED_INDICES = np.array(
-    [
-        LEFT_SHOULDER,
-        RIGHT_SHOULDER,
-        LEFT_ELBOW,
-        RIGHT_ELBOW,
-        LEFT_WRIST,
-        RIGHT_WRIST,
-        LEFT_HIP,
-        RIGHT_HIP,
-        LEFT_KNEE,
-        RIGHT_KNEE,
-        LEFT_ANKLE,
-        RIGHT_ANKLE,
-        LEFT_HEEL,
-        RIGHT_HEEL,
-        LEFT_FOOT_INDEX,
-        RIGHT_FOOT_INDEX,
-    ],
-    dtype=np.int32,
-)
-
-LEFT_RIGHT_SWAP_PAIRS: list[tuple[int, int]] = [
-    (1, 4),
-    (2, 5),
-    (3, 6),
-    (7, 8),
-    (9, 10),
-    (11, 12),
-    (13, 14),
-    (15, 16),
-    (17, 18),
-    (19, 20),
-    (21, 22),
-    (23, 24),
-    (25, 26),
-    (27, 28),
-    (29, 30),
-    (31, 32),
-]
-
-ANGLE_TRIPLETS: list[tuple[str, int, int, int]] = [
-    ("left_elbow", LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
-    ("right_elbow", RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
-    ("left_knee", LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
-    ("right_knee", RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
-    ("left_hip", LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
-    ("right_hip", RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
-    ("left_shoulder", LEFT_ELBOW, LEFT_SHOULDER, LEFT_HIP),
-    ("right_shoulder", RIGHT_ELBOW, RIGHT_SHOULDER, RIGHT_HIP),
-]
-
-BONE_DEFS: list[tuple[str, int, int]] = [
-    ("left_upper_arm", LEFT_SHOULDER, LEFT_ELBOW),
-    ("right_upper_arm", RIGHT_SHOULDER, RIGHT_ELBOW),
-    ("left_forearm", LEFT_ELBOW, LEFT_WRIST),
-    ("right_forearm", RIGHT_ELBOW, RIGHT_WRIST),
-    ("left_thigh", LEFT_HIP, LEFT_KNEE),
-    ("right_thigh", RIGHT_HIP, RIGHT_KNEE),
-    ("left_shin", LEFT_KNEE, LEFT_ANKLE),
-    ("right_shin", RIGHT_KNEE, RIGHT_ANKLE),
-]
-
-
 @dataclass
 class PosePacket:
     points: np.ndarray  # (33,3)
     vis: np.ndarray  # (33,)
     pres: np.ndarray  # (33,)
-
-
-@dataclass
-class ScoreConfig:
-    sigma_coord: float = 0.12
-    sigma_angle: float = 15.0
-    w_coord: float = 0.4
-    w_angle: float = 0.4
-    w_bone: float = 0.2
-    conf_threshold: float = 0.5
-    min_valid_joints: int = 6
-    min_valid_angles: int = 2
-    min_valid_bones: int = 3
+    normalized: np.ndarray | None = None  # (33,3) precomputed center_and_scale(points)
+    capture_timestamp_ms: int | None = None  # wall-clock capture time of the source frame
 
 
 @dataclass
@@ -190,6 +135,27 @@ class ServerConfig:
     allow_openai_feedback: bool
     openai_model: str
     openai_timeout_sec: float
+    json_backend: str = "auto"
+    max_poses: int = 1
+    subject_selection: str = "largest"
+    warmup: bool = True
+    model_pool_size: int = 1
+    pose_model: str = "auto"
+    inference_max_side: int = 0
+    sequence_scoring: str = "auto"
+    template_dir: str | None = None
+    replay_speed: str = "original"
+    replay_loop: bool = False
+    record_path: str | None = None
+    record_raw: bool = False
+    record_client_frames: bool = False
+    session_selection: str = "streaming"
+    post_workers: int = 2
+    post_max_jobs: int = 8
+    openai_base_url: str = DEFAULT_OPENAI_BASE_URL
+    openai_max_connections: int = 4
+    feedback_cache_size: int = 128
+    feedback_image_max_side: int = 512
 
 
 @dataclass
@@ -207,33 +173,50 @@ class ActiveSession:
     frames_base64_seq: list[str] = field(default_factory=list)
     poses_seq: list[PosePacket | None] = field(default_factory=list)
     ts_ms_seq: list[int] = field(default_factory=list)
+    pose_model_frames: dict[str, int] = field(default_factory=dict)
+    streaming: StreamingSessionScorer | None = None
 
 
 class PoseEstimator:
-    def __init__(self, *, prefer_world_landmarks: bool) -> None:
+    def __init__(
+        self,
+        *,
+        prefer_world_landmarks: bool,
+        max_poses: int = 1,
+        subject_selection: str = "largest",
+        model_variant: str | None = None,
+    ) -> None:
         self.prefer_world_landmarks = prefer_world_landmarks
+        self.max_poses = max(1, int(max_poses))
+        self.tracker = SubjectTracker(selection=subject_selection)
+        self.model_variant = model_variant or "full"
         self._backend = "none"
         self._video_pose = None
         self._image_pose = None
         self._video_landmarker = None
         self._image_landmarker = None
+        self._last_video_ts_ms = 0
+        self._mp = mp = load_mediapipe()
 
         if mp is None:
             LOGGER.warning("mediapipe is not installed. pose estimation disabled.")
             return
 
         if hasattr(mp, "solutions"):
+            if self.max_poses > 1:
+                LOGGER.warning("mediapipe.solutions pose is single-person only. max_poses=%d is ignored.", self.max_poses)
             self._backend = "solutions"
+            model_complexity = SOLUTIONS_MODEL_COMPLEXITY[self.model_variant]
             self._video_pose = mp.solutions.pose.Pose(
                 static_image_mode=False,
-                model_complexity=1,
+                model_complexity=model_complexity,
                 smooth_landmarks=True,
                 min_detection_confidence=0.5,
                 min_tracking_confidence=0.5,
             )
             self._image_pose = mp.solutions.pose.Pose(
                 static_image_mode=True,
-                model_complexity=1,
+                model_complexity=model_complexity,
                 smooth_landmarks=False,
                 min_detection_confidence=0.5,
                 min_tracking_confidence=0.5,
@@ -241,7 +224,8 @@ class PoseEstimator:
             return
 
         if hasattr(mp, "tasks"):
-            model_path = self._resolve_tasks_model_path()
+            self.model_variant = model_variant or "lite"
+            model_path = self._resolve_tasks_model_path(self.model_variant)
             if model_path is None:
                 LOGGER.error("mediapipe tasks backend is available but pose model download/init failed.")
                 return
@@ -251,22 +235,34 @@ class PoseEstimator:
 
         LOGGER.error("unsupported mediapipe package shape. no pose backend is available.")
 
-    def detect_video(self, frame_bgr: np.ndarray, timestamp_ms: int | None = None) -> PosePacket | None:
+    def detect_video(
+        self,
+        frame_bgr: np.ndarray,
+        timestamp_ms: int | None = None,
+        max_side: int = 0,
+    ) -> PosePacket | None:
+        """Tracks a pose across video frames; `timestamp_ms` is the frame's capture time."""
+        ts = int(timestamp_ms if timestamp_ms is not None else time.time() * 1000)
+        frame_bgr = resize_for_inference(frame_bgr, max_side)
+        pose: PosePacket | None = None
         if self._backend == "solutions":
             if self._video_pose is None:
                 return None
             rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
             result = self._video_pose.process(rgb)
-            return self._to_pose_packet_from_solutions(result)
-
-        if self._backend == "tasks":
+            pose = self._to_pose_packet_from_solutions(result)
+        elif self._backend == "tasks":
             if self._video_landmarker is None:
                 return None
-            ts = int(timestamp_ms if timestamp_ms is not None else time.time() * 1000)
+            # VIDEO mode rejects timestamps that do not increase.
+            video_ts = max(ts, self._last_video_ts_ms + 1)
+            self._last_video_ts_ms = video_ts
             mp_image = self._to_mp_image(frame_bgr)
-            result = self._video_landmarker.detect_for_video(mp_image, ts)
-            return self._to_pose_packet_from_tasks(result)
-        return None
+            result = self._video_landmarker.detect_for_video(mp_image, video_ts)
+            pose = self._to_pose_packet_from_tasks(result, pose_index=self._track_subject(result))
+        if pose is not None:
+            pose.capture_timestamp_ms = ts
+        return pose
 
     def detect_image(self, image_bgr: np.ndarray) -> PosePacket | None:
         if self._backend == "solutions":
@@ -281,51 +277,121 @@ class PoseEstimator:
                 return None
             mp_image = self._to_mp_image(image_bgr)
             result = self._image_landmarker.detect(mp_image)
-            return self._to_pose_packet_from_tasks(result)
+            return self._to_pose_packet_from_tasks(result, pose_index=self._largest_pose_index(result))
         return None
 
+    def _track_subject(self, result: Any) -> int | None:
+        if self.max_poses <= 1:
+            return 0
+        torsos = self._torso_points_from_tasks(result)
+        if torsos is None:
+            self.tracker.update(np.zeros((0, len(TORSO_INDICES), 2), dtype=np.float32))
+            return None
+        return self.tracker.update(torsos)
+
+    def _largest_pose_index(self, result: Any) -> int | None:
+        if self.max_poses <= 1:
+            return 0
+        torsos = self._torso_points_from_tasks(result)
+        if torsos is None:
+            return None
+        extents = torsos.max(axis=1) - torsos.min(axis=1)
+        return int(np.argmax(np.linalg.norm(extents, axis=1)))
+
     @staticmethod
-    def _to_mp_image(image_bgr: np.ndarray) -> Any:
+    def _torso_points_from_tasks(result: Any) -> np.ndarray | None:
+        pose_landmarks = getattr(result, "pose_landmarks", None) if result is not None else None
+        if not pose_landmarks:
+            return None
+        torsos = np.zeros((len(pose_landmarks), len(TORSO_INDICES), 2), dtype=np.float32)
+        for pose_idx, landmarks in enumerate(pose_landmarks):
+            if len(landmarks) != 33:
+                torsos[pose_idx] = np.nan
+                continue
+            for col, lm_idx in enumerate(TORSO_INDICES):
+                lm = landmarks[lm_idx]
+                torsos[pose_idx, col, 0] = lm.x
+                torsos[pose_idx, col, 1] = lm.y
+        return torsos
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    def warm_up(self) -> bool:
+        """Runs one dummy inference on each graph so the first real frame is not slow."""
+        if self._backend == "none":
+            return False
+        blank = np.zeros((256, 256, 3), dtype=np.uint8)
+        self.detect_image(blank)
+        self.detect_video(blank, int(time.monotonic() * 1000.0))
+        self.tracker.reset()
+        return True
+
+    def close(self) -> None:
+        for graph in (self._video_pose, self._image_pose, self._video_landmarker, self._image_landmarker):
+            if graph is None:
+                continue
+            try:
+                graph.close()
+            except Exception as exc:  # noqa: BLE001
+                LOGGER.debug("pose graph close failed: %s", exc)
+        self._video_pose = None
+        self._image_pose = None
+        self._video_landmarker = None
+        self._image_landmarker = None
+
+    def _to_mp_image(self, image_bgr: np.ndarray) -> Any:
         image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
-        return mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb)
+        return self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=image_rgb)
 
-    def _resolve_tasks_model_path(self) -> Path | None:
+    def _resolve_tasks_model_path(self, variant: str) -> Path | None:
         env_path = str(os.environ.get("MEDIAPIPE_POSE_MODEL_PATH", "")).strip()
         if env_path:
             candidate = Path(env_path).expanduser().resolve()
-            if candidate.exists() and candidate.is_file():
+            if is_valid_task_model(candidate):
                 return candidate
-            LOGGER.error("MEDIAPIPE_POSE_MODEL_PATH is set but file does not exist: %s", candidate)
+            LOGGER.error("MEDIAPIPE_POSE_MODEL_PATH is set but is not a valid .task model: %s", candidate)
             return None
 
         cache_dir = Path.home() / ".cache" / "ai_box_server"
         cache_dir.mkdir(parents=True, exist_ok=True)
-        model_path = cache_dir / "pose_landmarker_lite.task"
-        if model_path.exists() and model_path.is_file():
+        model_path = cache_dir / f"pose_landmarker_{variant}.task"
+        if is_valid_task_model(model_path):
             return model_path
+        if model_path.exists():
+            LOGGER.warning("cached mediapipe model is corrupt. re-downloading: %s", model_path)
+            model_path.unlink()
 
         model_url = (
             "https://storage.googleapis.com/mediapipe-models/pose_landmarker/"
-            "pose_landmarker_lite/float16/latest/pose_landmarker_lite.task"
+            f"pose_landmarker_{variant}/float16/latest/pose_landmarker_{variant}.task"
         )
         LOGGER.info("downloading mediapipe pose model: %s", model_url)
         try:
             req = Request(model_url, headers={"User-Agent": "ai-box-stand-hold/0.1"})
             with urlopen(req, timeout=30) as response:
                 data = response.read()
-            model_path.write_bytes(data)
+            tmp_path = model_path.with_suffix(".task.part")
+            tmp_path.write_bytes(data)
+            if not is_valid_task_model(tmp_path):
+                tmp_path.unlink()
+                LOGGER.error("downloaded mediapipe model is not a valid .task bundle: %s", model_url)
+                return None
+            os.replace(tmp_path, model_path)
             return model_path
         except Exception as exc:  # noqa: BLE001
             LOGGER.error("failed to download mediapipe model: %s", exc)
             return None
 
     def _init_tasks_landmarkers(self, model_path: Path) -> None:
+        mp = self._mp
         base_options = mp.tasks.BaseOptions(model_asset_path=str(model_path))
 
         image_options = mp.tasks.vision.PoseLandmarkerOptions(
             base_options=base_options,
             running_mode=mp.tasks.vision.RunningMode.IMAGE,
-            num_poses=1,
+            num_poses=self.max_poses,
             min_pose_detection_confidence=0.5,
             min_pose_presence_confidence=0.5,
             min_tracking_confidence=0.5,
@@ -334,7 +400,7 @@ class PoseEstimator:
         video_options = mp.tasks.vision.PoseLandmarkerOptions(
             base_options=base_options,
             running_mode=mp.tasks.vision.RunningMode.VIDEO,
-            num_poses=1,
+            num_poses=self.max_poses,
             min_pose_detection_confidence=0.5,
             min_pose_presence_confidence=0.5,
             min_tracking_confidence=0.5,
@@ -368,15 +434,15 @@ class PoseEstimator:
             points = norm_points
         return PosePacket(points=points, vis=vis, pres=pres)
 
-    def _to_pose_packet_from_tasks(self, result: Any) -> PosePacket | None:
-        if result is None:
+    def _to_pose_packet_from_tasks(self, result: Any, *, pose_index: int | None = 0) -> PosePacket | None:
+        if result is None or pose_index is None:
             return None
         pose_landmarks = getattr(result, "pose_landmarks", None)
         if not pose_landmarks:
             return None
-        if len(pose_landmarks) < 1:
+        if len(pose_landmarks) <= pose_index:
             return None
-        landmarks = pose_landmarks[0]
+        landmarks = pose_landmarks[pose_index]
         if len(landmarks) != 33:
             return None
 
@@ -387,8 +453,13 @@ class PoseEstimator:
         pres = np.clip(pres, 0.0, 1.0)
 
         pose_world = getattr(result, "pose_world_landmarks", None)
-        if self.prefer_world_landmarks and pose_world and len(pose_world) > 0 and len(pose_world[0]) == 33:
-            world_landmarks = pose_world[0]
+        if (
+            self.prefer_world_landmarks
+            and pose_world
+            and len(pose_world) > pose_index
+            and len(pose_world[pose_index]) == 33
+        ):
+            world_landmarks = pose_world[pose_index]
             points = np.asarray(
                 [[float(lm.x), float(lm.y), float(lm.z)] for lm in world_landmarks],
                 dtype=np.float32,
@@ -398,42 +469,179 @@ class PoseEstimator:
         return PosePacket(points=points, vis=vis, pres=pres)
 
 
+def resize_for_inference(frame_bgr: np.ndarray, max_side: int) -> np.ndarray:
+    if max_side <= 0:
+        return frame_bgr
+    h, w = frame_bgr.shape[:2]
+    longest = max(h, w)
+    if longest <= max_side:
+        return frame_bgr
+    scale = float(max_side) / float(longest)
+    size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    return cv2.resize(frame_bgr, size, interpolation=cv2.INTER_AREA)
+
+
+def is_valid_task_model(path: Path) -> bool:
+    # .task files are zip bundles of tflite graphs; a truncated download fails this check.
+    try:
+        return path.is_file() and path.stat().st_size > 0 and zipfile.is_zipfile(path)
+    except OSError:
+        return False
+
+
+class PoseEstimatorPool:
+    """Pre-built, warmed-up PoseEstimators shared by client sessions.
+
+    `warm_up` is run once at server startup. Sessions borrow an estimator with
+    `acquire` (building a new one only when the pool is empty) and hand it back
+    with `release`, so graph construction and model download never happen on
+    the first frame of a connection.
+    """
+
+    def __init__(
+        self,
+        *,
+        prefer_world_landmarks: bool,
+        max_poses: int,
+        subject_selection: str,
+        size: int,
+        default_variant: str | None = None,
+    ) -> None:
+        self.prefer_world_landmarks = prefer_world_landmarks
+        self.max_poses = max_poses
+        self.subject_selection = subject_selection
+        self.size = max(1, int(size))
+        self.default_variant = default_variant
+        self.ready = False
+        self.backend = "none"
+        self.warmup_ms: float | None = None
+        self._idle: dict[str, list[PoseEstimator]] = {}
+        self._lock = threading.Lock()
+
+    def warm_up(self) -> None:
+        with self._lock:
+            started = time.monotonic()
+            while True:
+                estimator = self._create(self.default_variant)
+                idle = self._idle.setdefault(estimator.model_variant, [])
+                idle.append(estimator)
+                if not estimator.warm_up() or len(idle) >= self.size:
+                    break
+            self.warmup_ms = (time.monotonic() - started) * 1000.0
+        LOGGER.info(
+            "pose model warm-up done backend=%s variant=%s pool=%d took=%.0fms",
+            self.backend,
+            self.default_variant,
+            self.size,
+            self.warmup_ms,
+        )
+
+    def acquire(self, variant: str | None = None, *, warm_up: bool = False) -> PoseEstimator:
+        """Idle estimators are already warm; `warm_up` also warms one built on demand."""
+        with self._lock:
+            idle = self._idle.get(variant or self.default_variant or "")
+            if idle:
+                return idle.pop()
+            estimator = self._create(variant or self.default_variant)
+        if warm_up:
+            estimator.warm_up()
+        return estimator
+
+    def release(self, estimator: PoseEstimator) -> None:
+        estimator.tracker.reset()
+        with self._lock:
+            idle = self._idle.setdefault(estimator.model_variant, [])
+            if len(idle) < self.size:
+                idle.append(estimator)
+                return
+        estimator.close()
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for idle in pools.values():
+            for estimator in idle:
+                estimator.close()
+
+    def _create(self, variant: str | None) -> PoseEstimator:
+        estimator = PoseEstimator(
+            prefer_world_landmarks=self.prefer_world_landmarks,
+            max_poses=self.max_poses,
+            subject_selection=self.subject_selection,
+            model_variant=variant,
+        )
+        # The backend decides the default variant (solutions: full, tasks: lite).
+        if self.default_variant is None:
+            self.default_variant = estimator.model_variant
+        self.backend = estimator.backend
+        self.ready = estimator.backend != "none"
+        return estimator
+
+
 class FrameProvider:
     _placeholder_cache: np.ndarray | None = None
 
-    def __init__(self, config: ServerConfig) -> None:
+    def __init__(self, config: ServerConfig, recorder: FrameRecorder | None = None) -> None:
         self.config = config
+        self.recorder = recorder
         self._capture: cv2.VideoCapture | None = None
+        self._replay: ReplaySource | None = None
         self.current_source_desc = "placeholder"
         self._last_reopen_attempt = 0.0
         self._reopen_interval_sec = 3.0
         self._camera_failed_logged = False
+        self._clock = CaptureClock()
         self._open_capture()
 
-    def read(self) -> np.ndarray:
-        if self._capture is not None and self._capture.isOpened():
-            ok, frame = self._capture.read()
-            if ok and frame is not None:
-                return frame
+    def read(self) -> tuple[np.ndarray, int]:
+        """Next frame and its wall-clock capture time in ms."""
+        stamped = self._read_source()
+        if stamped is not None and self.recorder is not None:
+            self.recorder.write_frame(*stamped)
+        return stamped or (self._placeholder_frame(), wall_clock_ms())
+
+    @property
+    def unpaced(self) -> bool:
+        """Replaying at max speed: frames should be processed back to back."""
+        return self._replay is not None and self._replay.speed == "max" and not self._replay.finished
+
+    def _read_source(self) -> tuple[np.ndarray, int] | None:
+        if self._replay is not None:
+            return self._read_replay(self._replay)
+
+        if self._capture is not None:
+            stamped = read_stamped(self._capture, self._clock)
+            if stamped is not None:
+                return stamped
 
         now = time.monotonic()
         if now - self._last_reopen_attempt >= self._reopen_interval_sec:
             self._reopen_capture()
             self._last_reopen_attempt = now
 
-        if self._capture is not None and self._capture.isOpened():
-            ok, frame = self._capture.read()
-            if ok and frame is not None:
-                return frame
-        return self._placeholder_frame()
+        if self._capture is not None:
+            return read_stamped(self._capture, self._clock)
+        return None
+
+    @staticmethod
+    def _read_replay(replay: ReplaySource) -> tuple[np.ndarray, int] | None:
+        while (record := replay.read()) is not None:
+            frame = record.decode()
+            if frame is not None:
+                return rotate_frame_by_degrees(frame, record.rotation_degrees), record.capture_timestamp_ms
+        return None
 
     def close(self) -> None:
         if self._capture is not None:
             self._capture.release()
             self._capture = None
+        if self._replay is not None:
+            self._replay.close()
+            self._replay = None
 
     def _reopen_capture(self) -> None:
         self.close()
+        self._clock.reset()
         self._open_capture()
 
     def _open_capture(self) -> None:
@@ -441,6 +649,20 @@ class FrameProvider:
             # macOS headless/dev environments often cannot open camera authorization UI.
             os.environ.setdefault("OPENCV_AVFOUNDATION_SKIP_AUTH", "1")
 
+        if self.config.camera_mode == "replay":
+            try:
+                self._replay = ReplaySource(
+                    self.config.video_source,
+                    speed=self.config.replay_speed,
+                    loop=self.config.replay_loop,
+                )
+            except (OSError, ValueError) as exc:
+                LOGGER.error("cannot open recording %s: %s", self.config.video_source, exc)
+                return
+            self.current_source_desc = f"replay({self.config.video_source})"
+            LOGGER.info("camera source opened: %s", self.current_source_desc)
+            return
+
         candidates = self._camera_candidates()
         for source, desc in candidates:
             cap = cv2.VideoCapture(source)
@@ -525,21 +747,44 @@ class FrameProvider:
         return frame
 
 
-class PoseScorer:
-    def __init__(self, config: ScoreConfig, *, device_preference: str) -> None:
-        self.config = config
-        self.device = self._resolve_device(device_preference)
+@dataclass(frozen=True)
+class RuntimeSupport:
+    """Optional-dependency availability, probed once at startup in a worker thread.
 
-    @staticmethod
-    def _resolve_device(device_preference: str) -> str:
-        pref = device_preference.lower().strip()
-        if pref == "cpu":
-            return "cpu"
+    Importing torch or mediapipe takes seconds; sessions read these cached
+    values instead of importing on the event loop.
+    """
+
+    scoring_device: str
+    cuda_available: bool
+    mediapipe_available: bool
+
+    @classmethod
+    def probe(cls, device_preference: str) -> RuntimeSupport:
+        # `--scoring-device cpu` never imports torch.
+        cuda_available = device_preference.lower().strip() != "cpu" and torch_cuda_available()
+        return cls(
+            scoring_device="cuda" if cuda_available else "cpu",
+            cuda_available=cuda_available,
+            mediapipe_available=load_mediapipe() is not None,
+        )
 
-        cuda_available = bool(torch is not None and torch.cuda.is_available())
-        if pref == "cuda":
-            return "cuda" if cuda_available else "cpu"
-        return "cuda" if cuda_available else "cpu"
+
+class PoseScorer:
+    def __init__(
+        self,
+        config: ScoreConfig,
+        *,
+        device: str,
+        sequence_backend: str = "auto",
+    ) -> None:
+        self.config = config
+        self.device = device
+        # Whole-session scoring runs batched in torch on CUDA and per frame in numpy otherwise.
+        # "torch" forces the batched path, which also works with CPU-only torch.
+        if sequence_backend == "auto":
+            sequence_backend = "torch" if self.device == "cuda" else "numpy"
+        self.sequence_backend = sequence_backend
 
     def score(self, ref: PosePacket, cur: PosePacket) -> ScoreResult:
         normal = self._score_single(ref, cur)
@@ -551,12 +796,43 @@ class PoseScorer:
         )
         mirrored = self._score_single(ref, cur_mirrored)
         mirrored.mirror_used = True
+        return self._pick_mirror(normal, mirrored)
+
+    def score_sequence(self, ref: PosePacket, poses_seq: list[PosePacket | None]) -> list[ScoreResult | None]:
+        """Scores every pose of a session against `ref`. Equivalent to calling `score` per frame."""
+        if self.sequence_backend == "torch" and load_torch() is not None:
+            try:
+                return self._score_sequence_torch(ref, poses_seq)
+            except Exception as exc:  # noqa: BLE001
+                LOGGER.warning("batched torch scoring failed, fallback to numpy: %s", exc)
+        return [None if pose is None else self.score(ref, pose) for pose in poses_seq]
+
+    def _score_sequence_torch(self, ref: PosePacket, poses_seq: list[PosePacket | None]) -> list[ScoreResult | None]:
+        frame_idxs = [idx for idx, pose in enumerate(poses_seq) if pose is not None]
+        out: list[ScoreResult | None] = [None] * len(poses_seq)
+        if not frame_idxs:
+            return out
+
+        packed = np.empty((len(frame_idxs) + 1, 33, 5), dtype=np.float32)
+        for row, pose in enumerate([ref] + [poses_seq[idx] for idx in frame_idxs]):
+            packed[row, :, 0:3] = pose.points
+            packed[row, :, 3] = pose.vis
+            packed[row, :, 4] = pose.pres
+
+        rows = score_sequence_torch(packed, self.config, device=self.device)
+        count = len(frame_idxs)
+        for pos, frame_idx in enumerate(frame_idxs):
+            normal = self._result_from_batch_row(rows[pos], mirror_used=False)
+            mirrored = self._result_from_batch_row(rows[count + pos], mirror_used=True)
+            out[frame_idx] = self._pick_mirror(normal, mirrored)
+        return out
 
+    @staticmethod
+    def _pick_mirror(normal: ScoreResult, mirrored: ScoreResult) -> ScoreResult:
         if normal.final is None and mirrored.final is None:
             if mirrored.matched_joints > normal.matched_joints:
                 return mirrored
             return normal
-
         if normal.final is None:
             return mirrored
         if mirrored.final is None:
@@ -565,10 +841,99 @@ class PoseScorer:
             return mirrored
         return normal
 
+    def _result_from_batch_row(self, row: np.ndarray, *, mirror_used: bool) -> ScoreResult:
+        cfg = self.config
+        matched_joints = int(row[BATCH_COL_JOINTS])
+        if matched_joints < cfg.min_valid_joints:
+            return ScoreResult(
+                final=None,
+                coord_score=None,
+                angle_score=None,
+                bone_score=None,
+                coord_err=None,
+                angle_err=None,
+                matched_joints=matched_joints,
+                matched_angles=0,
+                matched_bones=0,
+                reliable=False,
+                mirror_used=mirror_used,
+                reason="Too few reliable joints.",
+            )
+
+        coord_err = float(row[BATCH_COL_COORD_ERR])
+        if not np.isfinite(coord_err):
+            return ScoreResult(
+                final=None,
+                coord_score=None,
+                angle_score=None,
+                bone_score=None,
+                coord_err=None,
+                angle_err=None,
+                matched_joints=matched_joints,
+                matched_angles=0,
+                matched_bones=0,
+                reliable=False,
+                mirror_used=mirror_used,
+                reason="Procrustes alignment failed.",
+            )
+
+        coord_score = float(row[BATCH_COL_COORD_SCORE])
+        matched_angles = int(row[BATCH_COL_ANGLES])
+        matched_bones = int(row[BATCH_COL_BONES])
+        angle_err = float(row[BATCH_COL_ANGLE_ERR]) if matched_angles > 0 else None
+        angle_score = float(row[BATCH_COL_ANGLE_SCORE]) if matched_angles > 0 else None
+        bone_score = float(row[BATCH_COL_BONE_SCORE]) if matched_bones > 0 else None
+
+        angle_diffs: dict[str, float] = {}
+        for k, (name, _, _, _) in enumerate(ANGLE_TRIPLETS):
+            if row[BATCH_COL_ANGLE_VALID + k] > 0.5:
+                angle_diffs[name] = float(row[BATCH_COL_ANGLE_DIFFS + k])
+
+        if angle_score is None or bone_score is None or matched_angles < cfg.min_valid_angles or matched_bones < cfg.min_valid_bones:
+            insufficient = angle_score is None or bone_score is None
+            return ScoreResult(
+                final=None,
+                coord_score=coord_score * 100.0,
+                angle_score=None if angle_score is None else angle_score * 100.0,
+                bone_score=None if bone_score is None else bone_score * 100.0,
+                coord_err=coord_err,
+                angle_err=angle_err,
+                matched_joints=matched_joints,
+                matched_angles=matched_angles,
+                matched_bones=matched_bones,
+                reliable=False,
+                mirror_used=mirror_used,
+                reason="Insufficient reliable angles or bones." if insufficient else "Pose not reliable.",
+                angle_diffs=angle_diffs,
+            )
+
+        final_score = 100.0 * (
+            cfg.w_coord * coord_score
+            + cfg.w_angle * angle_score
+            + cfg.w_bone * bone_score
+        )
+        final_score = float(np.clip(final_score, 0.0, 100.0))
+
+        return ScoreResult(
+            final=final_score,
+            coord_score=coord_score * 100.0,
+            angle_score=angle_score * 100.0,
+            bone_score=bone_score * 100.0,
+            coord_err=coord_err,
+            angle_err=angle_err,
+            matched_joints=matched_joints,
+            matched_angles=matched_angles,
+            matched_bones=matched_bones,
+            reliable=True,
+            mirror_used=mirror_used,
+            reason="",
+            angle_diffs=angle_diffs,
+        )
+
     def _score_single(self, ref: PosePacket, cur: PosePacket) -> ScoreResult:
         cfg = self.config
 
-        ref_norm = center_and_scale(ref.points)
+        ref_norm = ref.normalized if ref.normalized is not None else center_and_scale(ref.points)
         cur_norm = center_and_scale(cur.points)
 
         joint_weights = np.minimum(ref.vis, cur.vis) * np.minimum(ref.pres, cur.pres)
@@ -600,12 +965,8 @@ class PoseScorer:
         cur_valid = cur_sel[valid_mask]
         w_valid = w_sel[valid_mask]
 
-        _, coord_err, rot, scale, trans = procrustes_align(
-            ref_valid,
-            cur_valid,
-            weights=w_valid,
-            device=self.device,
-        )
+        # Per-frame scoring stays on the CPU; only whole-session batches go to the device.
+        _, coord_err, rot, scale, trans = procrustes_align_numpy(ref_valid, cur_valid, w_valid)
         if not np.isfinite(coord_err):
             return ScoreResult(
                 final=None,
@@ -698,173 +1059,6 @@ class PoseScorer:
         )
 
 
-class FeedbackGenerator:
-    def __init__(
-        self,
-        *,
-        enabled: bool,
-        model: str,
-        timeout_sec: float,
-    ) -> None:
-        self.enabled = enabled
-        self.model = model
-        self.timeout_sec = timeout_sec
-
-    def generate(
-        self,
-        *,
-        reference_image_base64: str,
-        candidate_image_base64: str,
-        metrics: dict[str, Any],
-    ) -> tuple[str, str]:
-        api_key = str(os.environ.get("OPENAI_API_KEY", "")).strip()
-        if self.enabled and api_key:
-            try:
-                text = self._request_openai(
-                    api_key=api_key,
-                    reference_image_base64=reference_image_base64,
-                    candidate_image_base64=candidate_image_base64,
-                    metrics=metrics,
-                )
-                return text, self.model
-            except Exception as exc:  # noqa: BLE001
-                LOGGER.warning("openai feedback failed. fallback to local coach: %s", exc)
-
-        return self._build_local_feedback(metrics), "local-fallback"
-
-    def _request_openai(
-        self,
-        *,
-        api_key: str,
-        reference_image_base64: str,
-        candidate_image_base64: str,
-        metrics: dict[str, Any],
-    ) -> str:
-        ref_url = f"data:image/jpeg;base64,{reference_image_base64}"
-        cand_url = f"data:image/jpeg;base64,{candidate_image_base64}"
-
-        score = float(metrics.get("score", 0) or 0)
-        valid_joints = int(metrics.get("valid_joints", 0) or 0)
-        mode = str(metrics.get("mode", "NORMAL") or "NORMAL")
-        coord_err = metrics.get("coord_err", None)
-        angle_err = metrics.get("angle_err", None)
-        angle_diffs = metrics.get("angle_diffs", {})
-
-        prompt = (
-            "첫 번째 이미지는 기준 자세, 두 번째 이미지는 사용자의 최고점 프레임입니다. "
-            "얼굴/배경은 무시하고 신체 정렬만 비교하세요.\n"
-            f"score={score:.1f}, valid_joints={valid_joints}, mode={mode}, "
-            f"coord_err={coord_err}, angle_err={angle_err}, angle_diffs={angle_diffs}.\n"
-            "한국어로 작성하고 아래 형식을 정확히 지키세요.\n"
-            "1) 핵심 오차 요약 2줄\n"
-            "2) 수정 포인트 5개 (각 항목: 문제 / 교정 방법)\n"
-            "3) 20초 교정 루틴 1개\n"
-            "짧고 실행 가능하게 작성하세요."
-        )
-
-        payload = {
-            "model": self.model,
-            "temperature": 0.2,
-            "max_tokens": 500,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "너는 공원 체육기기용 자세 코칭 전문가다. 기준 사진과 사용자 프레임을 비교해 즉시 적용 가능한 교정 지침을 준다.",
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": ref_url}},
-                        {"type": "image_url", "image_url": {"url": cand_url}},
-                    ],
-                },
-            ],
-        }
-
-        req = Request(
-            url="https://api.openai.com/v1/chat/completions",
-            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
-            method="POST",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}",
-            },
-        )
-
-        try:
-            with urlopen(req, timeout=max(5.0, float(self.timeout_sec))) as response:
-                body = response.read().decode("utf-8", errors="replace")
-        except HTTPError as exc:
-            detail = exc.read().decode("utf-8", errors="replace")
-            raise RuntimeError(detail[-1200:]) from exc
-        except URLError as exc:
-            raise RuntimeError(str(exc)) from exc
-
-        data = json.loads(body)
-        choices = data.get("choices") or []
-        if not choices:
-            raise RuntimeError("OpenAI returned no choices")
-
-        content = choices[0].get("message", {}).get("content", "")
-        if isinstance(content, list):
-            text_parts = []
-            for item in content:
-                if isinstance(item, dict) and item.get("type") == "text":
-                    text_parts.append(str(item.get("text", "")))
-            content = "\n".join(text_parts)
-
-        text = str(content).strip()
-        if not text:
-            raise RuntimeError("OpenAI returned empty content")
-        return text
-
-    @staticmethod
-    def _build_local_feedback(metrics: dict[str, Any]) -> str:
-        score = float(metrics.get("score", 0.0) or 0.0)
-        mode = str(metrics.get("mode", "NORMAL") or "NORMAL")
-        angle_diffs = metrics.get("angle_diffs", {})
-        if not isinstance(angle_diffs, dict):
-            angle_diffs = {}
-
-        sorted_angles = sorted(
-            (
-                (str(k), float(v))
-                for k, v in angle_diffs.items()
-                if isinstance(v, (int, float)) and math.isfinite(float(v))
-            ),
-            key=lambda item: item[1],
-            reverse=True,
-        )
-        worst = sorted_angles[:3]
-
-        lines: list[str] = []
-        lines.append(f"점수 {score:.1f}점 ({mode}) 기준 자동 교정 결과입니다.")
-        if score >= 85:
-            lines.append("자세가 전반적으로 안정적입니다. 유지한 상태에서 호흡만 더 정리하면 좋습니다.")
-        elif score >= 70:
-            lines.append("자세가 거의 맞지만, 관절 정렬 오차가 일부 남아 있습니다.")
-        else:
-            lines.append("기준 자세와 차이가 큽니다. 아래 3가지부터 먼저 고정하세요.")
-
-        if worst:
-            lines.append("핵심 오차 부위:")
-            for name, diff in worst:
-                lines.append(f"- {name}: 약 {diff:.1f}도 차이")
-
-        lines.append("수정 가이드:")
-        lines.append("- 어깨: 양쪽 높이를 맞추고 가슴을 과하게 열지 않기")
-        lines.append("- 팔꿈치: 기준 사진 각도까지 천천히 접거나 펴기")
-        lines.append("- 골반: 좌우 회전 없이 정면 유지, 허리 과신전 방지")
-        lines.append("- 무릎: 발끝 방향과 동일한 축으로 정렬")
-        lines.append("- 발목/발끝: 체중을 발 중앙에 두고 흔들림 최소화")
-
-        lines.append("20초 교정 루틴:")
-        lines.append("1) 10초간 골반-어깨 수평 맞추기")
-        lines.append("2) 10초간 팔꿈치/무릎 각도만 기준 사진에 맞추기")
-        return "\n".join(lines)
-
-
 class ClientSession:
     def __init__(
         self,
@@ -872,23 +1066,47 @@ class ClientSession:
         reader: asyncio.StreamReader,
         writer: asyncio.StreamWriter,
         config: ServerConfig,
+        estimator_pool: PoseEstimatorPool,
+        jobs: BackgroundJobs,
+        feedback_generator: FeedbackGenerator,
+        runtime: RuntimeSupport,
+        templates: TemplateLibrary | None = None,
+        recorder: FrameRecorder | None = None,
     ) -> None:
         self.reader = reader
         self.writer = writer
         self.config = config
-
-        self.pose_estimator = PoseEstimator(prefer_world_landmarks=config.prefer_world_landmarks)
-        self.frame_provider = None if config.camera_mode == "client" else FrameProvider(config)
-        self.scorer = PoseScorer(ScoreConfig(), device_preference=config.scoring_device)
-        self.feedback_generator = FeedbackGenerator(
-            enabled=config.allow_openai_feedback,
-            model=config.openai_model,
-            timeout_sec=config.openai_timeout_sec,
+        self.runtime = runtime
+
+        self.estimator_pool = estimator_pool
+        self.jobs = jobs
+        self._job_ids: set[str] = set()
+        self.templates = templates
+        self.recorder = recorder
+        self.pose_estimator: PoseEstimator | None = None
+        self.frame_provider = None if config.camera_mode == "client" else FrameProvider(config, recorder)
+        self.scorer = PoseScorer(
+            ScoreConfig(),
+            device=runtime.scoring_device,
+            sequence_backend=config.sequence_scoring,
         )
+        self.feedback_generator = feedback_generator
         self.active_session: ActiveSession | None = None
         self.latest_client_frame: np.ndarray | None = None
         self.latest_client_frame_at_monotonic: float = 0.0
+        self.latest_client_frame_capture_ms = 0
         self.client_source_announced = False
+        self.serializer = JsonLineSerializer(config.json_backend)
+        self.landmark_format = LANDMARK_FORMAT_OBJECTS
+        self.model_level = PoseModelLevel(config.pose_model, config.inference_max_side)
+        self.model_tuner: LatencyAutoTuner | None = None
+        self.pose_latency_ms: float | None = None
+        self._estimator_switch: asyncio.Task[PoseEstimator] | None = None
+        self._estimator_switch_level: PoseModelLevel | None = None
+        self._commands: asyncio.Queue[tuple[dict[str, Any], int]] = asyncio.Queue(maxsize=COMMAND_QUEUE_SIZE)
+        self._command_reader: asyncio.Task[None] | None = None
+        # The session loop, the command reader and background job callbacks all send.
+        self._write_lock = asyncio.Lock()
 
     async def run(self) -> None:
         peer = self.writer.get_extra_info("peername")
@@ -902,8 +1120,15 @@ class ClientSession:
                 "camera_source": self._camera_source_desc(),
                 "platform": platform.platform(),
                 "scoring_device": self.scorer.device,
-                "cuda_available": bool(torch is not None and torch.cuda.is_available()),
-                "mediapipe_available": mp is not None,
+                "sequence_scoring": self.scorer.sequence_backend,
+                "cuda_available": self.runtime.cuda_available,
+                "mediapipe_available": self.runtime.mediapipe_available,
+                "model_ready": self.estimator_pool.ready,
+                "pose_backend": self.estimator_pool.backend,
+                "warmup_ms": self.estimator_pool.warmup_ms,
+                "json_backend": self.serializer.backend,
+                "landmark_formats": [LANDMARK_FORMAT_OBJECTS, LANDMARK_FORMAT_COMPACT],
+                "templates": self.templates.names() if self.templates is not None else [],
             }
         )
         await self._send_json(
@@ -914,6 +1139,19 @@ class ClientSession:
             }
         )
 
+        self._command_reader = asyncio.create_task(self._read_commands())
+        model_was_ready = self.estimator_pool.ready
+        self.pose_estimator = pose_estimator = await asyncio.to_thread(self.estimator_pool.acquire)
+        self._configure_pose_model(self.config.pose_model, self.config.inference_max_side)
+        if not model_was_ready and self.estimator_pool.ready:
+            await self._send_json(
+                {
+                    "type": "status",
+                    "level": "info",
+                    "message": "pose model ready",
+                }
+            )
+
         active_interval = 1.0 / max(int(self.config.fps), 1)
         idle_interval = max(active_interval, 1.0 / float(IDLE_PREVIEW_FPS))
 
@@ -922,40 +1160,64 @@ class ClientSession:
                 loop_started = time.monotonic()
 
                 await self._consume_commands_non_blocking()
+                self.pose_estimator = pose_estimator = self._apply_estimator_switch(pose_estimator)
                 session_active = self.active_session is not None
                 loop_interval = active_interval if session_active else idle_interval
+                if self.frame_provider is not None and self.frame_provider.unpaced:
+                    loop_interval = 0.0
 
-                frame = await asyncio.to_thread(self._read_effective_frame)
-                video_ts_ms = int(loop_started * 1000.0)
+                frame, capture_ms = await asyncio.to_thread(self._read_effective_frame)
                 should_detect_pose = session_active or self.config.send_landmarks
                 pose = None
                 if should_detect_pose:
-                    pose = await asyncio.to_thread(self.pose_estimator.detect_video, frame, video_ts_ms)
+                    pose, detect_ms = await asyncio.to_thread(
+                        self._detect_pose_timed,
+                        pose_estimator,
+                        frame,
+                        capture_ms,
+                        self.model_level.max_side,
+                    )
+                    self._observe_pose_latency(detect_ms)
                 frame_base64 = await asyncio.to_thread(
                     encode_frame_to_base64,
                     frame,
                     self.config.jpeg_quality,
                 )
-                landmarks_payload: list[dict[str, float]] = []
+                landmarks_payload: Any = []
                 if self.config.send_landmarks and pose is not None:
-                    landmarks_payload = pose_to_json_points(pose)
+                    landmarks_payload = pose_to_json_points(pose, landmark_format=self.landmark_format)
 
                 score = None
                 if session_active and self.active_session is not None:
-                    self.active_session.frames_base64_seq.append(frame_base64)
-                    self.active_session.poses_seq.append(pose)
-                    self.active_session.ts_ms_seq.append(int(time.time() * 1000))
+                    session = self.active_session
+                    session.frames_base64_seq.append(frame_base64)
+                    session.poses_seq.append(pose)
+                    session.ts_ms_seq.append(capture_ms)
+                    model_key = f"{pose_estimator.model_variant}@{self.model_level.max_side or 'native'}"
+                    frames_by_model = session.pose_model_frames
+                    frames_by_model[model_key] = frames_by_model.get(model_key, 0) + 1
+
+                    progress_metrics: dict[str, Any] = {
+                        "reliable": False,
+                        "reason": "offline_temporal_postprocess",
+                    }
+                    if session.streaming is not None:
+                        result = await asyncio.to_thread(session.streaming.observe, pose)
+                        if result is not None:
+                            score = result.final
+                            progress_metrics = {"reliable": result.reliable, "reason": result.reason}
 
-                    remaining_ms = int(max(0.0, (self.active_session.deadline_at - time.monotonic()) * 1000.0))
+                    remaining_ms = int(max(0.0, (session.deadline_at - time.monotonic()) * 1000.0))
                     await self._send_json(
                         {
                             "type": "session_progress",
+                            "capture_timestamp_ms": capture_ms,
                             "remaining_ms": remaining_ms,
-                            "current_score": None,
-                            "best_score": None,
+                            "current_score": score,
+                            "best_score": session.streaming.picker.best_score if session.streaming else None,
                             "metrics": {
-                                "reliable": False,
-                                "reason": "offline_temporal_postprocess",
+                                **progress_metrics,
+                                "pose_model": self._pose_model_metrics(),
                             },
                         }
                     )
@@ -963,7 +1225,8 @@ class ClientSession:
                 await self._send_json(
                     {
                         "type": "frame",
-                        "timestamp_ms": int(time.time() * 1000),
+                        "timestamp_ms": wall_clock_ms(),
+                        "capture_timestamp_ms": capture_ms,
                         "jpeg_base64": frame_base64,
                         "width": int(frame.shape[1]),
                         "height": int(frame.shape[0]),
@@ -972,13 +1235,19 @@ class ClientSession:
                 )
 
                 if self.config.send_landmarks:
-                    await self._send_json(
-                        {
-                            "type": "landmarks",
-                            "timestamp_ms": int(time.time() * 1000),
-                            "keypoints": landmarks_payload,
-                        }
-                    )
+                    landmarks_message: dict[str, Any] = {
+                        "type": "landmarks",
+                        "timestamp_ms": wall_clock_ms(),
+                        "capture_timestamp_ms": capture_ms,
+                        "keypoints": landmarks_payload,
+                    }
+                    if self.landmark_format == LANDMARK_FORMAT_COMPACT:
+                        landmarks_message["format"] = LANDMARK_FORMAT_COMPACT
+                        landmarks_message["fields"] = COMPACT_LANDMARK_FIELDS
+                    if self.config.max_poses > 1:
+                        landmarks_message["subject_id"] = pose_estimator.tracker.subject_id
+                        landmarks_message["tracks"] = pose_estimator.tracker.tracks_summary()
+                    await self._send_json(landmarks_message)
 
                 await self._consume_commands_non_blocking()
 
@@ -992,11 +1261,118 @@ class ClientSession:
         except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
             LOGGER.info("client disconnected: %s", peer)
         finally:
+            if self._command_reader is not None:
+                self._command_reader.cancel()
+            for job_id in list(self._job_ids):
+                self.jobs.cancel(job_id)
+            self.pose_estimator = None
+            self.estimator_pool.release(pose_estimator)
+            if self._estimator_switch is not None:
+                self._estimator_switch.add_done_callback(self._release_abandoned_estimator)
+                self._estimator_switch = None
             if self.frame_provider is not None:
                 self.frame_provider.close()
             self.writer.close()
             await self.writer.wait_closed()
 
+    @staticmethod
+    def _detect_pose_timed(
+        estimator: PoseEstimator,
+        frame: np.ndarray,
+        video_ts_ms: int,
+        max_side: int,
+    ) -> tuple[PosePacket | None, float]:
+        started = time.perf_counter()
+        pose = estimator.detect_video(frame, video_ts_ms, max_side)
+        return pose, (time.perf_counter() - started) * 1000.0
+
+    def _configure_pose_model(self, pose_model: str, max_side: int) -> None:
+        estimator = self.pose_estimator
+        if estimator is None or estimator.backend == "none":
+            self.model_tuner = None
+            return
+
+        if pose_model != "auto":
+            self.model_tuner = None
+            self._request_model_level(PoseModelLevel(pose_model, max_side))
+            return
+
+        ladder = build_model_ladder(max_side)
+        start = PoseModelLevel(estimator.model_variant, max(0, int(max_side)))
+        start_index = ladder.index(start) if start in ladder else len(ladder) - 1
+        self.model_tuner = LatencyAutoTuner(fps=self.config.fps, ladder=ladder, start_level=start_index)
+        self._request_model_level(self.model_tuner.current)
+
+    def _observe_pose_latency(self, detect_ms: float) -> None:
+        if self.pose_latency_ms is None:
+            self.pose_latency_ms = detect_ms
+        else:
+            self.pose_latency_ms += 0.2 * (detect_ms - self.pose_latency_ms)
+        if self.model_tuner is None or self._estimator_switch is not None:
+            return
+        level = self.model_tuner.observe(detect_ms)
+        if level is not None:
+            LOGGER.info(
+                "pose model auto-tune -> %s@%s (latency %.1fms, budget %.1fms)",
+                level.variant,
+                level.max_side or "native",
+                detect_ms,
+                self.model_tuner.budget_ms,
+            )
+            self._request_model_level(level)
+
+    def _request_model_level(self, level: PoseModelLevel) -> None:
+        estimator = self.pose_estimator
+        if estimator is None or estimator.model_variant == level.variant:
+            self.model_level = level
+            return
+        if self._estimator_switch is not None:
+            return
+        # Building and warming a new graph can take seconds; keep serving with the
+        # current one meanwhile, so the first frame on the new model is not slow either.
+        self._estimator_switch_level = level
+        self._estimator_switch = asyncio.create_task(
+            asyncio.to_thread(self.estimator_pool.acquire, level.variant, warm_up=True)
+        )
+
+    def _apply_estimator_switch(self, current: PoseEstimator) -> PoseEstimator:
+        task = self._estimator_switch
+        if task is None or not task.done():
+            return current
+        self._estimator_switch = None
+        level = self._estimator_switch_level
+        try:
+            replacement = task.result()
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.warning("pose model switch failed: %s", exc)
+            return current
+        if replacement.backend == "none" or level is None:
+            self.estimator_pool.release(replacement)
+            return current
+
+        # Keep subject identities across the switch.
+        replacement.tracker, current.tracker = current.tracker, replacement.tracker
+        self.estimator_pool.release(current)
+        self.model_level = level
+        return replacement
+
+    def _release_abandoned_estimator(self, task: asyncio.Task[PoseEstimator]) -> None:
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.estimator_pool.release(task.result())
+
+    def _pose_model_metrics(self) -> dict[str, Any]:
+        estimator = self.pose_estimator
+        metrics: dict[str, Any] = {
+            "variant": estimator.model_variant if estimator is not None else None,
+            "input_max_side": self.model_level.max_side,
+            "auto": self.model_tuner is not None,
+            "avg_latency_ms": self.pose_latency_ms,
+        }
+        if self.model_tuner is not None:
+            metrics["budget_ms"] = self.model_tuner.budget_ms
+        return metrics
+
     def _camera_source_desc(self) -> str:
         if self._latest_client_frame_if_fresh() is not None:
             return "android_client_frame"
@@ -1006,15 +1382,13 @@ class ClientSession:
             return self.frame_provider.current_source_desc
         return "placeholder"
 
-    def _read_effective_frame(self) -> np.ndarray:
+    def _read_effective_frame(self) -> tuple[np.ndarray, int]:
         client_frame = self._latest_client_frame_if_fresh()
         if client_frame is not None:
-            return client_frame
-        if self.config.camera_mode == "client":
-            return FrameProvider._placeholder_frame()
-        if self.frame_provider is not None:
+            return client_frame, self.latest_client_frame_capture_ms
+        if self.config.camera_mode != "client" and self.frame_provider is not None:
             return self.frame_provider.read()
-        return FrameProvider._placeholder_frame()
+        return FrameProvider._placeholder_frame(), wall_clock_ms()
 
     def _latest_client_frame_if_fresh(self) -> np.ndarray | None:
         frame = self.latest_client_frame
@@ -1025,12 +1399,16 @@ class ClientSession:
             return None
         return frame
 
-    async def _consume_commands_non_blocking(self) -> None:
+    async def _read_commands(self) -> None:
+        """Reads commands as they arrive, independent of the inference-paced loop.
+
+        Receive times are taken here, so `ping` is answered at once with an
+        exact `server_receive_ms`; everything else is queued for the session
+        loop.
+        """
         while True:
             try:
-                line = await asyncio.wait_for(self.reader.readline(), timeout=0.001)
-            except TimeoutError:
-                return
+                line = await self.reader.readline()
             except ValueError:
                 await self._send_json(
                     {
@@ -1039,43 +1417,73 @@ class ClientSession:
                         "message": "incoming command too large",
                     }
                 )
+                continue
+            except (ConnectionError, asyncio.IncompleteReadError):
                 return
             if not line:
                 return
+            received_ms = wall_clock_ms()
             raw = line.decode("utf-8", errors="ignore").strip()
             if not raw:
                 continue
-            await self._handle_client_command(raw)
+            try:
+                payload = json.loads(raw)
+            except Exception:
+                await self._send_json(
+                    {
+                        "type": "status",
+                        "level": "warning",
+                        "message": "invalid json command",
+                    }
+                )
+                continue
+            if not isinstance(payload, dict):
+                continue
+            if str(payload.get("type", "")).strip() == "ping":
+                await self._send_json(pong_message(payload, received_ms))
+                continue
+            await self._commands.put((payload, received_ms))
 
-    async def _handle_client_command(self, raw: str) -> None:
-        try:
-            payload = json.loads(raw)
-        except Exception:
+    async def _consume_commands_non_blocking(self) -> None:
+        while not self._commands.empty():
+            payload, received_ms = self._commands.get_nowait()
+            await self._handle_client_command(payload, received_ms)
+
+    async def _handle_client_command(self, payload: dict[str, Any], received_ms: int) -> None:
+        cmd_type = str(payload.get("type", "")).strip()
+        if cmd_type == "hello":
+            self._apply_landmark_format(payload.get("landmark_format"))
             await self._send_json(
                 {
                     "type": "status",
-                    "level": "warning",
-                    "message": "invalid json command",
+                    "level": "info",
+                    "message": "hello acknowledged",
                 }
             )
             return
 
-        if not isinstance(payload, dict):
-            return
-
-        cmd_type = str(payload.get("type", "")).strip()
-        if cmd_type == "hello":
+        if cmd_type == "set_landmark_format":
+            landmark_format = self._apply_landmark_format(payload.get("landmark_format"))
+            if landmark_format is None:
+                await self._send_json(
+                    {
+                        "type": "status",
+                        "level": "warning",
+                        "message": f"unknown landmark_format: {payload.get('landmark_format')}",
+                    }
+                )
+                return
             await self._send_json(
                 {
                     "type": "status",
                     "level": "info",
-                    "message": "hello acknowledged",
+                    "message": f"landmark_format set to {landmark_format}",
                 }
             )
             return
 
-        if cmd_type == "ping":
-            await self._send_json({"type": "pong", "timestamp_ms": int(time.time() * 1000)})
+        if cmd_type == "select_subject":
+            await self._select_subject(payload)
             return
 
         if cmd_type == "stop_session":
@@ -1088,7 +1496,7 @@ class ClientSession:
             return
 
         if cmd_type == "client_frame":
-            await self._handle_client_frame(payload)
+            await self._handle_client_frame(payload, received_ms)
             return
 
         await self._send_json(
@@ -1099,7 +1507,46 @@ class ClientSession:
             }
         )
 
-    async def _handle_client_frame(self, payload: dict[str, Any]) -> None:
+    async def _select_subject(self, payload: dict[str, Any]) -> None:
+        if self.pose_estimator is None:
+            return
+        tracker = self.pose_estimator.tracker
+        if "track_id" in payload:
+            try:
+                selected = tracker.select_track(int(payload["track_id"]))
+            except (TypeError, ValueError):
+                selected = False
+            if not selected:
+                await self._send_json(
+                    {
+                        "type": "status",
+                        "level": "warning",
+                        "message": f"unknown track_id: {payload.get('track_id')}",
+                    }
+                )
+            return
+
+        try:
+            x = float(payload["x"])
+            y = float(payload["y"])
+        except (KeyError, TypeError, ValueError):
+            await self._send_json(
+                {
+                    "type": "status",
+                    "level": "warning",
+                    "message": "select_subject requires normalized x/y or track_id",
+                }
+            )
+            return
+        tracker.select_at(x, y)
+
+    def _apply_landmark_format(self, raw: Any) -> str | None:
+        landmark_format = normalize_landmark_format(raw)
+        if landmark_format is not None:
+            self.landmark_format = landmark_format
+        return landmark_format
+
+    async def _handle_client_frame(self, payload: dict[str, Any], received_ms: int) -> None:
         if self.config.camera_mode not in {"auto", "client"}:
             return
 
@@ -1120,6 +1567,15 @@ class ClientSession:
         frame_bgr = rotate_frame_by_degrees(frame_bgr, rotation_degrees)
         self.latest_client_frame = frame_bgr
         self.latest_client_frame_at_monotonic = time.monotonic()
+        # Clients that synced with `ping` send their capture time on the server clock.
+        capture_ms = payload.get("capture_timestamp_ms")
+        self.latest_client_frame_capture_ms = int(capture_ms) if isinstance(capture_ms, (int, float)) else received_ms
+        if self.recorder is not None and self.recorder.client_frames:
+            self.recorder.write_client_frame(
+                base64.b64decode(normalize_base64_image(raw_jpeg_base64)),
+                self.latest_client_frame_capture_ms,
+                rotation_degrees=rotation_degrees,
+            )
 
         if not self.client_source_announced:
             self.client_source_announced = True
@@ -1135,17 +1591,42 @@ class ClientSession:
         template_name = str(payload.get("template_name", "template")).strip() or "template"
 
         raw_image = str(payload.get("reference_image_base64", "")).strip()
-        reference_image_bgr = decode_base64_image(raw_image)
-        if reference_image_bgr is None:
-            await self._send_json(
-                {
-                    "type": "error",
-                    "message": "reference_image_base64 is required and must be decodable",
-                }
-            )
-            return
+        pack = self.templates.get(template_name) if self.templates is not None and not raw_image else None
+        if pack is not None:
+            live_space = COORDINATE_SPACE_WORLD if self.config.prefer_world_landmarks else COORDINATE_SPACE_IMAGE
+            if pack.coordinate_space != live_space:
+                LOGGER.warning(
+                    "template %s holds %s landmarks, live poses are %s; refusing session",
+                    template_name,
+                    pack.coordinate_space,
+                    live_space,
+                )
+                await self._send_json(
+                    {
+                        "type": "error",
+                        "message": f"template {template_name} holds {pack.coordinate_space} landmarks "
+                        f"but the server scores {live_space} landmarks (--prefer-world-landmarks)",
+                    }
+                )
+                return
+            # Compiled template: the reference pose is precomputed, no image decode or inference.
+            reference_pose = reference_pose_from_pack(pack)
+            raw_image = pack.reference_image_base64()
+        else:
+            reference_image_bgr = decode_base64_image(raw_image)
+            if reference_image_bgr is None:
+                await self._send_json(
+                    {
+                        "type": "error",
+                        "message": "reference_image_base64 is required and must be decodable "
+                        "(or template_name must match a compiled template)",
+                    }
+                )
+                return
 
-        reference_pose = await asyncio.to_thread(self.pose_estimator.detect_image, reference_image_bgr)
+            if self.pose_estimator is None:
+                return
+            reference_pose = await asyncio.to_thread(self.pose_estimator.detect_image, reference_image_bgr)
         if reference_pose is None:
             await self._send_json(
                 {
@@ -1155,6 +1636,16 @@ class ClientSession:
             )
             return
 
+        if "pose_model" in payload or "inference_max_side" in payload:
+            pose_model = str(payload.get("pose_model", self.config.pose_model)).strip().lower()
+            if pose_model not in {"auto", *POSE_MODEL_VARIANTS}:
+                pose_model = self.config.pose_model
+            try:
+                max_side = int(payload.get("inference_max_side", self.config.inference_max_side))
+            except (TypeError, ValueError):
+                max_side = self.config.inference_max_side
+            self._configure_pose_model(pose_model, max(0, max_side))
+
         duration_sec = int(payload.get("countdown_sec", self.config.session_seconds) or self.config.session_seconds)
         duration_sec = max(1, min(15, duration_sec))
 
@@ -1166,6 +1657,12 @@ class ClientSession:
             reference_image_base64=normalize_base64_image(raw_image),
             reference_pose=reference_pose,
         )
+        if self.config.session_selection == "streaming":
+            self.active_session.streaming = StreamingSessionScorer(
+                reference_pose=reference_pose,
+                scorer=self.scorer,
+                fps=int(self.config.fps),
+            )
 
         await self._send_json(
             {
@@ -1177,50 +1674,121 @@ class ClientSession:
         )
 
     async def _finish_session(self) -> None:
+        """Hands the finished session to a background job so preview and new sessions continue.
+
+        The job sends `result` (with the local coach feedback) as soon as the
+        representative frame is known, then `feedback` with the remote model's
+        text when feedback generation is enabled. When every job slot is
+        taken, the session is finished here without the remote call.
+        """
         session = self.active_session
         if session is None:
             return
 
         session.result_sent = True
         self.active_session = None
+        pose_model = {
+            **self._pose_model_metrics(),
+            "frames_by_model": dict(session.pose_model_frames),
+        }
 
-        best_score, best_frame, metrics, best_landmarks = await asyncio.to_thread(
-            postprocess_best_from_sequence,
-            reference_pose=session.reference_pose,
-            poses_seq=session.poses_seq,
-            frames_base64_seq=session.frames_base64_seq,
-            ts_ms_seq=session.ts_ms_seq,
-            scorer=self.scorer,
-            fps=int(self.config.fps),
-            using_world=bool(self.config.prefer_world_landmarks),
-        )
+        job_id = self.jobs.new_job_id()
+        if self.jobs.start(job_id, self._post_session_job(job_id, session, pose_model, background=True)):
+            self._job_ids.add(job_id)
+            return
+        LOGGER.warning("all %d post-session jobs busy; finishing session without remote feedback", self.jobs.max_jobs)
+        await self._post_session_job(job_id, session, pose_model, background=False)
 
-        feedback_text, feedback_model = await asyncio.to_thread(
-            self.feedback_generator.generate,
-            reference_image_base64=session.reference_image_base64,
-            candidate_image_base64=best_frame,
-            metrics=metrics,
-        )
+    async def _post_session_job(
+        self,
+        job_id: str,
+        session: ActiveSession,
+        pose_model: dict[str, Any],
+        *,
+        background: bool,
+    ) -> None:
+        try:
+            if session.streaming is not None:
+                best_score, best_frame, metrics, best_landmarks = session.streaming.finish(
+                    poses_seq=session.poses_seq,
+                    frames_base64_seq=session.frames_base64_seq,
+                    ts_ms_seq=session.ts_ms_seq,
+                    using_world=bool(self.config.prefer_world_landmarks),
+                )
+            else:
+                run = self.jobs.run if background else asyncio.to_thread
+                best_score, best_frame, metrics, best_landmarks = await run(
+                    postprocess_best_from_sequence,
+                    reference_pose=session.reference_pose,
+                    poses_seq=session.poses_seq,
+                    frames_base64_seq=session.frames_base64_seq,
+                    ts_ms_seq=session.ts_ms_seq,
+                    scorer=self.scorer,
+                    fps=int(self.config.fps),
+                    using_world=bool(self.config.prefer_world_landmarks),
+                )
+            metrics["pose_model"] = pose_model
 
-        await self._send_json(
-            {
-                "type": "result",
-                "template_name": session.template_name,
-                "best_score": best_score,
-                "best_frame_jpeg_base64": best_frame,
-                "reference_image_base64": session.reference_image_base64,
-                "feedback": feedback_text,
-                "feedback_model": feedback_model,
-                "metrics": metrics,
-                "landmarks": best_landmarks,
-            }
-        )
+            feedback_pending = background and self.feedback_generator.wants_remote(session.reference_image_base64)
+            feedback_text, feedback_model = self.feedback_generator.local(metrics)
+            await self._send_json(
+                {
+                    "type": "result",
+                    "job_id": job_id,
+                    "template_name": session.template_name,
+                    "best_score": best_score,
+                    "best_frame_jpeg_base64": best_frame,
+                    "reference_image_base64": session.reference_image_base64,
+                    "feedback": feedback_text,
+                    "feedback_model": feedback_model,
+                    "feedback_pending": feedback_pending,
+                    "metrics": metrics,
+                    "landmarks": best_landmarks,
+                }
+            )
+            if not feedback_pending:
+                return
+
+            reference_pose = session.reference_pose
+            feedback_text, feedback_model = await self.feedback_generator.generate(
+                template_name=session.template_name,
+                reference_image_base64=session.reference_image_base64,
+                candidate_image_base64=best_frame,
+                metrics=metrics,
+                reference_landmarks=np.column_stack([reference_pose.points[:, :2], reference_pose.vis]),
+                candidate_landmarks=np.asarray(
+                    [[lm["x"], lm["y"], lm.get("visibility", 1.0)] for lm in best_landmarks],
+                    dtype=np.float32,
+                ),
+            )
+            await self._send_json(
+                {
+                    "type": "feedback",
+                    "job_id": job_id,
+                    "template_name": session.template_name,
+                    "feedback": feedback_text,
+                    "feedback_model": feedback_model,
+                }
+            )
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.exception("post-session job %s failed", job_id)
+            await self._send_json(
+                {
+                    "type": "error",
+                    "job_id": job_id,
+                    "message": f"post-session processing failed: {exc}",
+                }
+            )
+        finally:
+            self._job_ids.discard(job_id)
 
     async def _send_json(self, payload: dict[str, Any]) -> None:
-        if self.writer.is_closing():
-            return
-        self.writer.write((json.dumps(payload, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8"))
-        await self.writer.drain()
+        data = self.serializer.dumps_line(payload)
+        async with self._write_lock:
+            if self.writer.is_closing():
+                return
+            self.writer.write(data)
+            await self.writer.drain()
 
 
 def normalize_base64_image(raw: str) -> str:
@@ -1268,22 +1836,92 @@ def encode_frame_to_base64(frame_bgr: np.ndarray, jpeg_quality: int) -> str:
     return base64.b64encode(enc.tobytes()).decode("ascii")
 
 
-def pose_to_json_points(pose: PosePacket | None) -> list[dict[str, float]]:
+def reference_pose_from_pack(pack: TemplatePack) -> PosePacket | None:
+    """The pack's key frame as a reference pose, with its stored normalization."""
+    row = pack.key_frame
+    if not 0 <= row < len(pack) or not bool(pack.valid[row]):
+        return None
+    return PosePacket(
+        points=np.array(pack.points[row]),
+        vis=np.array(pack.vis[row]),
+        pres=np.array(pack.pres[row]),
+        normalized=np.array(pack.normalized[row]),
+    )
+
+
+def pose_to_json_points(
+    pose: PosePacket | None,
+    *,
+    landmark_format: str = LANDMARK_FORMAT_OBJECTS,
+) -> Any:
     if pose is None:
         return []
-    points: list[dict[str, float]] = []
-    for idx in range(33):
-        p = pose.points[idx]
-        points.append(
-            {
-                "x": float(p[0]),
-                "y": float(p[1]),
-                "z": float(p[2]),
-                "visibility": float(pose.vis[idx]),
-                "presence": float(pose.pres[idx]),
-            }
+    return keypoints_from_arrays(pose.points, pose.vis, pose.pres, landmark_format=landmark_format)
+
+
+# Representative-frame selection and smoothing shared by streaming and offline sessions.
+SESSION_SMOOTHING = {"r_base": 1e-4, "accel_var": 3.0}
+SESSION_PICKER = {
+    "stable_vel_quantile": 0.35,
+    "top_score_delta": 12.0,
+    "min_stable_seconds": 0.8,
+    "representative_percentile": 80.0,
+}
+
+
+class StreamingSessionScorer:
+    """Scores a stand-hold session frame by frame as it is captured.
+
+    Each pose is smoothed causally (`OnlinePoseSmoother`), scored against the
+    reference and fed to a `RepresentativePicker`, so the result is ready when
+    the session deadline passes.
+    """
+
+    def __init__(self, *, reference_pose: PosePacket, scorer: PoseScorer, fps: int) -> None:
+        fps = max(1, int(fps))
+        self.reference_pose = reference_pose
+        self.scorer = scorer
+        self.smoother = OnlinePoseSmoother(
+            fps=fps,
+            min_conf=scorer.config.conf_threshold,
+            reset_gap_frames=max(2, int(0.5 * fps)),
+            **SESSION_SMOOTHING,
+        )
+        self.picker = RepresentativePicker(fps=fps, **SESSION_PICKER)
+        self.smoothed_seq: list[PosePacket | None] = []
+        self.results: list[ScoreResult | None] = []
+
+    def observe(self, pose: PosePacket | None) -> ScoreResult | None:
+        index = len(self.results)
+        smoothed = self.smoother.update(pose)
+        result = None if smoothed is None else self.scorer.score(self.reference_pose, smoothed)
+        prev = self.smoothed_seq[-1] if self.smoothed_seq else None
+        vel = motion_energy_between(prev, smoothed, conf_threshold=self.scorer.config.conf_threshold)
+        self.smoothed_seq.append(smoothed)
+        self.results.append(result)
+        if result is None:
+            self.picker.update(index, None, False, vel)
+        else:
+            self.picker.update(index, result.final, result.reliable, vel)
+        return result
+
+    def finish(
+        self,
+        *,
+        poses_seq: list[PosePacket | None],
+        frames_base64_seq: list[str],
+        ts_ms_seq: list[int] | None,
+        using_world: bool,
+    ) -> tuple[float, str, dict[str, Any], list[dict[str, float]]]:
+        return representative_result(
+            self.picker.finish(),
+            results=self.results,
+            poses_seq=poses_seq,
+            smoothed_seq=self.smoothed_seq,
+            frames_base64_seq=frames_base64_seq,
+            ts_ms_seq=ts_ms_seq,
+            using_world=using_world,
         )
-    return points
 
 
 def postprocess_best_from_sequence(
@@ -1296,66 +1934,74 @@ def postprocess_best_from_sequence(
     fps: int,
     using_world: bool,
 ) -> tuple[float, str, dict[str, Any], list[dict[str, float]]]:
+    """Offline session scoring: RTS smoothing and batched scoring of the whole sequence."""
     if not poses_seq or not frames_base64_seq:
         metrics = {"score": 0.0, "reliable": False, "reason": "No frames buffered"}
         return 0.0, "", metrics, []
 
     total = min(len(poses_seq), len(frames_base64_seq))
     poses_seq = poses_seq[:total]
-    frames_base64_seq = frames_base64_seq[:total]
-    timestamps = (ts_ms_seq or [])[:total]
 
     smoothed_seq = stabilize_pose_sequence_rts(
         poses_seq=poses_seq,
         fps=max(1, int(fps)),
         min_conf=scorer.config.conf_threshold,
-        r_base=1e-4,
-        accel_var=3.0,
         reset_gap_frames=max(2, int(0.5 * max(int(fps), 1))),
+        **SESSION_SMOOTHING,
     )
-
-    scores = np.full((total,), np.nan, dtype=np.float32)
-    reliables = np.zeros((total,), dtype=bool)
-    results: list[ScoreResult | None] = [None] * total
-    for idx, pose in enumerate(smoothed_seq):
-        if pose is None:
-            continue
-        result = scorer.score(reference_pose, pose)
-        results[idx] = result
-        if result.final is None:
-            continue
-        scores[idx] = float(result.final)
-        reliables[idx] = bool(result.reliable)
-
+    results = scorer.score_sequence(reference_pose, smoothed_seq)
     vel = compute_motion_energy(
         smoothed_seq,
         conf_threshold=scorer.config.conf_threshold,
     )
 
-    picked = pick_representative_index(
-        scores=scores,
-        reliables=reliables,
-        vel=vel,
-        fps=max(1, int(fps)),
-        stable_vel_quantile=0.35,
-        top_score_delta=12.0,
-        min_stable_seconds=0.8,
-        representative_percentile=80.0,
+    picker = RepresentativePicker(fps=max(1, int(fps)), **SESSION_PICKER)
+    for idx, result in enumerate(results):
+        if result is None:
+            picker.update(idx, None, False, float(vel[idx]))
+        else:
+            picker.update(idx, result.final, result.reliable, float(vel[idx]))
+    return representative_result(
+        picker.finish(),
+        results=results,
+        poses_seq=poses_seq,
+        smoothed_seq=smoothed_seq,
+        frames_base64_seq=frames_base64_seq,
+        ts_ms_seq=ts_ms_seq,
+        using_world=using_world,
     )
+
+
+def representative_result(
+    picked: tuple[int, dict[str, Any]] | None,
+    *,
+    results: list[ScoreResult | None],
+    poses_seq: list[PosePacket | None],
+    smoothed_seq: list[PosePacket | None],
+    frames_base64_seq: list[str],
+    ts_ms_seq: list[int] | None,
+    using_world: bool,
+) -> tuple[float, str, dict[str, Any], list[dict[str, float]]]:
+    """`(best_score, best_frame, metrics, best_landmarks)` of the picked session frame."""
+    total = min(len(results), len(poses_seq), len(frames_base64_seq))
+    if total == 0:
+        metrics = {"score": 0.0, "reliable": False, "reason": "No frames buffered"}
+        return 0.0, "", metrics, []
     if picked is None:
         metrics = {"score": 0.0, "reliable": False, "reason": "No reliable frame found (postprocess)"}
         return 0.0, "", metrics, []
 
     best_idx, temporal_debug = picked
-    picked_result = results[best_idx]
+    picked_result = results[best_idx] if best_idx < total else None
     if picked_result is None or picked_result.final is None:
         metrics = {"score": 0.0, "reliable": False, "reason": "Selected frame has no valid score"}
         return 0.0, "", metrics, []
 
+    timestamps = (ts_ms_seq or [])[:total]
     best_score = float(picked_result.final)
     best_frame = frames_base64_seq[best_idx] or ""
     metrics = picked_result.as_metrics(using_world=using_world)
-    if len(timestamps) == total and best_idx < len(timestamps):
+    if len(timestamps) == total:
         temporal_debug["picked_timestamp_ms"] = int(timestamps[best_idx])
         if "segment_start" in temporal_debug and "segment_end" in temporal_debug:
             start_idx = int(temporal_debug["segment_start"])
@@ -1387,152 +2033,112 @@ def stabilize_pose_sequence_rts(
     if total == 0:
         return []
 
-    dt = 1.0 / max(float(fps), 1.0)
     points = np.full((total, 33, 3), np.nan, dtype=np.float32)
-    vis = np.zeros((total, 33), dtype=np.float32)
-    pres = np.zeros((total, 33), dtype=np.float32)
-
+    conf = np.zeros((total, 33), dtype=np.float32)
     for t, pose in enumerate(poses_seq):
         if pose is None:
             continue
-        points[t] = pose.points.astype(np.float32, copy=False)
-        vis[t] = pose.vis.astype(np.float32, copy=False)
-        pres[t] = pose.pres.astype(np.float32, copy=False)
-
-    conf = np.clip(np.minimum(vis, pres), 0.0, 1.0).astype(np.float32)
-    out_points = np.full_like(points, np.nan, dtype=np.float32)
-    for joint_idx in range(33):
-        conf_joint = conf[:, joint_idx].astype(np.float64, copy=False)
-        for axis_idx in range(3):
-            z_axis = points[:, joint_idx, axis_idx].astype(np.float64, copy=False)
-            out_points[:, joint_idx, axis_idx] = kalman_rts_smooth_1d(
-                z=z_axis,
-                w=conf_joint,
-                dt=dt,
-                r_base=float(r_base),
-                accel_var=float(accel_var),
-                min_w=float(min_conf),
-                reset_gap_frames=int(reset_gap_frames),
-            ).astype(np.float32, copy=False)
-
+        points[t] = pose.points
+        conf[t] = np.clip(np.minimum(pose.vis, pose.pres), 0.0, 1.0)
+
+    out_points = rts_smooth_points(
+        points,
+        conf,
+        fps=fps,
+        min_conf=min_conf,
+        r_base=r_base,
+        accel_var=accel_var,
+        reset_gap_frames=reset_gap_frames,
+    )
     out: list[PosePacket | None] = []
     for t, raw_pose in enumerate(poses_seq):
         if raw_pose is None:
             out.append(None)
             continue
-        out.append(PosePacket(points=out_points[t], vis=raw_pose.vis, pres=raw_pose.pres))
+        out.append(
+            PosePacket(
+                points=out_points[t],
+                vis=raw_pose.vis,
+                pres=raw_pose.pres,
+                capture_timestamp_ms=raw_pose.capture_timestamp_ms,
+            )
+        )
     return out
 
 
-def kalman_rts_smooth_1d(
-    z: np.ndarray,
-    w: np.ndarray,
-    *,
-    dt: float,
-    r_base: float,
-    accel_var: float,
-    min_w: float,
-    reset_gap_frames: int,
-) -> np.ndarray:
-    total = int(z.shape[0])
-    if total == 0:
-        return z.astype(np.float32, copy=True)
-
-    z = np.asarray(z, dtype=np.float64).reshape(-1)
-    w = np.asarray(w, dtype=np.float64).reshape(-1)
+class OnlinePoseSmoother:
+    """Causal counterpart of `stabilize_pose_sequence_rts`: the same constant-velocity
+    Kalman filter per landmark coordinate, without the backward (RTS) pass, so
+    each frame is smoothed as soon as it arrives.
 
-    valid = np.isfinite(z) & (w >= min_w)
-    if not bool(np.any(valid)):
-        return z.astype(np.float32, copy=True)
-
-    first_idx = int(np.argmax(valid))
-    init_val = float(z[first_idx])
-
-    f = np.array([[1.0, float(dt)], [0.0, 1.0]], dtype=np.float64)
-    h = np.array([1.0, 0.0], dtype=np.float64)
-    eye2 = np.eye(2, dtype=np.float64)
-
-    dt2 = float(dt) * float(dt)
-    q = float(accel_var) * np.array(
-        [
-            [dt2 * dt2 / 4.0, dt2 * float(dt) / 2.0],
-            [dt2 * float(dt) / 2.0, dt2],
-        ],
-        dtype=np.float64,
-    )
+    Joints share one covariance across their x/y/z axes since the noise only
+    depends on the joint confidence. Joints never measured yet keep their raw
+    coordinates.
+    """
 
-    x_f = np.zeros((total, 2), dtype=np.float64)
-    p_f = np.zeros((total, 2, 2), dtype=np.float64)
-    x_p = np.zeros((total, 2), dtype=np.float64)
-    p_p = np.zeros((total, 2, 2), dtype=np.float64)
+    def __init__(
+        self,
+        *,
+        fps: int,
+        min_conf: float,
+        r_base: float,
+        accel_var: float,
+        reset_gap_frames: int,
+    ) -> None:
+        dt = 1.0 / max(float(fps), 1.0)
+        self.dt = dt
+        self.min_conf = float(min_conf)
+        self.r_base = float(r_base)
+        self.reset_gap_frames = int(reset_gap_frames)
+        dt2 = dt * dt
+        self._q = float(accel_var) * np.array([[dt2 * dt2 / 4.0, dt2 * dt / 2.0], [dt2 * dt / 2.0, dt2]])
+        self._f = np.array([[1.0, dt], [0.0, 1.0]])
+        self._x = np.zeros((33, 3, 2), dtype=np.float64)  # [position, velocity] per coordinate
+        self._p = np.tile(np.eye(2), (33, 1, 1))
+        self._started = np.zeros(33, dtype=bool)
+        self._gap = np.zeros(33, dtype=np.int64)
+
+    def update(self, pose: PosePacket | None) -> PosePacket | None:
+        """Advances one frame; None (no pose) only predicts."""
+        x_pred = self._x.copy()
+        x_pred[..., 0] += self.dt * self._x[..., 1]
+        p_pred = np.einsum("ij,njk,lk->nil", self._f, self._p, self._f) + self._q
 
-    x = np.array([init_val, 0.0], dtype=np.float64)
-    p = np.eye(2, dtype=np.float64)
-    gap = 0
+        if pose is None:
+            self._x, self._p = x_pred, p_pred
+            self._gap += 1
+            return None
 
-    for k in range(total):
-        if k == 0:
-            x_pred = x
-            p_pred = p
-        else:
-            x_pred = f @ x
-            p_pred = f @ p @ f.T + q
-
-        x_p[k] = x_pred
-        p_p[k] = p_pred
-
-        zk = float(z[k]) if np.isfinite(z[k]) else float("nan")
-        wk = float(w[k]) if np.isfinite(w[k]) else 0.0
-        meas_ok = wk >= min_w and np.isfinite(zk)
-
-        if meas_ok:
-            if gap >= int(reset_gap_frames):
-                x_pred = np.array([zk, 0.0], dtype=np.float64)
-                p_pred = np.eye(2, dtype=np.float64)
-            gap = 0
-
-            r = float(r_base / max(wk * wk, 1e-6))
-            y = zk - float(h @ x_pred)
-            s = float(h @ p_pred @ h) + r
-            if s < 1e-12:
-                x = x_pred
-                p = p_pred
-            else:
-                k_gain = (p_pred @ h) / s
-                x = x_pred + k_gain * y
-                p = (eye2 - np.outer(k_gain, h)) @ p_pred
-        else:
-            gap += 1
-            x = x_pred
-            p = p_pred
-
-        x_f[k] = x
-        p_f[k] = p
-
-    x_s = np.zeros_like(x_f)
-    p_s = np.zeros_like(p_f)
-    x_s[total - 1] = x_f[total - 1]
-    p_s[total - 1] = p_f[total - 1]
-
-    for k in range(total - 2, -1, -1):
-        p_pred_next = p_p[k + 1]
-        det = float(p_pred_next[0, 0] * p_pred_next[1, 1] - p_pred_next[0, 1] * p_pred_next[1, 0])
-        if abs(det) < 1e-12:
-            x_s[k] = x_f[k]
-            p_s[k] = p_f[k]
-            continue
-        inv = (1.0 / det) * np.array(
-            [
-                [p_pred_next[1, 1], -p_pred_next[0, 1]],
-                [-p_pred_next[1, 0], p_pred_next[0, 0]],
-            ],
-            dtype=np.float64,
+        z = pose.points.astype(np.float64)
+        w = np.clip(np.minimum(pose.vis, pose.pres), 0.0, 1.0).astype(np.float64)
+        measured = (w >= self.min_conf) & np.isfinite(z).all(axis=1)
+
+        reset = measured & (~self._started | (self._gap >= self.reset_gap_frames))
+        x_pred[reset, :, 0] = z[reset]
+        x_pred[reset, :, 1] = 0.0
+        p_pred[reset] = np.eye(2)
+
+        r = self.r_base / np.maximum(w * w, 1e-6)
+        s = p_pred[:, 0, 0] + r
+        gain = p_pred[:, :, 0] / s[:, None]  # (33,2)
+        innovation = np.where(measured[:, None], z - x_pred[..., 0], 0.0)
+        x_new = x_pred + gain[:, None, :] * innovation[..., None]
+        p_new = p_pred - gain[:, :, None] * p_pred[:, None, 0, :]
+
+        self._x = np.where(measured[:, None, None], x_new, x_pred)
+        self._p = np.where(measured[:, None, None], p_new, p_pred)
+        self._started |= measured
+        self._gap = np.where(measured, 0, self._gap + 1)
+
+        points = np.where(self._started[:, None], self._x[..., 0], pose.points).astype(np.float32)
+        return PosePacket(
+            points=points,
+            vis=pose.vis,
+            pres=pose.pres,
+            # Shared by scoring and motion energy of this and the next frame.
+            normalized=center_and_scale(points),
+            capture_timestamp_ms=pose.capture_timestamp_ms,
         )
-        c = p_f[k] @ f.T @ inv
-        x_s[k] = x_f[k] + c @ (x_s[k + 1] - x_p[k + 1])
-        p_s[k] = p_f[k] + c @ (p_s[k + 1] - p_p[k + 1]) @ c.T
-
-    return x_s[:, 0].astype(np.float32, copy=False)
 
 
 def compute_motion_energy(
@@ -1540,437 +2146,358 @@ def compute_motion_energy(
     *,
     conf_threshold: float,
 ) -> np.ndarray:
-    total = len(poses_seq)
-    vel = np.full((total,), np.nan, dtype=np.float32)
-    if total <= 1:
-        return vel
-
-    for idx in range(1, total):
-        prev_pose = poses_seq[idx - 1]
-        cur_pose = poses_seq[idx]
-        if prev_pose is None or cur_pose is None:
-            continue
-
-        prev_norm = center_and_scale(prev_pose.points)
-        cur_norm = center_and_scale(cur_pose.points)
-        prev_w = np.clip(np.minimum(prev_pose.vis, prev_pose.pres), 0.0, 1.0)
-        cur_w = np.clip(np.minimum(cur_pose.vis, cur_pose.pres), 0.0, 1.0)
-        weight = np.minimum(prev_w, cur_w)[POSE_SELECTED_INDICES]
-        valid = weight >= conf_threshold
-        if int(np.count_nonzero(valid)) < 6:
-            continue
-
-        delta = cur_norm[POSE_SELECTED_INDICES][valid] - prev_norm[POSE_SELECTED_INDICES][valid]
-        vel[idx] = float(np.mean(np.linalg.norm(delta, axis=1)))
-    return vel
-
-
-def pick_representative_index(
-    *,
-    scores: np.ndarray,
-    reliables: np.ndarray,
-    vel: np.ndarray,
-    fps: int,
-    stable_vel_quantile: float,
-    top_score_delta: float,
-    min_stable_seconds: float,
-    representative_percentile: float,
-) -> tuple[int, dict[str, Any]] | None:
-    total = int(scores.shape[0])
-    valid = np.isfinite(scores) & reliables
-    if int(np.count_nonzero(valid)) < 3:
-        return None
-
-    valid_scores = scores[valid]
-    s_max = float(np.max(valid_scores))
-    score_threshold = float(max(0.0, s_max - float(top_score_delta)))
-
-    valid_vel = vel[np.isfinite(vel) & valid]
-    if valid_vel.size > 0:
-        vel_threshold = float(np.quantile(valid_vel, float(stable_vel_quantile)))
-    else:
-        vel_threshold = float("inf")
-
-    stable = valid & (scores >= score_threshold) & np.isfinite(vel) & (vel <= vel_threshold)
-    min_len = max(3, int(round(float(min_stable_seconds) * float(max(fps, 1)))))
-
-    runs: list[tuple[int, int]] = []
-    idx = 0
-    while idx < total:
-        if not stable[idx]:
-            idx += 1
-            continue
-        end = idx + 1
-        while end < total and stable[end]:
-            end += 1
-        if (end - idx) >= min_len:
-            runs.append((idx, end))
-        idx = end
-
-    if not runs:
-        candidate_idxs = np.where(valid)[0]
-        k = min(7, candidate_idxs.size)
-        top = candidate_idxs[np.argsort(scores[candidate_idxs])[-k:]]
-        target = float(np.percentile(scores[top], float(representative_percentile)))
-        pick = int(top[np.argmin(np.abs(scores[top] - target))])
-        return pick, {
-            "mode": "fallback_topk",
-            "s_max": s_max,
-            "score_thr": score_threshold,
-            "vel_thr": vel_threshold,
-            "picked_index": pick,
-            "picked_score": float(scores[pick]),
-            "topk": int(k),
-        }
+    """Per-frame motion energy (see `motion_energy_between`); row 0 and undefined rows are NaN.
 
-    best_run: tuple[int, int] | None = None
-    best_med = -1.0
-    best_len = -1
-    for start, end in runs:
-        run_scores = scores[start:end]
-        finite_scores = run_scores[np.isfinite(run_scores)]
-        if finite_scores.size == 0:
+    Every pose is normalized once, as one (T,33,3) batch.
+    """
+    total = len(poses_seq)
+    points = np.zeros((total, 33, 3), dtype=np.float32)
+    weight = np.zeros((total, 33), dtype=np.float32)
+    for t, pose in enumerate(poses_seq):
+        if pose is None:
             continue
-        med = float(np.median(finite_scores))
-        run_len = int(end - start)
-        if med > best_med or (med == best_med and run_len > best_len):
-            best_med = med
-            best_len = run_len
-            best_run = (start, end)
-
-    if best_run is None:
-        return None
-
-    start, end = best_run
-    seg = np.arange(start, end, dtype=np.int32)
-    seg_scores = scores[seg]
-    target = float(np.percentile(seg_scores, float(representative_percentile)))
-    pick = int(seg[np.argmin(np.abs(seg_scores - target))])
-
-    return pick, {
-        "mode": "stable_segment",
-        "segment_start": int(start),
-        "segment_end": int(end),
-        "segment_len": int(end - start),
-        "s_max": s_max,
-        "score_thr": score_threshold,
-        "vel_thr": vel_threshold,
-        "representative_percentile": float(representative_percentile),
-        "picked_index": pick,
-        "picked_score": float(scores[pick]),
-        "segment_score_median": float(np.median(seg_scores)),
-        "segment_score_max": float(np.max(seg_scores)),
-    }
-
-
-def swap_left_right(values: np.ndarray) -> np.ndarray:
-    out = values.copy()
-    for left_idx, right_idx in LEFT_RIGHT_SWAP_PAIRS:
-        out[left_idx] = values[right_idx]
-        out[right_idx] = values[left_idx]
-    return out
+        points[t] = pose.points
+        weight[t] = np.clip(np.minimum(pose.vis, pose.pres), 0.0, 1.0)
+    normalized = center_and_scale_batch(points, out=points)
+    return motion_energy_batch(normalized, weight, conf_threshold=conf_threshold)
 
 
-def mirror_and_swap_points(points: np.ndarray) -> np.ndarray:
-    mirrored = points.copy()
-    mirrored[:, 0] *= -1.0
-    return swap_left_right(mirrored)
-
-
-def center_and_scale(points_33: np.ndarray) -> np.ndarray:
-    if points_33.shape != (33, 3):
-        raise ValueError(f"Expected (33,3), got {points_33.shape}")
-
-    left_hip = points_33[LEFT_HIP]
-    right_hip = points_33[RIGHT_HIP]
-    left_shoulder = points_33[LEFT_SHOULDER]
-    right_shoulder = points_33[RIGHT_SHOULDER]
-
-    hip_mid = 0.5 * (left_hip + right_hip)
-    shoulder_mid = 0.5 * (left_shoulder + right_shoulder)
-    centered = points_33 - hip_mid[None, :]
-
-    torso_len = float(np.linalg.norm(shoulder_mid - hip_mid))
-    if torso_len < 1e-6:
-        fallback_pairs = [
-            (LEFT_SHOULDER, LEFT_ELBOW),
-            (LEFT_ELBOW, LEFT_WRIST),
-            (RIGHT_SHOULDER, RIGHT_ELBOW),
-            (RIGHT_ELBOW, RIGHT_WRIST),
-            (LEFT_HIP, LEFT_KNEE),
-            (LEFT_KNEE, LEFT_ANKLE),
-            (RIGHT_HIP, RIGHT_KNEE),
-            (RIGHT_KNEE, RIGHT_ANKLE),
-            (LEFT_HIP, RIGHT_HIP),
-            (LEFT_SHOULDER, RIGHT_SHOULDER),
-        ]
-        lengths: list[float] = []
-        for i0, i1 in fallback_pairs:
-            length = float(np.linalg.norm(points_33[i0] - points_33[i1]))
-            if length > 1e-6:
-                lengths.append(length)
-        torso_len = float(np.mean(lengths)) if lengths else 1.0
-
-    if torso_len < 1e-6:
-        torso_len = 1.0
-    return centered / torso_len
-
-
-def procrustes_align(
-    ref_points: np.ndarray,
-    cur_points: np.ndarray,
+def motion_energy_between(
+    prev_pose: PosePacket | None,
+    cur_pose: PosePacket | None,
     *,
-    weights: np.ndarray,
-    device: str,
-) -> tuple[np.ndarray, float, np.ndarray, float, np.ndarray]:
-    if ref_points.shape != cur_points.shape:
-        raise ValueError("ref_points and cur_points shape mismatch")
-
-    if ref_points.size == 0:
-        return cur_points.copy(), float("inf"), np.eye(3, dtype=np.float32), 1.0, np.zeros(3, dtype=np.float32)
-
-    if device == "cuda" and torch is not None and torch.cuda.is_available():
-        try:
-            return procrustes_align_torch(ref_points, cur_points, weights)
-        except Exception as exc:  # noqa: BLE001
-            LOGGER.warning("torch procrustes failed, fallback to numpy: %s", exc)
+    conf_threshold: float,
+) -> float:
+    """Mean normalized displacement of confident selected joints between two frames (NaN: undefined)."""
+    if prev_pose is None or cur_pose is None:
+        return float("nan")
+
+    prev_norm = prev_pose.normalized if prev_pose.normalized is not None else center_and_scale(prev_pose.points)
+    cur_norm = cur_pose.normalized if cur_pose.normalized is not None else center_and_scale(cur_pose.points)
+    prev_w = np.clip(np.minimum(prev_pose.vis, prev_pose.pres), 0.0, 1.0)
+    cur_w = np.clip(np.minimum(cur_pose.vis, cur_pose.pres), 0.0, 1.0)
+    weight = np.minimum(prev_w, cur_w)[POSE_SELECTED_INDICES]
+    valid = weight >= conf_threshold
+    if int(np.count_nonzero(valid)) < 6:
+        return float("nan")
+
+    delta = cur_norm[POSE_SELECTED_INDICES][valid] - prev_norm[POSE_SELECTED_INDICES][valid]
+    return float(np.mean(np.linalg.norm(delta, axis=1)))
+
+
+class P2Quantile:
+    """Running estimate of one quantile in O(1) memory (Jain & Chlamtac P² algorithm).
+
+    Exact while at most five samples have been seen.
+    """
+
+    def __init__(self, q: float) -> None:
+        self.q = float(q)
+        self.count = 0
+        self._heights: list[float] = []
+        self._positions = [0.0, 1.0, 2.0, 3.0, 4.0]
+        self._desired = [0.0, 2.0 * self.q, 4.0 * self.q, 2.0 + 2.0 * self.q, 4.0]
+        self._increments = [0.0, self.q / 2.0, self.q, (1.0 + self.q) / 2.0, 1.0]
+
+    @property
+    def value(self) -> float:
+        if self.count == 0:
+            return float("nan")
+        if self.count <= 5:
+            return float(np.quantile(self._heights, self.q))
+        return self._heights[2]
+
+    def add(self, x: float) -> None:
+        x = float(x)
+        self.count += 1
+        heights = self._heights
+        if self.count <= 5:
+            heights.append(x)
+            heights.sort()
+            return
 
-    return procrustes_align_numpy(ref_points, cur_points, weights)
+        if x < heights[0]:
+            heights[0] = x
+            cell = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= x < heights[i + 1])
+
+        positions = self._positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1.0
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in range(1, 4):
+            d = self._desired[i] - positions[i]
+            if (d >= 1.0 and positions[i + 1] - positions[i] > 1.0) or (d <= -1.0 and positions[i - 1] - positions[i] < -1.0):
+                step = 1.0 if d > 0 else -1.0
+                candidate = self._parabolic(i, step)
+                if not heights[i - 1] < candidate < heights[i + 1]:
+                    j = i + int(step)
+                    candidate = heights[i] + step * (heights[j] - heights[i]) / (positions[j] - positions[i])
+                heights[i] = candidate
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: float) -> float:
+        h, n = self._heights, self._positions
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
 
 
-def procrustes_align_numpy(
-    ref_points: np.ndarray,
-    cur_points: np.ndarray,
-    weights: np.ndarray,
-) -> tuple[np.ndarray, float, np.ndarray, float, np.ndarray]:
-    n = ref_points.shape[0]
+class RepresentativePicker:
+    """Picks the frame that represents a stand-hold session, updated one frame at a time.
 
-    w = np.asarray(weights, dtype=np.float64).reshape(-1)
-    if w.shape[0] != n:
-        raise ValueError("weights length mismatch")
-    w = np.clip(w, 0.0, None)
+    A frame is stable when it is reliable, scores within `top_score_delta` of
+    the best score so far and moves no more than the running
+    `stable_vel_quantile` of motion energy (P² estimate). The best run of at
+    least `min_stable_seconds` stable frames (highest median score, then
+    longest) is kept as frames arrive; `finish` returns the frame closest to
+    the `representative_percentile` score of that run, or of the top 7
+    frames when no run is long enough. Thresholds are the running values when
+    each frame arrives.
+    """
 
-    valid = (
-        (w > 0.0)
-        & np.all(np.isfinite(ref_points), axis=1)
-        & np.all(np.isfinite(cur_points), axis=1)
-    )
-    if int(np.count_nonzero(valid)) < 3:
-        return cur_points.copy(), float("inf"), np.eye(3, dtype=np.float32), 1.0, np.zeros(3, dtype=np.float32)
-
-    a = ref_points[valid].astype(np.float64, copy=False)
-    b = cur_points[valid].astype(np.float64, copy=False)
-    wv = w[valid]
-    w_sum = float(np.sum(wv))
-    if w_sum <= 1e-12:
-        return cur_points.copy(), float("inf"), np.eye(3, dtype=np.float32), 1.0, np.zeros(3, dtype=np.float32)
-    wv /= w_sum
-
-    mu_a = np.sum(a * wv[:, None], axis=0)
-    mu_b = np.sum(b * wv[:, None], axis=0)
-
-    xa = a - mu_a
-    xb = b - mu_b
-
-    xbw = xb * np.sqrt(wv[:, None])
-    xaw = xa * np.sqrt(wv[:, None])
-    h = xbw.T @ xaw
-
-    u, svals, vt = np.linalg.svd(h)
-    r = vt.T @ u.T
-    if np.linalg.det(r) < 0:
-        vt[-1, :] *= -1.0
-        r = vt.T @ u.T
-
-    denom = float(np.sum(wv * np.sum(xb * xb, axis=1)))
-    scale = float(np.sum(svals) / max(denom, 1e-12))
-    t = mu_a - scale * (mu_b @ r)
-
-    aligned = scale * (cur_points @ r) + t
-    aligned_valid = scale * (b @ r) + t
-    err_vec = np.linalg.norm(a - aligned_valid, axis=1)
-    err = float(np.sum(wv * err_vec))
-
-    return aligned.astype(np.float32), err, r.astype(np.float32), scale, t.astype(np.float32)
-
-
-def procrustes_align_torch(
-    ref_points: np.ndarray,
-    cur_points: np.ndarray,
-    weights: np.ndarray,
-) -> tuple[np.ndarray, float, np.ndarray, float, np.ndarray]:
-    device = torch.device("cuda")
-
-    a_all = torch.as_tensor(ref_points, dtype=torch.float64, device=device)
-    b_all = torch.as_tensor(cur_points, dtype=torch.float64, device=device)
-    w_all = torch.as_tensor(weights, dtype=torch.float64, device=device)
-
-    valid = (
-        (w_all > 0.0)
-        & torch.isfinite(a_all).all(dim=1)
-        & torch.isfinite(b_all).all(dim=1)
-    )
-    if int(valid.sum().item()) < 3:
-        aligned = b_all.detach().cpu().numpy().astype(np.float32)
-        return aligned, float("inf"), np.eye(3, dtype=np.float32), 1.0, np.zeros(3, dtype=np.float32)
+    TOP_K = 7
 
-    a = a_all[valid]
-    b = b_all[valid]
-    w = torch.clamp(w_all[valid], min=0.0)
+    def __init__(
+        self,
+        *,
+        fps: int,
+        stable_vel_quantile: float = 0.35,
+        top_score_delta: float = 12.0,
+        min_stable_seconds: float = 0.8,
+        representative_percentile: float = 80.0,
+    ) -> None:
+        self.top_score_delta = float(top_score_delta)
+        self.representative_percentile = float(representative_percentile)
+        self.min_len = max(3, int(round(float(min_stable_seconds) * float(max(fps, 1)))))
+        self._vel_quantile = P2Quantile(stable_vel_quantile)
+        self._valid = 0
+        self._s_max = float("-inf")
+        self._top: list[tuple[float, int]] = []
+        self._run_start = 0
+        self._run_scores: list[float] = []
+        self._best: tuple[float, int, int, list[float]] | None = None  # median, start, end, scores
+
+    @property
+    def best_score(self) -> float | None:
+        return self._s_max if self._valid else None
+
+    @property
+    def vel_threshold(self) -> float:
+        return self._vel_quantile.value if self._vel_quantile.count else float("inf")
+
+    @property
+    def score_threshold(self) -> float:
+        return max(0.0, self._s_max - self.top_score_delta)
+
+    def update(self, index: int, score: float | None, reliable: bool, vel: float) -> None:
+        if score is None or not math.isfinite(score) or not reliable:
+            self._close_run()
+            return
 
-    w_sum = w.sum()
-    if float(w_sum.item()) <= 1e-12:
-        aligned = b_all.detach().cpu().numpy().astype(np.float32)
-        return aligned, float("inf"), np.eye(3, dtype=np.float32), 1.0, np.zeros(3, dtype=np.float32)
+        self._valid += 1
+        self._s_max = max(self._s_max, score)
+        heapq.heappush(self._top, (score, index))
+        if len(self._top) > self.TOP_K:
+            heapq.heappop(self._top)
+        vel_ok = math.isfinite(vel)
+        if vel_ok:
+            self._vel_quantile.add(vel)
+
+        if vel_ok and score >= self.score_threshold and vel <= self.vel_threshold:
+            if not self._run_scores:
+                self._run_start = index
+            elif index != self._run_start + len(self._run_scores):
+                self._close_run()
+                self._run_start = index
+            self._run_scores.append(score)
+        else:
+            self._close_run()
 
-    w = w / w_sum
+    def finish(self) -> tuple[int, dict[str, Any]] | None:
+        self._close_run()
+        if self._valid < 3:
+            return None
 
-    mu_a = (a * w[:, None]).sum(dim=0)
-    mu_b = (b * w[:, None]).sum(dim=0)
+        thresholds = {
+            "s_max": self._s_max,
+            "score_thr": self.score_threshold,
+            "vel_thr": self.vel_threshold,
+        }
+        if self._best is None:
+            top = sorted(self._top)
+            top_scores = np.array([score for score, _ in top], dtype=np.float64)
+            target = float(np.percentile(top_scores, self.representative_percentile))
+            pick_score, pick = top[int(np.argmin(np.abs(top_scores - target)))]
+            return pick, {
+                "mode": "fallback_topk",
+                **thresholds,
+                "picked_index": pick,
+                "picked_score": pick_score,
+                "topk": len(top),
+            }
 
-    xa = a - mu_a
-    xb = b - mu_b
+        median, start, end, run_scores = self._best
+        seg_scores = np.array(run_scores, dtype=np.float64)
+        target = float(np.percentile(seg_scores, self.representative_percentile))
+        offset = int(np.argmin(np.abs(seg_scores - target)))
+        return start + offset, {
+            "mode": "stable_segment",
+            "segment_start": start,
+            "segment_end": end,
+            "segment_len": end - start,
+            **thresholds,
+            "representative_percentile": self.representative_percentile,
+            "picked_index": start + offset,
+            "picked_score": float(seg_scores[offset]),
+            "segment_score_median": median,
+            "segment_score_max": float(np.max(seg_scores)),
+        }
 
-    h = (xb * torch.sqrt(w[:, None])).transpose(0, 1) @ (xa * torch.sqrt(w[:, None]))
+    def _close_run(self) -> None:
+        run_scores, self._run_scores = self._run_scores, []
+        if len(run_scores) < self.min_len:
+            return
+        median = float(np.median(run_scores))
+        best = self._best
+        if best is None or median > best[0] or (median == best[0] and len(run_scores) > best[2] - best[1]):
+            self._best = (median, self._run_start, self._run_start + len(run_scores), run_scores)
+
+
+BATCH_COL_FINAL = 0
+BATCH_COL_COORD_SCORE = 1
+BATCH_COL_COORD_ERR = 2
+BATCH_COL_ANGLE_SCORE = 3
+BATCH_COL_ANGLE_ERR = 4
+BATCH_COL_BONE_SCORE = 5
+BATCH_COL_JOINTS = 6
+BATCH_COL_ANGLES = 7
+BATCH_COL_BONES = 8
+BATCH_COL_ANGLE_DIFFS = 9
+BATCH_COL_ANGLE_VALID = BATCH_COL_ANGLE_DIFFS + len(ANGLE_TRIPLETS)
+BATCH_COLS = BATCH_COL_ANGLE_VALID + len(ANGLE_TRIPLETS)
+
+
+def score_sequence_torch(packed: np.ndarray, config: ScoreConfig, *, device: str) -> np.ndarray:
+    """Scores a whole session on one torch device with batched SVD.
+
+    `packed` is (1+T,33,5) float32: row 0 is the reference, rows 1.. are the
+    session frames, columns are [x, y, z, visibility, presence]. Every frame is
+    scored as-is and mirrored, so the result is (2T, BATCH_COLS) with the
+    mirrored rows after the normal ones. Exactly one host->device and one
+    device->host transfer happen, which is what makes CUDA worthwhile for
+    3x3 problems. The same code runs on CPU torch.
+    """
+    torch = load_torch()
+    dev = torch.device(device)
+    data = torch.from_numpy(np.ascontiguousarray(packed, dtype=np.float32)).to(dev).to(torch.float64)
+
+    perm = torch.as_tensor(LEFT_RIGHT_PERMUTATION, device=dev)
+    sel = torch.as_tensor(POSE_SELECTED_INDICES.astype(np.int64), device=dev)
+    ref = data[0]
+    frames = data[1:]
+    mirrored = frames[:, perm].clone()
+    mirrored[:, :, 0] = -mirrored[:, :, 0]
+    cur = torch.cat([frames, mirrored], dim=0)
+    batch = int(cur.shape[0])
+
+    ref_norm = center_and_scale_torch(torch, ref[None, :, 0:3])[0]
+    cur_norm = center_and_scale_torch(torch, cur[:, :, 0:3])
+
+    joint_w = torch.minimum(ref[None, :, 3], cur[:, :, 3]) * torch.minimum(ref[None, :, 4], cur[:, :, 4])
+    joint_w = joint_w.clamp(0.0, 1.0).to(torch.float32).to(torch.float64)
+
+    # Weighted Procrustes over the reliable selected joints, batched over frames.
+    a = ref_norm[sel][None].expand(batch, -1, -1)
+    b = cur_norm[:, sel]
+    w_sel = joint_w[:, sel]
+    reliable = w_sel >= config.conf_threshold
+    matched_joints = reliable.sum(dim=1)
+    usable = reliable & (w_sel > 0.0) & torch.isfinite(a).all(dim=2) & torch.isfinite(b).all(dim=2)
+    w = torch.where(usable, w_sel, torch.zeros_like(w_sel))
+    w_sum = w.sum(dim=1, keepdim=True)
+    ok = (usable.sum(dim=1) >= 3) & (w_sum[:, 0] > 1e-12)
+    wn = w / w_sum.clamp(min=1e-12)
+    a = torch.where(usable[:, :, None], a, torch.zeros_like(a))
+    b = torch.where(usable[:, :, None], b, torch.zeros_like(b))
+
+    mu_a = (a * wn[:, :, None]).sum(dim=1)
+    mu_b = (b * wn[:, :, None]).sum(dim=1)
+    xa = a - mu_a[:, None, :]
+    xb = b - mu_b[:, None, :]
+    h = torch.einsum("bni,bnj->bij", xb * wn[:, :, None], xa)
+    h = torch.where(ok[:, None, None], h, torch.eye(3, dtype=h.dtype, device=dev).expand(batch, 3, 3))
 
     u, svals, vh = torch.linalg.svd(h)
-    r = vh.transpose(0, 1) @ u.transpose(0, 1)
-    if torch.linalg.det(r) < 0:
-        vh[-1, :] *= -1.0
-        r = vh.transpose(0, 1) @ u.transpose(0, 1)
-
-    denom = (w * (xb * xb).sum(dim=1)).sum()
-    scale = svals.sum() / torch.clamp(denom, min=1e-12)
-    t = mu_a - scale * (mu_b @ r)
-
-    aligned_all = scale * (b_all @ r) + t
-    aligned_valid = scale * (b @ r) + t
-
-    err_vec = torch.linalg.norm(a - aligned_valid, dim=1)
-    err = float((w * err_vec).sum().item())
-
-    return (
-        aligned_all.detach().cpu().numpy().astype(np.float32),
-        err,
-        r.detach().cpu().numpy().astype(np.float32),
-        float(scale.item()),
-        t.detach().cpu().numpy().astype(np.float32),
+    rot = vh.transpose(1, 2) @ u.transpose(1, 2)
+    flip = torch.ones((batch, 3, 1), dtype=h.dtype, device=dev)
+    flip[:, 2, 0] = torch.where(torch.linalg.det(rot) < 0, -1.0, 1.0)
+    rot = (vh * flip).transpose(1, 2) @ u.transpose(1, 2)
+
+    denom = (wn * (xb * xb).sum(dim=2)).sum(dim=1)
+    scale = svals.sum(dim=1) / denom.clamp(min=1e-12)
+    trans = mu_a - scale[:, None] * (mu_b[:, None, :] @ rot)[:, 0, :]
+
+    aligned_valid = scale[:, None, None] * (b @ rot) + trans[:, None, :]
+    coord_err = (wn * torch.linalg.norm(a - aligned_valid, dim=2)).sum(dim=1)
+    coord_err = torch.where(ok, coord_err, torch.full_like(coord_err, float("inf")))
+    coord_score = torch.exp(-coord_err / max(config.sigma_coord, 1e-6))
+
+    cur_aligned = scale[:, None, None] * (cur_norm @ rot) + trans[:, None, :]
+
+    # Joint angles.
+    ang_w = angle_weights_torch(torch, joint_w)
+    ref_ang, ref_ang_ok = joint_angles_torch(torch, ref_norm[None])
+    cur_ang, cur_ang_ok = joint_angles_torch(torch, cur_aligned)
+    ang_valid = (ang_w >= config.conf_threshold) & ref_ang_ok & cur_ang_ok
+    diff = (ref_ang - cur_ang).abs()
+    diff = torch.minimum(diff, 360.0 - diff)
+    ang_wv = torch.where(ang_valid, ang_w, torch.zeros_like(ang_w))
+    matched_angles = ang_valid.sum(dim=1)
+    angle_err = (ang_wv * torch.where(ang_valid, diff, torch.zeros_like(diff))).sum(dim=1) / ang_wv.sum(dim=1).clamp(
+        min=1e-12
     )
-
-
-def compute_angle_score(
-    *,
-    ref_points: np.ndarray,
-    cur_points: np.ndarray,
-    joint_weights: np.ndarray,
-    conf_threshold: float,
-    sigma_angle: float,
-) -> tuple[float | None, float | None, int, dict[str, float]]:
-    diffs: list[float] = []
-    ws: list[float] = []
-    angle_map: dict[str, float] = {}
-
-    for name, i0, i1, i2 in ANGLE_TRIPLETS:
-        w = float(min(joint_weights[i0], joint_weights[i1], joint_weights[i2]))
-        if w < conf_threshold:
-            continue
-        ref_angle = angle_deg(ref_points[i0], ref_points[i1], ref_points[i2])
-        cur_angle = angle_deg(cur_points[i0], cur_points[i1], cur_points[i2])
-        if ref_angle is None or cur_angle is None:
-            continue
-        diff = wrapped_angle_diff(ref_angle, cur_angle)
-        diffs.append(diff)
-        ws.append(w)
-        angle_map[name] = float(diff)
-
-    if not diffs:
-        return None, None, 0, angle_map
-
-    w_arr = np.asarray(ws, dtype=np.float64)
-    d_arr = np.asarray(diffs, dtype=np.float64)
-    w_arr /= max(float(np.sum(w_arr)), 1e-12)
-
-    angle_err = float(np.sum(w_arr * d_arr))
-    angle_score = float(np.exp(-angle_err / max(sigma_angle, 1e-6)))
-    return angle_err, angle_score, len(diffs), angle_map
-
-
-def compute_bone_score(
-    *,
-    ref_points: np.ndarray,
-    cur_points: np.ndarray,
-    joint_weights: np.ndarray,
-    conf_threshold: float,
-) -> tuple[float | None, int]:
-    sims: list[float] = []
-    ws: list[float] = []
-
-    for _, i0, i1 in BONE_DEFS:
-        w = float(min(joint_weights[i0], joint_weights[i1]))
-        if w < conf_threshold:
-            continue
-        u_ref = unit_vector(ref_points[i1] - ref_points[i0])
-        u_cur = unit_vector(cur_points[i1] - cur_points[i0])
-        if u_ref is None or u_cur is None:
-            continue
-        cos_sim = float(np.dot(u_ref, u_cur))
-        cos_sim = max(-1.0, min(1.0, cos_sim))
-        sims.append(0.5 * (cos_sim + 1.0))
-        ws.append(w)
-
-    torso_w = float(
-        min(
-            joint_weights[LEFT_SHOULDER],
-            joint_weights[RIGHT_SHOULDER],
-            joint_weights[LEFT_HIP],
-            joint_weights[RIGHT_HIP],
-        )
+    angle_score = torch.exp(-angle_err / max(config.sigma_angle, 1e-6))
+
+    # Bone directions plus the shoulder-mid -> hip-mid torso axis.
+    bone_w = bone_weights_torch(torch, joint_w)
+    ref_vec = bone_vectors_torch(torch, ref_norm[None])
+    cur_vec = bone_vectors_torch(torch, cur_aligned)
+    ref_len = torch.linalg.norm(ref_vec, dim=2)
+    cur_len = torch.linalg.norm(cur_vec, dim=2)
+    bone_valid = (bone_w >= config.conf_threshold) & (ref_len >= 1e-8) & (cur_len >= 1e-8)
+    cos_sim = ((ref_vec / ref_len.clamp(min=1e-8)[:, :, None]) * (cur_vec / cur_len.clamp(min=1e-8)[:, :, None])).sum(
+        dim=2
     )
-    if torso_w >= conf_threshold:
-        ref_sh_mid = 0.5 * (ref_points[LEFT_SHOULDER] + ref_points[RIGHT_SHOULDER])
-        ref_hip_mid = 0.5 * (ref_points[LEFT_HIP] + ref_points[RIGHT_HIP])
-        cur_sh_mid = 0.5 * (cur_points[LEFT_SHOULDER] + cur_points[RIGHT_SHOULDER])
-        cur_hip_mid = 0.5 * (cur_points[LEFT_HIP] + cur_points[RIGHT_HIP])
-
-        u_ref_torso = unit_vector(ref_sh_mid - ref_hip_mid)
-        u_cur_torso = unit_vector(cur_sh_mid - cur_hip_mid)
-        if u_ref_torso is not None and u_cur_torso is not None:
-            cos_t = float(np.dot(u_ref_torso, u_cur_torso))
-            cos_t = max(-1.0, min(1.0, cos_t))
-            sims.append(0.5 * (cos_t + 1.0))
-            ws.append(torso_w)
-
-    if not sims:
-        return None, 0
-
-    w_arr = np.asarray(ws, dtype=np.float64)
-    s_arr = np.asarray(sims, dtype=np.float64)
-    w_arr /= max(float(np.sum(w_arr)), 1e-12)
-    return float(np.sum(w_arr * s_arr)), len(sims)
-
-
-def angle_deg(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> float | None:
-    v1 = a - b
-    v2 = c - b
-    n1 = float(np.linalg.norm(v1))
-    n2 = float(np.linalg.norm(v2))
-    if n1 < 1e-8 or n2 < 1e-8:
-        return None
-    cos_theta = float(np.dot(v1, v2) / (n1 * n2))
-    cos_theta = max(-1.0, min(1.0, cos_theta))
-    return float(np.degrees(np.arccos(cos_theta)))
-
-
-def wrapped_angle_diff(a: float, b: float) -> float:
-    diff = abs(a - b)
-    return min(diff, 360.0 - diff)
-
-
-def unit_vector(v: np.ndarray) -> np.ndarray | None:
-    n = float(np.linalg.norm(v))
-    if n < 1e-8:
-        return None
-    return v / n
+    sims = 0.5 * (cos_sim.clamp(-1.0, 1.0) + 1.0)
+    bone_wv = torch.where(bone_valid, bone_w, torch.zeros_like(bone_w))
+    matched_bones = bone_valid.sum(dim=1)
+    bone_score = (bone_wv * torch.where(bone_valid, sims, torch.zeros_like(sims))).sum(dim=1) / bone_wv.sum(
+        dim=1
+    ).clamp(min=1e-12)
+
+    final = 100.0 * (config.w_coord * coord_score + config.w_angle * angle_score + config.w_bone * bone_score)
+
+    out = torch.empty((batch, BATCH_COLS), dtype=torch.float64, device=dev)
+    out[:, BATCH_COL_FINAL] = final.clamp(0.0, 100.0)
+    out[:, BATCH_COL_COORD_SCORE] = coord_score
+    out[:, BATCH_COL_COORD_ERR] = coord_err
+    out[:, BATCH_COL_ANGLE_SCORE] = angle_score
+    out[:, BATCH_COL_ANGLE_ERR] = angle_err
+    out[:, BATCH_COL_BONE_SCORE] = bone_score
+    out[:, BATCH_COL_JOINTS] = matched_joints.to(torch.float64)
+    out[:, BATCH_COL_ANGLES] = matched_angles.to(torch.float64)
+    out[:, BATCH_COL_BONES] = matched_bones.to(torch.float64)
+    out[:, BATCH_COL_ANGLE_DIFFS:BATCH_COL_ANGLE_VALID] = diff
+    out[:, BATCH_COL_ANGLE_VALID:BATCH_COLS] = ang_valid.to(torch.float64)
+    return out.cpu().numpy()
 
 
 def parse_args() -> ServerConfig:
@@ -1980,11 +2507,12 @@ def parse_args() -> ServerConfig:
 
     parser.add_argument(
         "--camera-mode",
-        choices=["auto", "webcam", "hikvision", "client"],
+        choices=["auto", "webcam", "hikvision", "client", "replay"],
         default="auto",
         help=(
             "auto: use Android client frames if available, otherwise hikvision/webcam. "
-            "webcam: use video-source only, hikvision: use rtsp/ip only, client: Android frames only"
+            "webcam: use video-source only, hikvision: use rtsp/ip only, client: Android frames only, "
+            "replay: play the --record file given as --video-source"
         ),
     )
     parser.add_argument(
@@ -1993,6 +2521,25 @@ def parse_args() -> ServerConfig:
         help="OpenCV source for webcam/file/rtsp. Example: 0, 1, /path/video.mp4",
     )
 
+    parser.add_argument(
+        "--replay-speed",
+        choices=list(REPLAY_SPEEDS),
+        default="original",
+        help="replay mode: original recorded timing, or max (every frame back to back, no --fps pacing)",
+    )
+    parser.add_argument("--replay-loop", action="store_true", help="replay mode: restart the recording when it ends")
+    parser.add_argument(
+        "--record",
+        default=None,
+        help="Append every camera frame with its capture timestamp to this recording file (see --camera-mode replay)",
+    )
+    parser.add_argument(
+        "--record-raw",
+        action="store_true",
+        help="Store recorded frames uncompressed (bit-exact replay) instead of JPEG quality 95",
+    )
+    parser.add_argument("--record-client-frames", action="store_true", help="Also record client_frame uploads")
+
     parser.add_argument("--hikvision-rtsp", default=None, help="Full RTSP URL")
     parser.add_argument("--hikvision-ip", default=None, help="Hikvision camera IP")
     parser.add_argument("--hikvision-password", default="aa123456")
@@ -2014,13 +2561,120 @@ def parse_args() -> ServerConfig:
         default="auto",
         help="Score calculation device. Pose extraction itself uses MediaPipe CPU path.",
     )
+    parser.add_argument(
+        "--session-selection",
+        choices=["streaming", "offline"],
+        default="streaming",
+        help=(
+            "streaming: smooth, score and pick the representative frame while the session runs (result at the deadline); "
+            "offline: RTS-smooth and batch-score the whole session after the deadline"
+        ),
+    )
+    parser.add_argument(
+        "--sequence-scoring",
+        choices=["auto", "numpy", "torch"],
+        default="auto",
+        help="Post-session scoring path. auto: batched torch on CUDA, per-frame numpy otherwise.",
+    )
     parser.add_argument("--send-landmarks", action="store_true")
+    parser.add_argument(
+        "--max-poses",
+        type=int,
+        default=1,
+        help="Detect up to N people (tasks backend) and track the session subject across frames",
+    )
+    parser.add_argument(
+        "--subject-selection",
+        choices=["largest", "center"],
+        default="largest",
+        help="How to pick the scored person when max-poses > 1. Clients can override with select_subject",
+    )
+    parser.add_argument(
+        "--skip-warmup",
+        action="store_true",
+        help="Do not preload the pose model and run a dummy inference at startup",
+    )
+    parser.add_argument(
+        "--model-pool-size",
+        type=int,
+        default=1,
+        help="Number of warmed-up pose estimators kept ready for new connections",
+    )
+    parser.add_argument(
+        "--pose-model",
+        choices=["auto", *POSE_MODEL_VARIANTS],
+        default="auto",
+        help=(
+            "Pose model variant. auto: start from the backend default and step lite/full/heavy "
+            "and inference resolution to keep detection within the --fps budget"
+        ),
+    )
+    parser.add_argument(
+        "--inference-max-side",
+        type=int,
+        default=0,
+        help="Downscale frames so the longest side is at most N pixels before pose inference (0: native)",
+    )
+
+    parser.add_argument(
+        "--template-dir",
+        default=None,
+        help=(
+            "Directory of compiled template packs (*.tpack). start_session without "
+            "reference_image_base64 uses the pack named template_name"
+        ),
+    )
 
     parser.add_argument("--allow-openai-feedback", action="store_true")
     parser.add_argument("--openai-model", default="gpt-4o-mini")
     parser.add_argument("--openai-timeout-sec", type=float, default=45.0)
+    parser.add_argument(
+        "--openai-base-url",
+        default=os.environ.get("OPENAI_BASE_URL", DEFAULT_OPENAI_BASE_URL),
+        help="Chat completions API base URL (env OPENAI_BASE_URL), e.g. a local mock or proxy",
+    )
+    parser.add_argument(
+        "--openai-max-connections",
+        type=int,
+        default=4,
+        help="Concurrent feedback requests; connections are kept alive and reused",
+    )
+    parser.add_argument(
+        "--feedback-cache-size",
+        type=int,
+        default=128,
+        help="Remote feedback answers kept for near-identical attempts (0: no cache)",
+    )
+    parser.add_argument(
+        "--feedback-image-max-side",
+        type=int,
+        default=512,
+        help="Crop feedback images to the person and downscale to at most N pixels before upload (0: crop only)",
+    )
+    parser.add_argument(
+        "--post-workers",
+        type=int,
+        default=2,
+        help="Threads for post-session processing, shared by all clients",
+    )
+    parser.add_argument(
+        "--post-max-jobs",
+        type=int,
+        default=8,
+        help="Finished sessions that may wait for post-processing/feedback at once; beyond it, feedback is local only",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=["auto", "orjson", "json"],
+        default="auto",
+        help="JSON encoder for outgoing messages. auto: orjson if installed, otherwise stdlib json",
+    )
 
     args = parser.parse_args()
+    try:
+        JsonLineSerializer(args.json_backend)
+    except RuntimeError as exc:
+        parser.error(str(exc))
 
     return ServerConfig(
         host=args.host,
@@ -2041,6 +2695,27 @@ def parse_args() -> ServerConfig:
         allow_openai_feedback=bool(args.allow_openai_feedback),
         openai_model=str(args.openai_model),
         openai_timeout_sec=max(5.0, float(args.openai_timeout_sec)),
+        openai_base_url=str(args.openai_base_url),
+        openai_max_connections=max(1, min(32, int(args.openai_max_connections))),
+        feedback_cache_size=max(0, int(args.feedback_cache_size)),
+        feedback_image_max_side=max(0, int(args.feedback_image_max_side)),
+        json_backend=args.json_backend,
+        max_poses=max(1, min(8, int(args.max_poses))),
+        subject_selection=args.subject_selection,
+        warmup=not bool(args.skip_warmup),
+        model_pool_size=max(1, min(8, int(args.model_pool_size))),
+        pose_model=args.pose_model,
+        inference_max_side=max(0, int(args.inference_max_side)),
+        sequence_scoring=args.sequence_scoring,
+        session_selection=args.session_selection,
+        post_workers=max(1, min(16, int(args.post_workers))),
+        post_max_jobs=max(1, int(args.post_max_jobs)),
+        template_dir=args.template_dir,
+        replay_speed=args.replay_speed,
+        replay_loop=bool(args.replay_loop),
+        record_path=args.record,
+        record_raw=bool(args.record_raw),
+        record_client_frames=bool(args.record_client_frames),
     )
 
 
@@ -2052,9 +2727,65 @@ def setup_logging() -> None:
 
 
 async def run_server(config: ServerConfig) -> None:
+    estimator_pool = PoseEstimatorPool(
+        prefer_world_landmarks=config.prefer_world_landmarks,
+        max_poses=config.max_poses,
+        subject_selection=config.subject_selection,
+        size=config.model_pool_size,
+        default_variant=None if config.pose_model == "auto" else config.pose_model,
+    )
+    templates = TemplateLibrary(config.template_dir) if config.template_dir else None
+    session_numbers = itertools.count(1)
+
+    def _open_recorder() -> FrameRecorder | None:
+        """One recording per client session: `--record` itself, then `<stem>.2<suffix>`, ..."""
+        if not config.record_path:
+            return None
+        number = next(session_numbers)
+        path = Path(config.record_path)
+        if number > 1:
+            path = path.with_name(f"{path.stem}.{number}{path.suffix}")
+        return FrameRecorder(path, raw=config.record_raw, client_frames=config.record_client_frames)
+
+    jobs = BackgroundJobs(workers=config.post_workers, max_jobs=config.post_max_jobs)
+    feedback_generator = FeedbackGenerator(
+        enabled=config.allow_openai_feedback,
+        model=config.openai_model,
+        timeout_sec=config.openai_timeout_sec,
+        base_url=config.openai_base_url,
+        max_connections=config.openai_max_connections,
+        cache_size=config.feedback_cache_size,
+        image_max_side=config.feedback_image_max_side,
+    )
+    runtime = await asyncio.to_thread(RuntimeSupport.probe, config.scoring_device)
+    LOGGER.info(
+        "runtime: scoring_device=%s cuda=%s mediapipe=%s",
+        runtime.scoring_device,
+        runtime.cuda_available,
+        runtime.mediapipe_available,
+    )
+    warmup_task: asyncio.Task[None] | None = None
+    if config.warmup:
+        warmup_task = asyncio.create_task(asyncio.to_thread(estimator_pool.warm_up))
+
     async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
-        session = ClientSession(reader=reader, writer=writer, config=config)
-        await session.run()
+        recorder = _open_recorder()
+        try:
+            session = ClientSession(
+                reader=reader,
+                writer=writer,
+                config=config,
+                estimator_pool=estimator_pool,
+                jobs=jobs,
+                feedback_generator=feedback_generator,
+                runtime=runtime,
+                templates=templates,
+                recorder=recorder,
+            )
+            await session.run()
+        finally:
+            if recorder is not None:
+                recorder.close()
 
     server = await asyncio.start_server(
         _handle,
@@ -2066,8 +2797,15 @@ async def run_server(config: ServerConfig) -> None:
     for sock in sockets:
         LOGGER.info("listening on %s", sock.getsockname())
 
-    async with server:
-        await server.serve_forever()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if warmup_task is not None and not warmup_task.done():
+            warmup_task.cancel()
+        await jobs.close()
+        await feedback_generator.close()
+        estimator_pool.close()
 
 
 def main() -> None:
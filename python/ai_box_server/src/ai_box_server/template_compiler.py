@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from pathlib import Path
+from typing import Any
+
+import cv2
+import numpy as np
+
+from .kinematics import (
+    ANGLE_TRIPLETS,
+    BONE_DEFS,
+    POSE_SELECTED_INDICES,
+    ScoreConfig,
+    bone_unit_vectors_batch,
+    center_and_scale_batch,
+    joint_angles_batch,
+    motion_energy_batch,
+    rts_smooth_points,
+)
+from .optional_deps import load_pyarrow_parquet
+from .template_pack import COORDINATE_SPACE_IMAGE, PACK_SUFFIX, write_template_pack
+
+LOGGER = logging.getLogger("ai_box_template")
+
+DEFAULT_FPS = 30.0
+REFERENCE_IMAGE_MAX_SIDE = 720
+KEY_FRAME_WINDOW_SEC = 0.5
+
+# make-skeleton `.npy` landmark records (see make_skeleton.landmarks_io.FRAME_DTYPE).
+SKELETON_FRAME_DTYPE = np.dtype(
+    [
+        ("frame_index", "<i8"),
+        ("timestamp_ms", "<f8"),
+        ("landmarks", "<f4", (33, 4)),
+    ]
+)
+
+
+def load_skeleton_landmarks(path: Path) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Reads make-skeleton `--landmarks-out` (.npy/.npz/.parquet) or `--landmarks-csv` output.
+
+    Returns `(frame_index, timestamp_ms, landmarks)` with landmarks (N,33,4)
+    `[x, y, z, visibility]`; timestamps are NaN for CSV input.
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".npy":
+        records = np.load(path, mmap_mode="r")
+        if records.dtype != SKELETON_FRAME_DTYPE:
+            raise ValueError(f"not a make-skeleton landmark npy: {path} ({records.dtype})")
+        return (
+            np.asarray(records["frame_index"], dtype=np.int64),
+            np.asarray(records["timestamp_ms"], dtype=np.float64),
+            np.asarray(records["landmarks"], dtype=np.float32),
+        )
+    if suffix == ".npz":
+        with np.load(path) as data:
+            return (
+                data["frame_index"].astype(np.int64),
+                data["timestamp_ms"].astype(np.float64),
+                data["landmarks"].astype(np.float32),
+            )
+    if suffix == ".parquet":
+        pq = load_pyarrow_parquet()
+        if pq is None:
+            raise RuntimeError(f"reading {path} requires pyarrow (pip install -e .[parquet])")
+        table = pq.read_table(str(path))
+        flat = table.column("landmarks").combine_chunks().flatten().to_numpy(zero_copy_only=False)
+        return (
+            table.column("frame_index").to_numpy().astype(np.int64),
+            table.column("timestamp_ms").to_numpy().astype(np.float64),
+            flat.astype(np.float32).reshape(-1, 33, 4),
+        )
+    if suffix == ".csv":
+        rows = np.loadtxt(path, delimiter=",", skiprows=1, dtype=np.float64, ndmin=2)
+        rows = rows.reshape(-1, 33, 6)
+        return (
+            rows[:, 0, 0].astype(np.int64),
+            np.full(rows.shape[0], np.nan),
+            rows[:, :, 2:].astype(np.float32),
+        )
+    raise ValueError(f"unsupported landmark file (expected .npy/.npz/.parquet/.csv): {path}")
+
+
+def infer_fps(frame_index: np.ndarray, timestamp_ms: np.ndarray) -> float:
+    """Median frame rate implied by the decoder timestamps, DEFAULT_FPS when unknown."""
+    finite = np.isfinite(timestamp_ms)
+    if int(np.count_nonzero(finite)) < 2:
+        return DEFAULT_FPS
+    frames = frame_index[finite].astype(np.float64)
+    stamps = timestamp_ms[finite]
+    d_frames = np.diff(frames)
+    d_ms = np.diff(stamps)
+    ok = (d_frames > 0) & (d_ms > 0)
+    if not np.any(ok):
+        return DEFAULT_FPS
+    ms_per_frame = float(np.median(d_ms[ok] / d_frames[ok]))
+    return round(1000.0 / ms_per_frame, 3) if ms_per_frame > 0 else DEFAULT_FPS
+
+
+def pick_key_frame(
+    normalized: np.ndarray,
+    joint_w: np.ndarray,
+    valid: np.ndarray,
+    *,
+    fps: float,
+    conf_threshold: float,
+    min_valid_joints: int,
+) -> int:
+    """Row of the stillest well-detected pose (lowest motion energy over ~KEY_FRAME_WINDOW_SEC).
+
+    `normalized` is the (T,33,3) `center_and_scale_batch` timeline, `joint_w`
+    (T,33) the joint confidences (zero where `valid` has no pose).
+    """
+    confident = (joint_w[:, POSE_SELECTED_INDICES] >= conf_threshold).sum(axis=1) >= min_valid_joints
+    if not np.any(confident):
+        rows = np.flatnonzero(valid)
+        return int(rows[0]) if rows.size else 0
+
+    vel = motion_energy_batch(normalized, joint_w, conf_threshold=conf_threshold)
+    # mode="same" returns the longer of its inputs: keep the kernel within the timeline.
+    window = max(1, min(len(vel), int(round(KEY_FRAME_WINDOW_SEC * fps))))
+    kernel = np.ones(window, dtype=np.float64)
+    finite = np.isfinite(vel)
+    sums = np.convolve(np.where(finite, vel, 0.0), kernel, mode="same")
+    counts = np.convolve(finite.astype(np.float64), kernel, mode="same")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        local = sums / counts
+    local = np.where(confident & (counts > 0), local, np.inf)
+    if not np.isfinite(local).any():
+        return int(np.flatnonzero(confident)[0])
+    return int(np.argmin(local))
+
+
+def read_reference_jpeg(video_path: Path, frame_index: int, *, jpeg_quality: int) -> np.ndarray:
+    """JPEG bytes of the 1-based `frame_index` of the source video, long side <= REFERENCE_IMAGE_MAX_SIDE."""
+    capture = cv2.VideoCapture(str(video_path))
+    try:
+        if not capture.isOpened():
+            raise RuntimeError(f"cannot open video: {video_path}")
+        capture.set(cv2.CAP_PROP_POS_FRAMES, max(0, frame_index - 1))
+        ok, frame = capture.read()
+    finally:
+        capture.release()
+    if not ok or frame is None:
+        raise RuntimeError(f"cannot read frame {frame_index} of {video_path}")
+
+    height, width = frame.shape[:2]
+    scale = REFERENCE_IMAGE_MAX_SIDE / float(max(height, width))
+    if scale < 1.0:
+        frame = cv2.resize(frame, (int(round(width * scale)), int(round(height * scale))), interpolation=cv2.INTER_AREA)
+    ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)])
+    if not ok:
+        raise RuntimeError(f"cannot encode frame {frame_index} of {video_path}")
+    return np.frombuffer(data.tobytes(), dtype=np.uint8)
+
+
+def compile_template(
+    landmarks_path: Path,
+    output_path: Path,
+    *,
+    name: str | None = None,
+    fps: float | None = None,
+    video_path: Path | None = None,
+    key_frame: int | None = None,
+    jpeg_quality: int = 85,
+    bpm: float | None = None,
+) -> dict[str, Any]:
+    """Builds a `.tpack` from make-skeleton landmarks and returns its metadata."""
+    frame_index, timestamp_ms, landmarks = load_skeleton_landmarks(landmarks_path)
+    if frame_index.shape[0] == 0:
+        raise ValueError(f"no poses in {landmarks_path}")
+    order = np.argsort(frame_index, kind="stable")
+    frame_index, timestamp_ms, landmarks = frame_index[order], timestamp_ms[order], landmarks[order]
+
+    fps = float(fps) if fps else infer_fps(frame_index, timestamp_ms)
+    first_frame = int(frame_index[0])
+    total = int(frame_index[-1]) - first_frame + 1
+    rows = frame_index - first_frame
+
+    # Dense timeline: one row per source frame, undetected frames stay empty.
+    points = np.full((total, 33, 3), np.nan, dtype=np.float32)
+    vis = np.zeros((total, 33), dtype=np.float32)
+    pres = np.zeros((total, 33), dtype=np.float32)
+    valid = np.zeros(total, dtype=bool)
+    points[rows] = landmarks[:, :, :3]
+    vis[rows] = np.clip(landmarks[:, :, 3], 0.0, 1.0)
+    pres[rows] = 1.0
+    valid[rows] = True
+    joint_w = np.minimum(vis, pres)
+
+    score_config = ScoreConfig()
+    fps_int = max(1, int(round(fps)))
+    points = rts_smooth_points(
+        points,
+        joint_w,
+        fps=fps_int,
+        min_conf=score_config.conf_threshold,
+        r_base=1e-4,
+        accel_var=3.0,
+        reset_gap_frames=max(2, int(0.5 * fps_int)),
+    )
+    points[~valid] = np.nan
+
+    normalized = center_and_scale_batch(points)
+    if key_frame is None:
+        key_row = pick_key_frame(
+            normalized,
+            joint_w,
+            valid,
+            fps=fps,
+            conf_threshold=score_config.conf_threshold,
+            min_valid_joints=score_config.min_valid_joints,
+        )
+    else:
+        key_row = int(key_frame) - first_frame
+        if not 0 <= key_row < total or not valid[key_row]:
+            raise ValueError(f"--key-frame {key_frame} has no detected pose")
+
+    reference_jpeg = np.zeros(0, dtype=np.uint8)
+    if video_path is not None:
+        reference_jpeg = read_reference_jpeg(video_path, first_frame + key_row, jpeg_quality=jpeg_quality)
+
+    meta: dict[str, Any] = {
+        "name": name or output_path.stem,
+        "fps": fps,
+        "key_frame": key_row,
+        "first_frame": first_frame,
+        "coordinate_space": COORDINATE_SPACE_IMAGE,
+        "source": str(landmarks_path),
+        "video": str(video_path) if video_path is not None else None,
+        "angle_names": [triplet[0] for triplet in ANGLE_TRIPLETS],
+        "bone_names": [bone[0] for bone in BONE_DEFS] + ["torso"],
+        "smoothing": {"method": "rts", "r_base": 1e-4, "accel_var": 3.0},
+        "beat_ms": 60000.0 / bpm if bpm else None,
+        "created_at": time.time(),
+    }
+    write_template_pack(
+        output_path,
+        meta,
+        {
+            "points": points,
+            "vis": vis,
+            "pres": pres,
+            "valid": valid,
+            "normalized": normalized,
+            "angles": joint_angles_batch(normalized),
+            "bones": bone_unit_vectors_batch(normalized),
+            "frame_index": np.arange(first_frame, first_frame + total, dtype=np.int64),
+            "timestamps_ms": (np.arange(total, dtype=np.float64) * (1000.0 / fps)).astype(np.float32),
+            "reference_jpeg": reference_jpeg,
+        },
+    )
+    return meta
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compile make-skeleton landmarks into a scoring template pack")
+    parser.add_argument("landmarks", type=Path, help="make-skeleton landmark file (.npy/.npz/.parquet/.csv)")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help=f"Output pack path (default: <landmarks>{PACK_SUFFIX}). The file stem is the template name",
+    )
+    parser.add_argument("--name", default=None, help="Template name stored in the pack (default: output stem)")
+    parser.add_argument("--fps", type=float, default=0.0, help="Reference frame rate (default: from timestamps, else 30)")
+    parser.add_argument("--video", type=Path, default=None, help="Source video; embeds the key frame as the reference image")
+    parser.add_argument("--key-frame", type=int, default=None, help="1-based source frame used as the still reference pose")
+    parser.add_argument("--bpm", type=float, default=0.0, help="Music tempo; live dance scoring reports one window per beat")
+    parser.add_argument("--jpeg-quality", type=int, default=85)
+    return parser.parse_args()
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s %(message)s",
+    )
+    args = parse_args()
+    landmarks_path = args.landmarks.expanduser()
+    output_path = (args.output or landmarks_path.with_suffix(PACK_SUFFIX)).expanduser()
+    started = time.perf_counter()
+    meta = compile_template(
+        landmarks_path,
+        output_path,
+        name=args.name,
+        fps=args.fps or None,
+        video_path=args.video.expanduser() if args.video else None,
+        key_frame=args.key_frame,
+        jpeg_quality=max(10, min(95, int(args.jpeg_quality))),
+        bpm=args.bpm if args.bpm > 0 else None,
+    )
+    LOGGER.info(
+        "compiled %s -> %s (fps=%.2f key_frame=%d) in %.2fs",
+        landmarks_path,
+        output_path,
+        meta["fps"],
+        meta["key_frame"],
+        time.perf_counter() - started,
+    )
+
+
+if __name__ == "__main__":
+    main()
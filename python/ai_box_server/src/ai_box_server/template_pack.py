@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+LOGGER = logging.getLogger("ai_box_server")
+
+PACK_MAGIC = b"AIBXTPK1"
+PACK_VERSION = 1
+PACK_SUFFIX = ".tpack"
+# Coordinate space of `points`. make-skeleton writes image-normalized x/y, and
+# packs without the header field predate it, so "image" is the default.
+COORDINATE_SPACE_IMAGE = "image"
+COORDINATE_SPACE_WORLD = "world"
+_ALIGN = 64
+
+# Arrays every pack carries; `reference_jpeg` may be empty.
+PACK_ARRAYS = (
+    "points",
+    "vis",
+    "pres",
+    "valid",
+    "normalized",
+    "angles",
+    "bones",
+    "frame_index",
+    "timestamps_ms",
+    "reference_jpeg",
+)
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+@dataclass(frozen=True)
+class TemplatePack:
+    """Scoring-ready reference sequence compiled from make-skeleton output.
+
+    Row t is one frame of the reference timeline (uniform steps of 1/fps):
+    - points (T,33,3): RTS-smoothed landmarks in `coordinate_space` (image for make-skeleton output)
+    - vis / pres (T,33): landmark confidences, 0 on rows without a pose
+    - valid (T,): the source had a detected pose on this frame
+    - normalized (T,33,3): `center_and_scale(points[t])`
+    - angles (T,K): joint angles in degrees for ANGLE_TRIPLETS (NaN: undefined)
+    - bones (T,B+1,3): unit vectors of BONE_DEFS plus the hip->shoulder torso (NaN: undefined)
+    - frame_index (T,): 1-based source video frame, timestamps_ms (T,): time from the first row
+
+    Arrays loaded with `load_template_pack(mmap=True)` are read-only views
+    of the file.
+    """
+
+    meta: dict[str, Any]
+    points: np.ndarray
+    vis: np.ndarray
+    pres: np.ndarray
+    valid: np.ndarray
+    normalized: np.ndarray
+    angles: np.ndarray
+    bones: np.ndarray
+    frame_index: np.ndarray
+    timestamps_ms: np.ndarray
+    reference_jpeg: np.ndarray
+    path: Path | None = None
+
+    def __len__(self) -> int:
+        return int(self.points.shape[0])
+
+    @property
+    def name(self) -> str:
+        return str(self.meta.get("name", ""))
+
+    @property
+    def fps(self) -> float:
+        return float(self.meta.get("fps", 30.0))
+
+    @property
+    def coordinate_space(self) -> str:
+        return str(self.meta.get("coordinate_space", COORDINATE_SPACE_IMAGE))
+
+    @property
+    def key_frame(self) -> int:
+        """Row of the most stable pose, used as the single reference of stand-hold sessions."""
+        return int(self.meta.get("key_frame", 0))
+
+    @property
+    def duration_ms(self) -> float:
+        return float(self.timestamps_ms[-1]) if len(self) else 0.0
+
+    def row_at(self, t_ms: float) -> int:
+        """Timeline row shown at `t_ms` from the start of the reference."""
+        if not len(self):
+            raise IndexError("empty template pack")
+        row = int(np.searchsorted(self.timestamps_ms, t_ms, side="right")) - 1
+        return max(0, min(len(self) - 1, row))
+
+    def reference_image_base64(self) -> str:
+        if self.reference_jpeg.size == 0:
+            return ""
+        return base64.b64encode(self.reference_jpeg.tobytes()).decode("ascii")
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "frames": len(self),
+            "fps": self.fps,
+            "duration_ms": int(round(self.duration_ms)),
+            "key_frame": self.key_frame,
+            "coordinate_space": self.coordinate_space,
+            "has_reference_image": bool(self.reference_jpeg.size),
+        }
+
+
+def write_template_pack(path: Path, meta: dict[str, Any], arrays: dict[str, np.ndarray]) -> None:
+    """Writes `<magic><u32 header length><json header>` followed by 64-byte aligned raw arrays."""
+    missing = [name for name in PACK_ARRAYS if name not in arrays]
+    if missing:
+        raise ValueError(f"template pack arrays missing: {missing}")
+
+    specs: dict[str, dict[str, Any]] = {}
+    blobs: list[tuple[int, bytes]] = []
+    offset = 0
+    for name in PACK_ARRAYS:
+        array = np.ascontiguousarray(arrays[name])
+        if array.dtype.byteorder == ">":
+            array = array.astype(array.dtype.newbyteorder("<"))
+        offset = _align(offset)
+        specs[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        blobs.append((offset, array.tobytes()))
+        offset += array.nbytes
+
+    header = json.dumps(
+        {"version": PACK_VERSION, "meta": meta, "arrays": specs},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    data_start = _align(len(PACK_MAGIC) + 4 + len(header))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with tmp_path.open("wb") as dst:
+        dst.write(PACK_MAGIC)
+        dst.write(len(header).to_bytes(4, "little"))
+        dst.write(header)
+        for blob_offset, blob in blobs:
+            dst.seek(data_start + blob_offset)
+            dst.write(blob)
+        dst.truncate(data_start + offset)
+    tmp_path.replace(path)
+
+
+def load_template_pack(path: Path | str, *, mmap: bool = True) -> TemplatePack:
+    path = Path(path).expanduser()
+    raw = np.memmap(path, dtype=np.uint8, mode="r") if mmap else np.fromfile(path, dtype=np.uint8)
+    if raw.shape[0] < len(PACK_MAGIC) + 4 or bytes(raw[: len(PACK_MAGIC)]) != PACK_MAGIC:
+        raise ValueError(f"not a template pack: {path}")
+
+    header_len = int.from_bytes(bytes(raw[len(PACK_MAGIC) : len(PACK_MAGIC) + 4]), "little")
+    header_start = len(PACK_MAGIC) + 4
+    header = json.loads(bytes(raw[header_start : header_start + header_len]).decode("utf-8"))
+    if int(header.get("version", 0)) != PACK_VERSION:
+        raise ValueError(f"unsupported template pack version {header.get('version')}: {path}")
+
+    data_start = _align(header_start + header_len)
+    arrays: dict[str, np.ndarray] = {}
+    for name in PACK_ARRAYS:
+        spec = header["arrays"][name]
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(int(n) for n in spec["shape"])
+        start = data_start + int(spec["offset"])
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        if start + nbytes > raw.shape[0]:
+            raise ValueError(f"truncated template pack: {path}")
+        arrays[name] = raw[start : start + nbytes].view(dtype).reshape(shape)
+
+    frames = arrays["points"].shape[0]
+    for name in PACK_ARRAYS[:-1]:
+        if arrays[name].shape[0] != frames:
+            raise ValueError(f"template pack array {name} has {arrays[name].shape[0]} rows, expected {frames}: {path}")
+    return TemplatePack(meta=dict(header.get("meta", {})), path=path, **arrays)
+
+
+class TemplateLibrary:
+    """Template packs found in a directory, keyed by pack name and loaded (mmap) on first use."""
+
+    def __init__(self, directory: Path | str) -> None:
+        self.directory = Path(directory).expanduser()
+        self._paths: dict[str, Path] = {}
+        self._packs: dict[str, TemplatePack] = {}
+        self._lock = threading.Lock()
+        self.rescan()
+
+    def rescan(self) -> None:
+        paths: dict[str, Path] = {}
+        if self.directory.is_dir():
+            for path in sorted(self.directory.glob(f"*{PACK_SUFFIX}")):
+                paths[path.stem] = path
+        with self._lock:
+            self._paths = paths
+            self._packs = {name: pack for name, pack in self._packs.items() if name in paths}
+        LOGGER.info("template packs in %s: %d", self.directory, len(paths))
+
+    def names(self) -> list[str]:
+        return sorted(self._paths)
+
+    def get(self, name: str) -> TemplatePack | None:
+        with self._lock:
+            pack = self._packs.get(name)
+            path = self._paths.get(name)
+        if pack is not None or path is None:
+            return pack
+        try:
+            pack = load_template_pack(path)
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.warning("failed to load template pack %s: %s", path, exc)
+            return None
+        with self._lock:
+            self._packs[name] = pack
+        return pack
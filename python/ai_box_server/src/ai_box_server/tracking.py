@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+
+# Shoulders and hips. Tracking only needs these four points per detected person,
+# so the per-frame cost stays O(N) in landmark conversion and O(N*M) in matching.
+TORSO_INDICES = (11, 12, 23, 24)
+
+SUBJECT_SELECTIONS = ("largest", "center")
+
+
+@dataclass
+class TrackedPose:
+    track_id: int
+    centroid: np.ndarray  # (2,) normalized image coords
+    size: float
+    missed: int = 0
+    hits: int = 1
+
+
+class SubjectTracker:
+    """Keeps person identities stable across frames and picks the session subject.
+
+    Detections are matched to existing tracks greedily by torso-centroid distance,
+    gated relative to the torso size. The subject is chosen by `selection`
+    ("largest" torso or closest to the image "center") or by an explicit tap,
+    and only switches when its track has been lost for `max_missed` frames.
+    """
+
+    def __init__(
+        self,
+        *,
+        selection: str = "largest",
+        max_missed: int = 15,
+        gate_scale: float = 1.5,
+        min_gate: float = 0.05,
+    ) -> None:
+        if selection not in SUBJECT_SELECTIONS:
+            raise ValueError(f"unknown subject selection: {selection}")
+        self.selection = selection
+        self.max_missed = max(1, int(max_missed))
+        self.gate_scale = float(gate_scale)
+        self.min_gate = float(min_gate)
+        self.subject_id: int | None = None
+        self._tracks: dict[int, TrackedPose] = {}
+        self._next_id = 1
+        self._pending_tap: tuple[float, float] | None = None
+
+    def select_at(self, x: float, y: float) -> None:
+        """Requests the track nearest to a normalized (x, y) tap as the subject."""
+        self._pending_tap = (float(x), float(y))
+
+    def select_track(self, track_id: int) -> bool:
+        if track_id not in self._tracks:
+            return False
+        self.subject_id = int(track_id)
+        return True
+
+    def reset(self) -> None:
+        self._tracks.clear()
+        self.subject_id = None
+        self._pending_tap = None
+
+    def update(self, torsos: np.ndarray) -> int | None:
+        """Matches (N,4,2) torso points of this frame's detections to tracks.
+
+        Returns the detection index that belongs to the subject, or None when the
+        subject is not visible in this frame. Detections with non-finite torso
+        points are ignored: they neither match nor start a track.
+        """
+        torsos = np.asarray(torsos, dtype=np.float32).reshape(-1, len(TORSO_INDICES), 2)
+        centroids = torsos.mean(axis=1)
+        extents = torsos.max(axis=1) - torsos.min(axis=1)
+        sizes = np.linalg.norm(extents, axis=1)
+        finite = np.flatnonzero(np.isfinite(torsos).all(axis=(1, 2)))
+
+        det_to_track = {int(finite[idx]): track_id for idx, track_id in self._assign(centroids[finite]).items()}
+        assigned_tracks = set(det_to_track.values())
+        for track_id in list(self._tracks):
+            if track_id in assigned_tracks:
+                continue
+            track = self._tracks[track_id]
+            track.missed += 1
+            if track.missed > self.max_missed:
+                del self._tracks[track_id]
+
+        for det_idx in map(int, finite):
+            track_id = det_to_track.get(det_idx)
+            if track_id is None:
+                track_id = self._next_id
+                self._next_id += 1
+                self._tracks[track_id] = TrackedPose(
+                    track_id=track_id,
+                    centroid=centroids[det_idx].copy(),
+                    size=float(sizes[det_idx]),
+                )
+                det_to_track[det_idx] = track_id
+                continue
+            track = self._tracks[track_id]
+            track.centroid = centroids[det_idx].copy()
+            track.size = float(sizes[det_idx])
+            track.missed = 0
+            track.hits += 1
+
+        track_to_det = {track_id: det_idx for det_idx, track_id in det_to_track.items()}
+        visible = list(track_to_det)
+
+        if self._pending_tap is not None and visible:
+            tap = np.asarray(self._pending_tap, dtype=np.float32)
+            self._pending_tap = None
+            self.subject_id = min(
+                visible,
+                key=lambda tid: float(np.linalg.norm(self._tracks[tid].centroid - tap)),
+            )
+        elif (self.subject_id is None or self.subject_id not in self._tracks) and visible:
+            self.subject_id = self._pick_by_policy(visible)
+
+        if self.subject_id is None:
+            return None
+        return track_to_det.get(self.subject_id)
+
+    def tracks_summary(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "id": track.track_id,
+                "x": float(track.centroid[0]),
+                "y": float(track.centroid[1]),
+                "size": track.size,
+                "visible": track.missed == 0,
+                "subject": track.track_id == self.subject_id,
+            }
+            for track in self._tracks.values()
+        ]
+
+    def _assign(self, centroids: np.ndarray) -> dict[int, int]:
+        if not self._tracks or centroids.shape[0] == 0:
+            return {}
+
+        track_ids = list(self._tracks)
+        track_centroids = np.stack([self._tracks[tid].centroid for tid in track_ids])
+        gates = np.asarray(
+            [max(self._tracks[tid].size * self.gate_scale, self.min_gate) for tid in track_ids],
+            dtype=np.float32,
+        )
+        dist = np.linalg.norm(centroids[:, None, :] - track_centroids[None, :, :], axis=2)
+
+        out: dict[int, int] = {}
+        used_tracks: set[int] = set()
+        for flat_idx in np.argsort(dist, axis=None):
+            det_idx, col = np.unravel_index(int(flat_idx), dist.shape)
+            det_idx = int(det_idx)
+            col = int(col)
+            if det_idx in out or col in used_tracks:
+                continue
+            if not dist[det_idx, col] <= gates[col]:
+                continue
+            out[det_idx] = track_ids[col]
+            used_tracks.add(col)
+        return out
+
+    def _pick_by_policy(self, candidates: list[int]) -> int:
+        if self.selection == "center":
+            center = np.asarray([0.5, 0.5], dtype=np.float32)
+            return min(candidates, key=lambda tid: float(np.linalg.norm(self._tracks[tid].centroid - center)))
+        return max(candidates, key=lambda tid: self._tracks[tid].size)
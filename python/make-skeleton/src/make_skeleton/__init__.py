@@ -1,5 +1,7 @@
 """Utilities for overlaying MediaPipe pose landmarks on videos."""
 
+from .batch import BatchConfig, run_batch
+from .landmarks_io import LandmarkTrack, load_landmarks
 from .pipeline import RunnerConfig, run_pipeline
 
-__all__ = ["RunnerConfig", "run_pipeline"]
+__all__ = ["BatchConfig", "LandmarkTrack", "RunnerConfig", "load_landmarks", "run_batch", "run_pipeline"]
@@ -5,6 +5,8 @@ import sys
 from pathlib import Path
 from typing import Sequence
 
+from .batch import SKIP_MODES, BatchConfig, run_batch
+from .cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES
 from .pipeline import RunnerConfig, run_pipeline
 
 
@@ -16,12 +18,17 @@ def build_parser() -> argparse.ArgumentParser:
             "스켈레톤/좌표 정보를 원본 영상에 오버레이합니다."
         ),
     )
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--input",
-        required=True,
         type=Path,
         help="입력 영상 파일 경로",
     )
+    source.add_argument(
+        "--input-dir",
+        type=Path,
+        help="폴더 안의 영상을 일괄 처리 (--glob 패턴과 일치하는 파일)",
+    )
     parser.add_argument(
         "--output",
         type=Path,
@@ -34,6 +41,18 @@ def build_parser() -> argparse.ArgumentParser:
         default=None,
         help="프레임별 랜드마크 값을 저장할 CSV 경로 (옵션)",
     )
+    parser.add_argument(
+        "--landmarks-out",
+        type=Path,
+        default=None,
+        help="랜드마크를 열 단위 배열로 저장할 경로 (.npy / .npz / .parquet, 옵션)",
+    )
+    parser.add_argument(
+        "--render-from",
+        type=Path,
+        default=None,
+        help="저장된 랜드마크 파일(.npy / .npz / .parquet / .csv)로 그리기만 수행 (mediapipe 불필요, 옵션)",
+    )
     parser.add_argument(
         "--pose-task-model",
         type=Path,
@@ -65,26 +84,163 @@ def build_parser() -> argparse.ArgumentParser:
         default=None,
         help="처리할 최대 프레임 수 (디버깅용, 옵션)",
     )
+    parser.add_argument(
+        "--no-video",
+        action="store_true",
+        help="랜드마크만 저장 (관절 그리기/영상 인코딩 생략, --landmarks-csv 또는 --landmarks-out 필요)",
+    )
+    parser.add_argument(
+        "--inference-max-side",
+        type=int,
+        default=0,
+        help="추론 전에 프레임의 긴 변을 이 크기로 축소 (0: 원본 해상도, 기본 0)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="영상을 키프레임 기준 구간으로 나눠 병렬 처리할 프로세스 수 (기본 1)",
+    )
+    parser.add_argument(
+        "--chunk-warmup-frames",
+        type=int,
+        default=30,
+        help="병렬 처리 시 구간 시작 전에 추적 안정화용으로 미리 넣는 프레임 수 (기본 30)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="디코딩/추론/인코딩 단계 사이 큐에 쌓아 둘 최대 프레임 수 (기본 8)",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=0,
+        help="N프레임마다 구간 영상/랜드마크를 닫고 체크포인트를 기록 (0: 끔, 기본 0)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="중단된 실행의 체크포인트부터 이어서 처리 (같은 입력/출력/옵션으로 다시 실행)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        help=f"추론 결과(랜드마크) 캐시 사용 및 폴더 지정, 값 없이 주면 {DEFAULT_CACHE_DIR} (기본: 사용 안 함)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+        help="캐시 최대 용량(MB), 넘으면 오래 사용하지 않은 항목부터 삭제 (기본 2048)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="추론 캐시를 읽지도 쓰지도 않음 (--cache-dir보다 우선)",
+    )
+
+    batch = parser.add_argument_group("일괄 처리 (--input-dir)")
+    batch.add_argument(
+        "--glob",
+        default="*.mov",
+        help="처리할 파일 패턴 (기본 *.mov)",
+    )
+    batch.add_argument(
+        "--recursive",
+        action="store_true",
+        help="하위 폴더까지 검색",
+    )
+    batch.add_argument(
+        "--output-dir",
+        type=Path,
+        default=None,
+        help="출력 폴더 (기본값: 입력 파일과 같은 폴더)",
+    )
+    batch.add_argument(
+        "--with-landmarks-csv",
+        action="store_true",
+        help="파일마다 <파일명>_landmarks.csv도 저장",
+    )
+    batch.add_argument(
+        "--landmarks-format",
+        choices=["npy", "npz", "parquet"],
+        default=None,
+        help="파일마다 <파일명>_landmarks.<형식>도 저장",
+    )
+    batch.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="동시에 처리할 파일 수 (워커 프로세스마다 모델을 한 번만 로드, 기본 1)",
+    )
+    batch.add_argument(
+        "--skip",
+        choices=list(SKIP_MODES),
+        default="mtime",
+        help="이미 최신인 출력 건너뛰기 기준: mtime(기본), hash(SHA-256), never",
+    )
+    batch.add_argument(
+        "--manifest",
+        type=Path,
+        default=None,
+        help="처리 결과 manifest 경로 (기본값: <출력폴더 또는 입력폴더>/manifest.json)",
+    )
     return parser
 
 
 def main(argv: Sequence[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
+    if args.render_from is not None and args.input_dir is not None:
+        parser.error("--render-from은 --input과 함께 사용하세요.")
 
     config = RunnerConfig(
-        input_path=args.input,
+        input_path=args.input if args.input is not None else args.input_dir,
         output_path=args.output,
         landmarks_csv_path=args.landmarks_csv,
+        landmarks_out_path=args.landmarks_out,
         pose_task_model_path=args.pose_task_model,
         model_complexity=args.model_complexity,
         min_detection_confidence=args.min_detection_confidence,
         min_tracking_confidence=args.min_tracking_confidence,
         max_frames=args.max_frames,
+        workers=max(1, args.workers),
+        chunk_warmup_frames=max(0, args.chunk_warmup_frames),
+        queue_size=max(1, args.queue_size),
+        no_video=args.no_video,
+        inference_max_side=max(0, args.inference_max_side),
+        checkpoint_every=max(0, args.checkpoint_every),
+        resume=args.resume,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        cache_max_bytes=max(0, args.cache_max_mb) * 1024 * 1024,
+        render_from_path=args.render_from,
     )
 
     try:
-        run_pipeline(config)
+        if args.input_dir is not None:
+            entries = run_batch(
+                config,
+                BatchConfig(
+                    input_dir=args.input_dir,
+                    pattern=args.glob,
+                    recursive=args.recursive,
+                    output_dir=args.output_dir,
+                    write_landmarks_csv=args.with_landmarks_csv,
+                    landmarks_format=args.landmarks_format,
+                    jobs=max(1, args.jobs),
+                    skip_mode=args.skip,
+                    manifest_path=args.manifest,
+                ),
+            )
+            if any(entry.get("status") == "failed" for entry in entries):
+                return 1
+        else:
+            run_pipeline(config)
     except Exception as exc:  # noqa: BLE001
         print(f"[ERROR] {exc}", file=sys.stderr)
         return 1
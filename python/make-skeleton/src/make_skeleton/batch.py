@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .cache import _file_sha256
+from .pipeline import (
+    RunnerConfig,
+    _create_backend,
+    _ensure_dependencies,
+    _resolve_output_path,
+    _settings_fingerprint,
+    run_pipeline,
+)
+
+SKIP_MODES = ("mtime", "hash", "never")
+
+MANIFEST_NAME = "manifest.json"
+
+# Pose backend loaded once per worker process and reused for every file it handles.
+_WORKER_BACKEND: Any | None = None
+
+
+@dataclass(frozen=True)
+class BatchConfig:
+    input_dir: Path
+    pattern: str = "*.mov"
+    recursive: bool = False
+    output_dir: Path | None = None
+    write_landmarks_csv: bool = False
+    landmarks_format: str | None = None  # npy / npz / parquet: also write <stem>_landmarks.<format>
+    jobs: int = 1
+    skip_mode: str = "mtime"
+    manifest_path: Path | None = None
+
+
+@dataclass(frozen=True)
+class _BatchJob:
+    config: RunnerConfig
+    skip_mode: str
+    previous: dict[str, Any] | None
+
+
+def _outputs(config: RunnerConfig) -> list[Path]:
+    paths = [] if config.no_video else [_resolve_output_path(config.input_path, config.output_path)]
+    for path in (config.landmarks_csv_path, config.landmarks_out_path):
+        if path is not None:
+            paths.append(path)
+    return paths
+
+
+def _is_up_to_date(job: _BatchJob, stat: os.stat_result, sha256: str | None) -> bool:
+    if job.skip_mode == "never" or job.previous is None:
+        return False
+    previous = job.previous
+    if previous.get("status") not in {"done", "skipped"}:
+        return False
+    if previous.get("settings") != _settings_fingerprint(job.config):
+        return False
+
+    outputs = _outputs(job.config)
+    if any(not path.exists() or path.stat().st_size == 0 for path in outputs):
+        return False
+
+    if job.skip_mode == "hash":
+        return sha256 is not None and previous.get("sha256") == sha256
+    if previous.get("size") != stat.st_size or previous.get("mtime_ns") != stat.st_mtime_ns:
+        return False
+    return all(path.stat().st_mtime_ns >= stat.st_mtime_ns for path in outputs)
+
+
+def _init_worker() -> None:
+    global _WORKER_BACKEND
+    _WORKER_BACKEND = None
+
+
+def _base_entry(config: RunnerConfig) -> dict[str, Any]:
+    return {
+        "input": str(config.input_path),
+        "output": None if config.no_video else str(_resolve_output_path(config.input_path, config.output_path)),
+        "landmarks_csv": None if config.landmarks_csv_path is None else str(config.landmarks_csv_path),
+        "landmarks_out": None if config.landmarks_out_path is None else str(config.landmarks_out_path),
+        "settings": _settings_fingerprint(config),
+    }
+
+
+def _run_job(job: _BatchJob) -> dict[str, Any]:
+    global _WORKER_BACKEND
+
+    config = job.config
+    started = time.perf_counter()
+    entry = {**_base_entry(config), "worker_pid": os.getpid()}
+    try:
+        stat = config.input_path.stat()
+        sha256 = _file_sha256(config.input_path) if job.skip_mode == "hash" else None
+        entry.update({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256})
+
+        if _is_up_to_date(job, stat, sha256):
+            entry.update(
+                {
+                    "status": "skipped",
+                    "frames": job.previous.get("frames") if job.previous else None,
+                    "seconds": round(time.perf_counter() - started, 3),
+                }
+            )
+            print(f"[INFO] up to date, skipped: {config.input_path}")
+            return entry
+
+        model_started = time.perf_counter()
+        if _WORKER_BACKEND is None:
+            _, mp = _ensure_dependencies()
+            _WORKER_BACKEND = _create_backend(mp=mp, config=config, fps=30.0)
+        model_seconds = time.perf_counter() - model_started
+
+        frames = run_pipeline(config, backend=_WORKER_BACKEND, input_sha256=sha256)
+        seconds = time.perf_counter() - started
+        entry.update(
+            {
+                "status": "done",
+                "frames": frames,
+                "seconds": round(seconds, 3),
+                "model_load_seconds": round(model_seconds, 3),
+                "fps": round(frames / seconds, 2) if seconds > 0 else None,
+            }
+        )
+    except Exception as exc:  # noqa: BLE001
+        entry.update(
+            {
+                "status": "failed",
+                "error": f"{type(exc).__name__}: {exc}",
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        )
+        print(f"[ERROR] {config.input_path}: {exc}")
+    return entry
+
+
+def _load_manifest(path: Path) -> dict[str, dict[str, Any]]:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:  # noqa: BLE001
+        return {}
+    return {str(item.get("input")): item for item in data.get("files", []) if isinstance(item, dict)}
+
+
+def _write_manifest(path: Path, batch: BatchConfig, entries: list[dict[str, Any]], started_at: str) -> None:
+    counts = {status: sum(1 for e in entries if e.get("status") == status) for status in ("done", "skipped", "failed")}
+    manifest = {
+        "started_at": started_at,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "batch": {key: str(value) if isinstance(value, Path) else value for key, value in asdict(batch).items()},
+        "summary": {
+            "files": len(entries),
+            **counts,
+            "frames": sum(int(e.get("frames") or 0) for e in entries if e.get("status") != "failed"),
+            "seconds": round(sum(float(e.get("seconds") or 0.0) for e in entries), 3),
+        },
+        "files": sorted(entries, key=lambda e: str(e.get("input"))),
+    }
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _discover_inputs(batch: BatchConfig) -> list[Path]:
+    input_dir = batch.input_dir.expanduser().resolve()
+    if not input_dir.is_dir():
+        raise FileNotFoundError(f"입력 폴더가 없습니다: {input_dir}")
+    matches = input_dir.rglob(batch.pattern) if batch.recursive else input_dir.glob(batch.pattern)
+    return sorted(path for path in matches if path.is_file() and not path.stem.endswith("_skeleton"))
+
+
+def run_batch(config: RunnerConfig, batch: BatchConfig) -> list[dict[str, Any]]:
+    """Processes every matching file under `batch.input_dir` and writes a manifest.
+
+    `config` provides the per-file runner options; its input/output paths are
+    replaced for each file. Returns the manifest entries of this run.
+    """
+    if batch.skip_mode not in SKIP_MODES:
+        raise ValueError(f"unknown skip mode: {batch.skip_mode}")
+    if config.no_video and not (batch.write_landmarks_csv or batch.landmarks_format):
+        raise ValueError("--no-video 일괄 처리에는 --with-landmarks-csv 또는 --landmarks-format이 필요합니다.")
+
+    inputs = _discover_inputs(batch)
+    if not inputs:
+        raise FileNotFoundError(f"처리할 영상이 없습니다: {batch.input_dir} ({batch.pattern})")
+
+    input_dir = batch.input_dir.expanduser().resolve()
+    output_dir = None if batch.output_dir is None else batch.output_dir.expanduser().resolve()
+    manifest_path = batch.manifest_path
+    if manifest_path is None:
+        manifest_path = (output_dir or input_dir) / MANIFEST_NAME
+    manifest_path = manifest_path.expanduser().resolve()
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    previous = _load_manifest(manifest_path)
+
+    jobs: list[_BatchJob] = []
+    for input_path in inputs:
+        target_dir = input_path.parent
+        if output_dir is not None:
+            target_dir = output_dir / input_path.parent.relative_to(input_dir)
+        file_config = replace(
+            config,
+            input_path=input_path,
+            output_path=target_dir / f"{input_path.stem}_skeleton.mp4",
+            landmarks_csv_path=target_dir / f"{input_path.stem}_landmarks.csv" if batch.write_landmarks_csv else None,
+            landmarks_out_path=(
+                target_dir / f"{input_path.stem}_landmarks.{batch.landmarks_format}" if batch.landmarks_format else None
+            ),
+            workers=1,
+        )
+        jobs.append(_BatchJob(config=file_config, skip_mode=batch.skip_mode, previous=previous.get(str(input_path))))
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    worker_count = max(1, min(int(batch.jobs), len(jobs)))
+    print(f"[INFO] batch: {len(jobs)} files, {worker_count} workers, skip={batch.skip_mode}")
+
+    # Entries of files that are not part of this run are kept in the manifest.
+    entries_by_input = dict(previous)
+    results: list[dict[str, Any]] = []
+
+    def record(entry: dict[str, Any]) -> None:
+        results.append(entry)
+        entries_by_input[entry["input"]] = entry
+        _write_manifest(manifest_path, batch, list(entries_by_input.values()), started_at)
+        print(f"[INFO] batch progress: {len(results)}/{len(jobs)} ({entry['status']}) {entry['input']}")
+
+    if worker_count == 1:
+        _init_worker()
+        try:
+            for job in jobs:
+                record(_run_job(job))
+        finally:
+            _close_worker_backend()
+    else:
+        # spawn: MediaPipe graphs are not fork-safe.
+        with ProcessPoolExecutor(
+            max_workers=worker_count,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        ) as pool:
+            futures = {pool.submit(_run_job, job): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    entry = future.result()
+                except BrokenProcessPool as exc:
+                    # A worker died (e.g. a native crash); this file and every one not yet finished are lost.
+                    job_config = futures[future].config
+                    entry = {**_base_entry(job_config), "status": "failed", "error": f"worker process died: {exc}"}
+                    print(f"[ERROR] {job_config.input_path}: worker process died")
+                record(entry)
+
+    failed = [e for e in results if e.get("status") == "failed"]
+    print(f"[DONE] batch manifest: {manifest_path}")
+    if failed:
+        print(f"[ERROR] {len(failed)} file(s) failed")
+    return results
+
+
+def _close_worker_backend() -> None:
+    global _WORKER_BACKEND
+    if _WORKER_BACKEND is not None:
+        _WORKER_BACKEND.close()
+        _WORKER_BACKEND = None
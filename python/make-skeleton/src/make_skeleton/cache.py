@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .landmarks_io import LandmarkTrack, NpyLandmarkWriter, load_landmarks
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "make-skeleton" / "landmarks"
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Temp files of a run still writing are refreshed at every flush; older ones were left by a killed run.
+STALE_TMP_SEC = 60 * 60
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as src:
+        for block in iter(lambda: src.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def inference_cache_key(input_sha256: str, model: dict[str, Any], params: dict[str, Any]) -> str:
+    """Key of one video analysed with one model and one set of inference parameters."""
+    payload = {"version": CACHE_VERSION, "input_sha256": input_sha256, "model": model, "params": params}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CacheEntryWriter:
+    """Records the landmarks of one run; the entry becomes visible only on `commit`."""
+
+    def __init__(self, cache: LandmarkCache, key: str, meta: dict[str, Any]) -> None:
+        self._cache = cache
+        self._key = key
+        self._meta = meta
+        self._tmp_path = cache.directory / f"{key}.{os.getpid()}.npy.tmp"
+        self._writer = NpyLandmarkWriter(self._tmp_path)
+        self.frames = 0
+
+    def write(self, frame_index: int, timestamp_ms: float, landmarks: Any | None) -> None:
+        self.frames = max(self.frames, frame_index)
+        if landmarks is not None:
+            self._writer.write(frame_index, timestamp_ms, landmarks)
+
+    def commit(self, *, complete: bool) -> None:
+        self._writer.close()
+        meta = {**self._meta, "frames": self.frames, "complete": complete, "created_at": time.time()}
+        data_path, meta_path = self._cache.entry_paths(self._key)
+        os.replace(self._tmp_path, data_path)
+        tmp_meta = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.tmp")
+        tmp_meta.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_meta, meta_path)
+        self._cache.evict(keep=self._key)
+
+    def discard(self) -> None:
+        self._writer.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class LandmarkCache:
+    """Per-frame landmarks of earlier runs, so re-rendering skips pose inference.
+
+    Each entry is `<key>.npy` (the `FRAME_DTYPE` records of the frames with a
+    pose) plus `<key>.json` (how many frames it covers). The json file's mtime
+    is the last use; the least recently used entries are removed once the
+    directory grows past `max_bytes`, and temp files of killed runs are
+    removed after `STALE_TMP_SEC`.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        self.directory = directory.expanduser().resolve()
+        self.max_bytes = max(0, int(max_bytes))
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def entry_paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.npy", self.directory / f"{key}.json"
+
+    def lookup(self, key: str, max_frames: int | None) -> LandmarkTrack | None:
+        """The cached track when it covers the requested frames, else None."""
+        data_path, meta_path = self.entry_paths(key)
+        if not data_path.exists() or not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            covered = meta.get("complete") or (max_frames is not None and max_frames <= int(meta.get("frames", 0)))
+            if not covered:
+                return None
+            track = load_landmarks(data_path)
+        except Exception as exc:  # noqa: BLE001
+            print(f"[INFO] ignoring unreadable cache entry {data_path.name} ({exc})")
+            return None
+        os.utime(meta_path)
+        return track
+
+    def writer(self, key: str, meta: dict[str, Any]) -> CacheEntryWriter:
+        return CacheEntryWriter(self, key, meta)
+
+    def evict(self, *, keep: str | None = None) -> None:
+        entries: list[tuple[float, int, str]] = []
+        total = self._sweep_tmp()
+        for meta_path in self.directory.glob("*.json"):
+            key = meta_path.stem
+            data_path = self.directory / f"{key}.npy"
+            try:
+                size = meta_path.stat().st_size + (data_path.stat().st_size if data_path.exists() else 0)
+                last_used = meta_path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            total += size
+            entries.append((last_used, size, key))
+
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            for path in self.entry_paths(key):
+                path.unlink(missing_ok=True)
+            total -= size
+            print(f"[INFO] evicted cache entry {key[:12]} ({size / (1024 * 1024):.1f} MiB)")
+
+    def _sweep_tmp(self) -> int:
+        """Removes stale `*.tmp` files and returns the size of the ones still being written."""
+        live = 0
+        now = time.time()
+        for tmp_path in self.directory.glob("*.tmp"):
+            try:
+                stat = tmp_path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime < STALE_TMP_SEC:
+                live += stat.st_size
+                continue
+            tmp_path.unlink(missing_ok=True)
+            print(f"[INFO] removed stale cache temp file {tmp_path.name}")
+        return live
+
+
+def cached_landmarks(track: LandmarkTrack, frame_index: int) -> np.ndarray | None:
+    """(33, 4) landmarks of `frame_index` (1-based), or None when no pose was cached."""
+    frames = track.frame_index
+    row = int(np.searchsorted(frames, frame_index))
+    if row < frames.shape[0] and int(frames[row]) == frame_index:
+        return np.asarray(track.landmarks[row])
+    return None
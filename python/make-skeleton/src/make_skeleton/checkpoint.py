@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+CHECKPOINT_NAME = "checkpoint.json"
+CHECKPOINT_VERSION = 1
+
+
+@dataclass
+class SegmentRecord:
+    """One finished segment: frames [start, stop) (0-based) and its part files."""
+
+    index: int
+    start: int
+    stop: int
+    video: str | None  # file name inside the checkpoint folder, None with --no-video
+    landmarks: list[str]  # one part per landmark output, in `landmark_suffixes` order
+    landmark_frames: int  # landmark records in each part (frames with a detected pose)
+    landmark_offset: int  # landmark records written before this segment
+
+
+@dataclass
+class Checkpoint:
+    """Progress of a segmented run, stored as `checkpoint.json` next to the parts.
+
+    Only segments whose files were fully closed are listed, so every recorded
+    segment is a playable mp4 plus complete landmark parts, and a resumed run
+    continues at `next_frame`.
+    """
+
+    input_path: str
+    input_size: int
+    input_mtime_ns: int
+    settings: dict[str, Any]
+    landmark_suffixes: list[str]
+    segment_frames: int
+    segments: list[SegmentRecord] = field(default_factory=list)
+    complete: bool = False
+    version: int = CHECKPOINT_VERSION
+
+    @property
+    def next_frame(self) -> int:
+        return self.segments[-1].stop if self.segments else 0
+
+    @property
+    def frames(self) -> int:
+        return sum(segment.stop - segment.start for segment in self.segments)
+
+    @property
+    def landmark_frames(self) -> int:
+        return sum(segment.landmark_frames for segment in self.segments)
+
+    def matches(self, other: Checkpoint) -> bool:
+        """True when `other` describes the same input file and output settings."""
+        return (
+            self.version == other.version
+            and self.input_path == other.input_path
+            and self.input_size == other.input_size
+            and self.input_mtime_ns == other.input_mtime_ns
+            and self.settings == other.settings
+            and self.landmark_suffixes == other.landmark_suffixes
+        )
+
+
+def checkpoint_dir(output_path: Path) -> Path:
+    return output_path.with_name(f".{output_path.stem}.checkpoint")
+
+
+def new_checkpoint(
+    input_path: Path,
+    *,
+    settings: dict[str, Any],
+    landmark_suffixes: list[str],
+    segment_frames: int,
+) -> Checkpoint:
+    stat = input_path.stat()
+    return Checkpoint(
+        input_path=str(input_path),
+        input_size=stat.st_size,
+        input_mtime_ns=stat.st_mtime_ns,
+        settings=settings,
+        landmark_suffixes=landmark_suffixes,
+        segment_frames=max(1, int(segment_frames)),
+    )
+
+
+def load_checkpoint(directory: Path) -> Checkpoint | None:
+    path = directory / CHECKPOINT_NAME
+    if not path.exists():
+        return None
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        segments = [SegmentRecord(**item) for item in data.pop("segments", [])]
+        checkpoint = Checkpoint(**data, segments=segments)
+    except Exception as exc:  # noqa: BLE001
+        print(f"[INFO] ignoring unreadable checkpoint {path} ({exc})")
+        return None
+
+    # A part that went missing invalidates it and everything after it.
+    for i, segment in enumerate(checkpoint.segments):
+        names = ([segment.video] if segment.video else []) + segment.landmarks
+        if not all((directory / name).exists() for name in names):
+            del checkpoint.segments[i:]
+            checkpoint.complete = False
+            break
+    return checkpoint
+
+
+def save_checkpoint(directory: Path, checkpoint: Checkpoint) -> None:
+    path = directory / CHECKPOINT_NAME
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(asdict(checkpoint), ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def reset_checkpoint_dir(directory: Path) -> None:
+    if directory.exists():
+        shutil.rmtree(directory)
+    directory.mkdir(parents=True)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import csv
+import struct
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+LANDMARK_COUNT = 33
+LANDMARK_FIELDS = ("x", "y", "z", "visibility")
+LANDMARK_FORMATS = ("csv", "npy", "npz", "parquet")
+
+# One record per frame with a detected pose. `.npy` files store exactly this
+# structured dtype, so `np.load(path, mmap_mode="r")` maps them without parsing.
+FRAME_DTYPE = np.dtype(
+    [
+        ("frame_index", "<i8"),
+        ("timestamp_ms", "<f8"),
+        ("landmarks", "<f4", (LANDMARK_COUNT, len(LANDMARK_FIELDS))),
+    ]
+)
+
+DEFAULT_BATCH_FRAMES = 256
+
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_NPY_HEADER_BYTES = 256
+
+
+@dataclass(frozen=True)
+class LandmarkTrack:
+    """Landmarks of the frames where a pose was detected.
+
+    `frame_index` is 1-based like the rendered video, `timestamp_ms` is the
+    decoder position of the frame (NaN when unknown, e.g. CSV input) and
+    `landmarks` is (frames, 33, 4) float32 `[x, y, z, visibility]`.
+    """
+
+    frame_index: np.ndarray
+    timestamp_ms: np.ndarray
+    landmarks: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.frame_index.shape[0])
+
+
+def landmark_format(path: Path) -> str:
+    fmt = path.suffix.lower().lstrip(".")
+    if fmt not in LANDMARK_FORMATS:
+        raise ValueError(f"지원하지 않는 랜드마크 파일 형식입니다: {path} ({', '.join(LANDMARK_FORMATS)})")
+    return fmt
+
+
+def landmarks_to_array(landmarks: Any, out: np.ndarray | None = None) -> np.ndarray:
+    """Converts MediaPipe landmark objects to a (33, 4) float32 array."""
+    if out is None:
+        out = np.empty((LANDMARK_COUNT, len(LANDMARK_FIELDS)), dtype=np.float32)
+    for idx, lm in enumerate(landmarks):
+        out[idx, 0] = lm.x
+        out[idx, 1] = lm.y
+        out[idx, 2] = lm.z
+        out[idx, 3] = float(getattr(lm, "visibility", 0.0))
+    return out
+
+
+class CsvLandmarkWriter:
+    """The original per-landmark CSV rows (`frame_index,landmark_index,x,y,z,visibility`)."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._file = path.open("w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["frame_index", "landmark_index", *LANDMARK_FIELDS])
+
+    def write(self, frame_index: int, timestamp_ms: float, landmarks: Any) -> None:
+        _ = timestamp_ms
+        if isinstance(landmarks, np.ndarray):
+            rows = landmarks.tolist()
+        else:
+            rows = [(lm.x, lm.y, lm.z, float(getattr(lm, "visibility", 0.0))) for lm in landmarks]
+        for idx, (x, y, z, visibility) in enumerate(rows):
+            self._writer.writerow(
+                [
+                    frame_index,
+                    idx,
+                    f"{x:.6f}",
+                    f"{y:.6f}",
+                    f"{z:.6f}",
+                    f"{visibility:.6f}",
+                ]
+            )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _BufferedLandmarkWriter(ABC):
+    """Collects frames into a fixed-size record buffer and flushes it in batches."""
+
+    def __init__(self, path: Path, batch_frames: int) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.frames_written = 0
+        self._buffer = np.zeros(max(1, int(batch_frames)), dtype=FRAME_DTYPE)
+        self._pending = 0
+
+    def write(self, frame_index: int, timestamp_ms: float, landmarks: Any) -> None:
+        row = self._pending
+        self._buffer["frame_index"][row] = frame_index
+        self._buffer["timestamp_ms"][row] = timestamp_ms
+        if isinstance(landmarks, np.ndarray):
+            self._buffer["landmarks"][row] = landmarks
+        else:
+            landmarks_to_array(landmarks, out=self._buffer["landmarks"][row])
+        self._pending += 1
+        if self._pending == self._buffer.shape[0]:
+            self.flush()
+
+    def write_records(self, records: np.ndarray) -> None:
+        self.flush()
+        if records.shape[0]:
+            self._flush_records(np.ascontiguousarray(records, dtype=FRAME_DTYPE))
+            self.frames_written += int(records.shape[0])
+
+    def flush(self) -> None:
+        if self._pending == 0:
+            return
+        self._flush_records(self._buffer[: self._pending])
+        self.frames_written += self._pending
+        self._pending = 0
+
+    @abstractmethod
+    def _flush_records(self, records: np.ndarray) -> None:
+        """Writes a contiguous FRAME_DTYPE batch to the output."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+def _npy_header(count: int) -> bytes:
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(FRAME_DTYPE),
+            "fortran_order": False,
+            "shape": (int(count),),
+        }
+    )
+    body_len = _NPY_HEADER_BYTES - len(_NPY_MAGIC) - 2
+    text = header.encode("latin1")
+    if len(text) + 1 > body_len:
+        raise ValueError("npy header does not fit the reserved size")
+    return _NPY_MAGIC + struct.pack("<H", body_len) + text.ljust(body_len - 1, b" ") + b"\n"
+
+
+class NpyLandmarkWriter(_BufferedLandmarkWriter):
+    """Appends records to a `.npy` file whose fixed-size header is patched on close.
+
+    The header always takes `_NPY_HEADER_BYTES`, so the record count can be
+    rewritten in place without moving the data, and the data stays 64-byte
+    aligned for memory mapping.
+    """
+
+    def __init__(self, path: Path, batch_frames: int = DEFAULT_BATCH_FRAMES) -> None:
+        super().__init__(path, batch_frames)
+        self._file = path.open("wb")
+        self._file.write(_npy_header(0))
+
+    def _flush_records(self, records: np.ndarray) -> None:
+        self._file.write(records.tobytes())
+
+    def close(self) -> None:
+        super().close()
+        self._file.seek(0)
+        self._file.write(_npy_header(self.frames_written))
+        self._file.close()
+
+
+class NpzLandmarkWriter(_BufferedLandmarkWriter):
+    """Keeps flushed batches in memory and stores three arrays in one `.npz` on close."""
+
+    def __init__(self, path: Path, batch_frames: int = DEFAULT_BATCH_FRAMES) -> None:
+        super().__init__(path, batch_frames)
+        self._batches: list[np.ndarray] = []
+
+    def _flush_records(self, records: np.ndarray) -> None:
+        self._batches.append(records.copy())
+
+    def close(self) -> None:
+        super().close()
+        records = np.concatenate(self._batches) if self._batches else np.zeros(0, dtype=FRAME_DTYPE)
+        with self.path.open("wb") as dst:
+            np.savez(
+                dst,
+                frame_index=records["frame_index"],
+                timestamp_ms=records["timestamp_ms"],
+                landmarks=records["landmarks"],
+            )
+
+
+def _load_pyarrow() -> tuple[Any, Any]:
+    try:
+        import pyarrow as pa  # type: ignore
+        import pyarrow.parquet as pq  # type: ignore
+    except Exception as exc:  # noqa: BLE001
+        raise RuntimeError(
+            "Parquet 출력에는 pyarrow가 필요합니다. `pip install -e .[parquet]`로 설치하세요."
+        ) from exc
+    return pa, pq
+
+
+class ParquetLandmarkWriter(_BufferedLandmarkWriter):
+    """Writes one Parquet row group per flushed batch (`landmarks` is a fixed-size float list)."""
+
+    def __init__(self, path: Path, batch_frames: int = DEFAULT_BATCH_FRAMES) -> None:
+        super().__init__(path, batch_frames)
+        self._pa, pq = _load_pyarrow()
+        width = LANDMARK_COUNT * len(LANDMARK_FIELDS)
+        self._schema = self._pa.schema(
+            [
+                ("frame_index", self._pa.int64()),
+                ("timestamp_ms", self._pa.float64()),
+                ("landmarks", self._pa.list_(self._pa.float32(), width)),
+            ],
+            metadata={b"landmark_shape": f"{LANDMARK_COUNT},{len(LANDMARK_FIELDS)}".encode()},
+        )
+        self._writer = pq.ParquetWriter(str(path), self._schema)
+
+    def _flush_records(self, records: np.ndarray) -> None:
+        pa = self._pa
+        flat = np.ascontiguousarray(records["landmarks"]).reshape(-1)
+        width = LANDMARK_COUNT * len(LANDMARK_FIELDS)
+        batch = pa.record_batch(
+            [
+                pa.array(np.ascontiguousarray(records["frame_index"])),
+                pa.array(np.ascontiguousarray(records["timestamp_ms"])),
+                pa.FixedSizeListArray.from_arrays(pa.array(flat), width),
+            ],
+            schema=self._schema,
+        )
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        super().close()
+        self._writer.close()
+
+
+def open_landmark_writer(path: Path, *, batch_frames: int = DEFAULT_BATCH_FRAMES) -> Any:
+    fmt = landmark_format(path)
+    if fmt == "csv":
+        return CsvLandmarkWriter(path)
+    if fmt == "npy":
+        return NpyLandmarkWriter(path, batch_frames)
+    if fmt == "npz":
+        return NpzLandmarkWriter(path, batch_frames)
+    return ParquetLandmarkWriter(path, batch_frames)
+
+
+def load_landmarks(path: Path | str, *, mmap: bool = True) -> LandmarkTrack:
+    """Reads a landmark file written by make-skeleton.
+
+    `.npy` is memory-mapped (`mmap=True`) and the returned arrays are views of
+    the file. Parquet columns are wrapped without copying where pyarrow allows
+    it. `.npz` and `.csv` are read into memory.
+    """
+    path = Path(path).expanduser()
+    fmt = landmark_format(path)
+
+    if fmt == "npy":
+        records = np.load(path, mmap_mode="r" if mmap else None)
+        if records.dtype != FRAME_DTYPE:
+            raise ValueError(f"랜드마크 npy 형식이 아닙니다: {path} ({records.dtype})")
+        return LandmarkTrack(
+            frame_index=records["frame_index"],
+            timestamp_ms=records["timestamp_ms"],
+            landmarks=records["landmarks"],
+        )
+
+    if fmt == "npz":
+        with np.load(path) as data:
+            return LandmarkTrack(
+                frame_index=data["frame_index"],
+                timestamp_ms=data["timestamp_ms"],
+                landmarks=data["landmarks"],
+            )
+
+    if fmt == "parquet":
+        _, pq = _load_pyarrow()
+        table = pq.read_table(str(path), memory_map=mmap)
+        landmarks = table.column("landmarks").combine_chunks().flatten()
+        return LandmarkTrack(
+            frame_index=table.column("frame_index").to_numpy(),
+            timestamp_ms=table.column("timestamp_ms").to_numpy(),
+            landmarks=landmarks.to_numpy(zero_copy_only=False).reshape(-1, LANDMARK_COUNT, len(LANDMARK_FIELDS)),
+        )
+
+    rows = np.loadtxt(path, delimiter=",", skiprows=1, dtype=np.float64, ndmin=2)
+    rows = rows.reshape(-1, LANDMARK_COUNT, 2 + len(LANDMARK_FIELDS))
+    return LandmarkTrack(
+        frame_index=rows[:, 0, 0].astype(np.int64),
+        timestamp_ms=np.full(rows.shape[0], np.nan),
+        landmarks=rows[:, :, 2:].astype(np.float32),
+    )
+
+
+def merge_landmark_files(parts: list[Path], output_path: Path) -> None:
+    """Concatenates landmark files of the same columnar format in the given order."""
+    writer = open_landmark_writer(output_path)
+    try:
+        for part in parts:
+            if not part.exists():
+                continue
+            track = load_landmarks(part)
+            records = np.zeros(len(track), dtype=FRAME_DTYPE)
+            records["frame_index"] = track.frame_index
+            records["timestamp_ms"] = track.timestamp_ms
+            records["landmarks"] = track.landmarks
+            writer.write_records(records)
+    finally:
+        writer.close()
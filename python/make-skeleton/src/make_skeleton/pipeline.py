@@ -1,37 +1,81 @@
 from __future__ import annotations
 
-import csv
+import multiprocessing
+import queue
+import shutil
+import threading
+import time
 import urllib.request
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, TextIO
+from typing import Any
+
+from .cache import (
+    DEFAULT_CACHE_MAX_BYTES,
+    LandmarkCache,
+    _file_sha256,
+    cached_landmarks,
+    inference_cache_key,
+)
+from .checkpoint import (
+    Checkpoint,
+    SegmentRecord,
+    checkpoint_dir,
+    load_checkpoint,
+    new_checkpoint,
+    reset_checkpoint_dir,
+    save_checkpoint,
+)
+from .landmarks_io import LandmarkTrack, landmark_format, load_landmarks, merge_landmark_files, open_landmark_writer
+from .render import _connection_index, _draw_connections, _draw_joint_panel
+from .segments import concat_text_parts, concat_video_segments, plan_chunks, probe_keyframe_indices
 
 DEFAULT_TASK_MODEL_URL = (
     "https://storage.googleapis.com/mediapipe-models/pose_landmarker/"
     "pose_landmarker_full/float16/latest/pose_landmarker_full.task"
 )
 
+DEFAULT_CHECKPOINT_FRAMES = 1800
+
+_QUEUE_END = object()
+
 
 @dataclass(frozen=True)
 class RunnerConfig:
     input_path: Path
     output_path: Path | None = None
     landmarks_csv_path: Path | None = None
+    landmarks_out_path: Path | None = None  # .npy / .npz / .parquet / .csv
     pose_task_model_path: Path | None = None
     model_complexity: int = 1
     min_detection_confidence: float = 0.5
     min_tracking_confidence: float = 0.5
     max_frames: int | None = None
-
-
-def _ensure_dependencies() -> tuple[Any, Any]:
+    workers: int = 1
+    chunk_warmup_frames: int = 30
+    queue_size: int = 8
+    no_video: bool = False  # landmarks only: no drawing, no video encoding
+    inference_max_side: int = 0  # downscale frames to this longest side before inference (0: off)
+    checkpoint_every: int = 0  # frames per checkpointed output segment (0: off)
+    resume: bool = False  # continue from the checkpoint of a previous interrupted run
+    cache_dir: Path | None = None  # landmark inference cache (None: off)
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+    render_from_path: Path | None = None  # draw landmarks from this file instead of running a pose model
+
+
+def _ensure_cv2() -> Any:
     try:
         import cv2  # type: ignore
     except Exception as exc:  # noqa: BLE001
         raise RuntimeError(
             "opencv-python이 설치되어 있지 않습니다. `pip install -e .`로 설치하세요."
         ) from exc
+    return cv2
+
 
+def _ensure_dependencies() -> tuple[Any, Any]:
+    cv2 = _ensure_cv2()
     try:
         import mediapipe as mp  # type: ignore
     except Exception as exc:  # noqa: BLE001
@@ -48,132 +92,30 @@ def _resolve_output_path(input_path: Path, output_path: Path | None) -> Path:
     return input_path.with_name(f"{input_path.stem}_skeleton.mp4")
 
 
-def _draw_joint_panel(
-    cv2: Any,
-    frame: Any,
-    landmarks: Any,
-    pose_landmark: Any,
-    frame_index: int,
-    total_frames: int,
-) -> None:
-    tracked_joints = [
-        ("NOSE", pose_landmark.NOSE.value),
-        ("L_SHOULDER", pose_landmark.LEFT_SHOULDER.value),
-        ("R_SHOULDER", pose_landmark.RIGHT_SHOULDER.value),
-        ("L_ELBOW", pose_landmark.LEFT_ELBOW.value),
-        ("R_ELBOW", pose_landmark.RIGHT_ELBOW.value),
-        ("L_WRIST", pose_landmark.LEFT_WRIST.value),
-        ("R_WRIST", pose_landmark.RIGHT_WRIST.value),
-        ("L_HIP", pose_landmark.LEFT_HIP.value),
-        ("R_HIP", pose_landmark.RIGHT_HIP.value),
-        ("L_KNEE", pose_landmark.LEFT_KNEE.value),
-        ("R_KNEE", pose_landmark.RIGHT_KNEE.value),
-        ("L_ANKLE", pose_landmark.LEFT_ANKLE.value),
-        ("R_ANKLE", pose_landmark.RIGHT_ANKLE.value),
-    ]
-
-    status = f"frame: {frame_index}/{total_frames}" if total_frames else f"frame: {frame_index}"
-    lines = [status]
-
-    h, w = frame.shape[:2]
-    for name, idx in tracked_joints:
-        lm = landmarks[idx]
-        visibility = float(getattr(lm, "visibility", 0.0))
-        lines.append(f"{name:<10} x:{lm.x:>6.3f} y:{lm.y:>6.3f} v:{visibility:>5.2f}")
-
-        px = int(lm.x * w)
-        py = int(lm.y * h)
-        if 0 <= px < w and 0 <= py < h:
-            cv2.circle(frame, (px, py), 4, (0, 255, 255), -1)
-            cv2.putText(
-                frame,
-                name,
-                (px + 6, py - 6),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.35,
-                (0, 255, 255),
-                1,
-                cv2.LINE_AA,
-            )
-
-    panel_x = 12
-    panel_y = 12
-    line_height = 20
-    panel_width = 420
-    panel_height = 14 + (len(lines) * line_height)
-
-    overlay = frame.copy()
-    cv2.rectangle(
-        overlay,
-        (panel_x, panel_y),
-        (panel_x + panel_width, panel_y + panel_height),
-        (0, 0, 0),
-        -1,
-    )
-    cv2.addWeighted(overlay, 0.45, frame, 0.55, 0, frame)
-
-    for i, line in enumerate(lines):
-        text_y = panel_y + 18 + (i * line_height)
-        cv2.putText(
-            frame,
-            line,
-            (panel_x + 8, text_y),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
-            (255, 255, 255),
-            1,
-            cv2.LINE_AA,
-        )
-
-
-def _open_csv_writer(path: Path | None) -> tuple[TextIO | None, csv.writer | None]:
-    if path is None:
-        return None, None
-    path.parent.mkdir(parents=True, exist_ok=True)
-    csv_file = path.open("w", newline="", encoding="utf-8")
-    writer = csv.writer(csv_file)
-    writer.writerow(["frame_index", "landmark_index", "x", "y", "z", "visibility"])
-    return csv_file, writer
-
-
-def _write_landmarks_csv(writer: csv.writer | None, frame_index: int, landmarks: Any) -> None:
-    if writer is None:
-        return
-    for idx, lm in enumerate(landmarks):
-        visibility = float(getattr(lm, "visibility", 0.0))
-        writer.writerow(
-            [
-                frame_index,
-                idx,
-                f"{lm.x:.6f}",
-                f"{lm.y:.6f}",
-                f"{lm.z:.6f}",
-                f"{visibility:.6f}",
-            ]
-        )
-
-
-def _draw_connections(cv2: Any, frame: Any, landmarks: Any, connections: Any) -> None:
-    h, w = frame.shape[:2]
-    for conn in connections:
-        start_idx = int(conn.start)
-        end_idx = int(conn.end)
-        start = landmarks[start_idx]
-        end = landmarks[end_idx]
+def _settings_fingerprint(config: RunnerConfig) -> dict[str, Any]:
+    """Runner options that change the output; a change invalidates up-to-date checks."""
+    return {
+        "pose_task_model_path": None if config.pose_task_model_path is None else str(config.pose_task_model_path),
+        "model_complexity": config.model_complexity,
+        "min_detection_confidence": config.min_detection_confidence,
+        "min_tracking_confidence": config.min_tracking_confidence,
+        "max_frames": config.max_frames,
+        "no_video": config.no_video,
+        "inference_max_side": config.inference_max_side,
+    }
 
-        sx = int(start.x * w)
-        sy = int(start.y * h)
-        ex = int(end.x * w)
-        ey = int(end.y * h)
 
-        if 0 <= sx < w and 0 <= sy < h and 0 <= ex < w and 0 <= ey < h:
-            cv2.line(frame, (sx, sy), (ex, ey), (0, 255, 0), 2, cv2.LINE_AA)
-
-    for lm in landmarks:
-        px = int(lm.x * w)
-        py = int(lm.y * h)
-        if 0 <= px < w and 0 <= py < h:
-            cv2.circle(frame, (px, py), 3, (0, 140, 255), -1)
+def _probe_video(cv2: Any, input_path: Path) -> tuple[int, float]:
+    """(frame count or 0 when unknown, fps) from the container header."""
+    cap = cv2.VideoCapture(str(input_path))
+    if not cap.isOpened():
+        raise RuntimeError(f"영상 파일을 열 수 없습니다: {input_path}")
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+    cap.release()
+    if fps <= 1e-6:
+        fps = 30.0
+    return total_frames, fps
 
 
 def _ensure_pose_task_model(model_path: Path | None) -> Path:
@@ -197,6 +139,22 @@ def _ensure_pose_task_model(model_path: Path | None) -> Path:
     return resolved
 
 
+def _inference_rgb(cv2: Any, frame: Any, max_side: int) -> Any:
+    """BGR frame -> RGB model input, downscaled first when `max_side` is set.
+
+    Landmarks are normalized to the image size, so they stay valid for the
+    full-resolution frame.
+    """
+    if max_side > 0:
+        h, w = frame.shape[:2]
+        longest = max(h, w)
+        if longest > max_side:
+            scale = max_side / float(longest)
+            size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
 class SolutionsPoseBackend:
     def __init__(self, mp: Any, config: RunnerConfig) -> None:
         self._pose_module = mp.solutions.pose
@@ -211,11 +169,18 @@ class SolutionsPoseBackend:
             min_detection_confidence=config.min_detection_confidence,
             min_tracking_confidence=config.min_tracking_confidence,
         )
+        self._inference_max_side = config.inference_max_side
+
+    def detect(self, cv2: Any, frame: Any, frame_index: int) -> Any | None:
+        _ = frame_index
+        results = self._pose.process(_inference_rgb(cv2, frame, self._inference_max_side))
+        if results.pose_landmarks:
+            return results.pose_landmarks.landmark
+        return None
 
     def annotate_frame(self, cv2: Any, frame: Any, frame_index: int) -> tuple[Any, Any | None]:
         _ = frame_index
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self._pose.process(rgb_frame)
+        results = self._pose.process(_inference_rgb(cv2, frame, self._inference_max_side))
         annotated = frame.copy()
         if results.pose_landmarks:
             self._drawing_utils.draw_landmarks(
@@ -227,6 +192,13 @@ class SolutionsPoseBackend:
             return annotated, results.pose_landmarks.landmark
         return annotated, None
 
+    def begin_video(self, fps: float) -> None:
+        """Drops tracking state so the next frame starts a new video with the same model."""
+        _ = fps
+        reset = getattr(self._pose, "reset", None)
+        if callable(reset):
+            reset()
+
     def close(self) -> None:
         self._pose.close()
 
@@ -252,27 +224,95 @@ class TasksPoseBackend:
 
         self._mp = mp
         self._landmarker = vision.PoseLandmarker.create_from_options(options)
-        self._connections = PoseLandmarksConnections.POSE_LANDMARKS
+        self._connections = _connection_index(PoseLandmarksConnections.POSE_LANDMARKS)
         self.pose_landmark_enum = PoseLandmark
         self._timestamp_step_ms = max(1, int(round(1000.0 / fps)))
+        self._timestamp_base_ms = 0
+        self._last_timestamp_ms = 0
+        self._inference_max_side = config.inference_max_side
 
-    def annotate_frame(self, cv2: Any, frame: Any, frame_index: int) -> tuple[Any, Any | None]:
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def detect(self, cv2: Any, frame: Any, frame_index: int) -> Any | None:
+        rgb_frame = _inference_rgb(cv2, frame, self._inference_max_side)
         image = self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=rgb_frame)
-        timestamp_ms = frame_index * self._timestamp_step_ms
+        timestamp_ms = self._timestamp_base_ms + frame_index * self._timestamp_step_ms
+        self._last_timestamp_ms = timestamp_ms
         result = self._landmarker.detect_for_video(image, timestamp_ms)
-        annotated = frame.copy()
-
         if result.pose_landmarks:
-            landmarks = result.pose_landmarks[0]
+            return result.pose_landmarks[0]
+        return None
+
+    def annotate_frame(self, cv2: Any, frame: Any, frame_index: int) -> tuple[Any, Any | None]:
+        landmarks = self.detect(cv2, frame, frame_index)
+        annotated = frame.copy()
+        if landmarks is not None:
             _draw_connections(cv2, annotated, landmarks, self._connections)
-            return annotated, landmarks
-        return annotated, None
+        return annotated, landmarks
+
+    def begin_video(self, fps: float) -> None:
+        """Starts a new video on the loaded landmarker.
+
+        VIDEO mode requires increasing timestamps, so the next video continues
+        after a one second gap instead of restarting at zero.
+        """
+        self._timestamp_step_ms = max(1, int(round(1000.0 / fps)))
+        self._timestamp_base_ms = self._last_timestamp_ms + 1000
 
     def close(self) -> None:
         self._landmarker.close()
 
 
+class StoredLandmarksBackend:
+    """Replays saved landmarks (inference cache, `--render-from`) instead of running a model."""
+
+    pose_landmark_enum = None
+
+    def __init__(self, track: LandmarkTrack) -> None:
+        self._track = track
+
+    def detect(self, cv2: Any, frame: Any, frame_index: int) -> Any | None:
+        _ = cv2, frame
+        return cached_landmarks(self._track, frame_index)
+
+    def annotate_frame(self, cv2: Any, frame: Any, frame_index: int) -> tuple[Any, Any | None]:
+        landmarks = cached_landmarks(self._track, frame_index)
+        annotated = frame.copy()
+        if landmarks is not None:
+            _draw_connections(cv2, annotated, landmarks)
+        return annotated, landmarks
+
+    def begin_video(self, fps: float) -> None:
+        _ = fps
+
+    def close(self) -> None:
+        return None
+
+
+def _model_identity(mp: Any, config: RunnerConfig) -> dict[str, Any]:
+    """The model `_create_backend` loads for `config`, as part of the inference cache key."""
+    identity: dict[str, Any] = {"mediapipe": str(getattr(mp, "__version__", "unknown"))}
+    if hasattr(mp, "solutions") and hasattr(mp.solutions, "pose"):
+        identity["backend"] = "solutions"
+        return identity
+    model_path = _ensure_pose_task_model(config.pose_task_model_path)
+    stat = model_path.stat()
+    identity.update(
+        backend="tasks",
+        model_path=str(model_path),
+        model_size=stat.st_size,
+        model_mtime_ns=stat.st_mtime_ns,
+    )
+    return identity
+
+
+def _inference_params(config: RunnerConfig) -> dict[str, Any]:
+    return {
+        "model_complexity": config.model_complexity,
+        "min_detection_confidence": config.min_detection_confidence,
+        "min_tracking_confidence": config.min_tracking_confidence,
+        "inference_max_side": config.inference_max_side,
+    }
+
+
 def _create_backend(mp: Any, config: RunnerConfig, fps: float) -> Any:
     if hasattr(mp, "solutions") and hasattr(mp.solutions, "pose"):
         print("[INFO] backend: mediapipe.solutions.pose")
@@ -281,9 +321,24 @@ def _create_backend(mp: Any, config: RunnerConfig, fps: float) -> Any:
     return TasksPoseBackend(mp=mp, config=config, fps=fps)
 
 
-def run_pipeline(config: RunnerConfig) -> None:
-    cv2, mp = _ensure_dependencies()
+@dataclass(frozen=True)
+class _FrameRange:
+    start: int  # first frame index (0-based) written to the outputs
+    stop: int | None  # exclusive, None: until the end of the video
+    warmup_start: int  # first frame fed to the model; frames before `start` only warm up tracking
+
 
+@dataclass(frozen=True)
+class _ChunkJob:
+    config: RunnerConfig
+    input_path: Path
+    output_path: Path
+    landmark_paths: tuple[Path, ...]
+    frame_range: _FrameRange
+    label: str
+
+
+def _resolve_paths(config: RunnerConfig) -> tuple[Path, Path, list[Path]]:
     input_path = config.input_path.expanduser().resolve()
     if not input_path.exists():
         raise FileNotFoundError(f"입력 영상 파일이 없습니다: {input_path}")
@@ -292,44 +347,344 @@ def run_pipeline(config: RunnerConfig) -> None:
     output_path = output_path.expanduser().resolve()
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    csv_path = config.landmarks_csv_path
-    if csv_path is not None:
-        csv_path = csv_path.expanduser().resolve()
+    landmark_paths = [
+        path.expanduser().resolve()
+        for path in (config.landmarks_csv_path, config.landmarks_out_path)
+        if path is not None
+    ]
+    for path in landmark_paths:
+        landmark_format(path)
+    if config.render_from_path is not None:
+        render_from = config.render_from_path.expanduser().resolve()
+        if not render_from.exists():
+            raise FileNotFoundError(f"랜드마크 파일이 없습니다: {render_from}")
+        landmark_format(render_from)
+        if render_from in landmark_paths:
+            raise ValueError(f"--render-from 파일을 랜드마크 출력 경로로 다시 쓸 수 없습니다: {render_from}")
+    if config.no_video and not landmark_paths:
+        raise ValueError("--no-video에는 --landmarks-csv 또는 --landmarks-out 경로가 필요합니다.")
+    return input_path, output_path, landmark_paths
+
+
+class _StageStats:
+    """Busy time of one pipeline stage; fps excludes time spent waiting on queues."""
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.busy_sec = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.frames += 1
+        self.busy_sec += seconds
 
+    @property
+    def fps(self) -> float:
+        return self.frames / self.busy_sec if self.busy_sec > 0 else 0.0
+
+
+def _format_stage_fps(decode: _StageStats, infer: _StageStats, encode: _StageStats, *, no_video: bool = False) -> str:
+    output_stage = "write" if no_video else "encode"
+    return f"decode {decode.fps:.1f} fps | infer {infer.fps:.1f} fps | {output_stage} {encode.fps:.1f} fps"
+
+
+def _queue_put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _queue_get(q: queue.Queue, stop: threading.Event) -> Any:
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _QUEUE_END
+
+
+def _decode_loop(
+    cv2: Any,
+    cap: Any,
+    frames: queue.Queue,
+    stop: threading.Event,
+    *,
+    frame_pos: int,
+    stop_pos: int | None,
+    stats: _StageStats,
+    errors: list[BaseException],
+) -> None:
+    try:
+        while not stop.is_set() and (stop_pos is None or frame_pos < stop_pos):
+            started = time.perf_counter()
+            ok, frame = cap.read()
+            if not ok:
+                break
+            timestamp_ms = float(cap.get(cv2.CAP_PROP_POS_MSEC) or 0.0)
+            stats.add(time.perf_counter() - started)
+            if not _queue_put(frames, (frame_pos, timestamp_ms, frame), stop):
+                return
+            frame_pos += 1
+    except BaseException as exc:  # noqa: BLE001
+        errors.append(exc)
+    finally:
+        _queue_put(frames, _QUEUE_END, stop)
+
+
+def _open_video_writer(cv2: Any, output_path: Path, fps: float, frame: Any) -> Any:
+    height, width = frame.shape[:2]
+    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+    writer = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"출력 영상 파일을 열 수 없습니다. 코덱/경로를 확인하세요: {output_path}")
+    return writer
+
+
+class _FrameSink:
+    """Annotated frames go to one mp4 (opened on the first frame), landmarks to the landmark writers."""
+
+    def __init__(self, cv2: Any, output_path: Path, fps: float, landmark_paths: list[Path]) -> None:
+        self._cv2 = cv2
+        self._output_path = output_path
+        self._fps = fps
+        self._video: Any | None = None
+        self._landmark_writers: list[Any] = []
+        self.landmark_frames = 0
+        try:
+            for path in landmark_paths:
+                self._landmark_writers.append(open_landmark_writer(path))
+        except Exception:
+            self.close()
+            raise
+
+    def write(self, frame_index: int, timestamp_ms: float, annotated: Any | None, landmarks: Any | None) -> None:
+        if annotated is not None:
+            if self._video is None:
+                self._video = _open_video_writer(self._cv2, self._output_path, self._fps, annotated)
+            self._video.write(annotated)
+        if landmarks is not None:
+            for landmark_writer in self._landmark_writers:
+                landmark_writer.write(frame_index, timestamp_ms, landmarks)
+            self.landmark_frames += 1
+
+    def finish(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+        for landmark_writer in self._landmark_writers:
+            landmark_writer.close()
+        self._landmark_writers = []
+
+
+class _SegmentedSink:
+    """Splits the output into `segment_frames` blocks, each with its own mp4 and landmark parts.
+
+    A segment is added to the checkpoint only after its files are closed, so
+    an interrupted run loses at most the segment in progress. `close` without
+    `finish` (error or interrupt) drops that partial segment.
+    """
+
+    def __init__(self, cv2: Any, directory: Path, checkpoint: Checkpoint, fps: float) -> None:
+        self._cv2 = cv2
+        self._directory = directory
+        self._checkpoint = checkpoint
+        self._fps = fps
+        self._segment: tuple[_FrameSink, SegmentRecord] | None = None
+
+    def write(self, frame_index: int, timestamp_ms: float, annotated: Any | None, landmarks: Any | None) -> None:
+        frame_pos = frame_index - 1
+        index = frame_pos // self._checkpoint.segment_frames
+        if self._segment is not None and self._segment[1].index != index:
+            self._finish_segment()
+        if self._segment is None:
+            self._segment = self._open_segment(index, frame_pos)
+        sink, record = self._segment
+        sink.write(frame_index, timestamp_ms, annotated, landmarks)
+        record.stop = frame_pos + 1
+
+    def _open_segment(self, index: int, start: int) -> tuple[_FrameSink, SegmentRecord]:
+        name = f"segment_{index:05d}"
+        record = SegmentRecord(
+            index=index,
+            start=start,
+            stop=start,
+            video=None if self._checkpoint.settings.get("no_video") else f"{name}.mp4",
+            landmarks=[f"{name}_{n}{suffix}" for n, suffix in enumerate(self._checkpoint.landmark_suffixes)],
+            landmark_frames=0,
+            landmark_offset=self._checkpoint.landmark_frames,
+        )
+        sink = _FrameSink(
+            self._cv2,
+            self._directory / f"{name}.mp4",
+            self._fps,
+            [self._directory / part for part in record.landmarks],
+        )
+        return sink, record
+
+    def _finish_segment(self) -> None:
+        if self._segment is None:
+            return
+        sink, record = self._segment
+        self._segment = None
+        sink.close()
+        record.landmark_frames = sink.landmark_frames
+        self._checkpoint.segments.append(record)
+        save_checkpoint(self._directory, self._checkpoint)
+        print(f"[INFO] checkpoint: {record.stop} frames ({len(self._checkpoint.segments)} segments)")
+
+    def finish(self) -> None:
+        self._finish_segment()
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment[0].close()
+            self._segment = None
+
+
+def _encode_loop(
+    annotated_frames: queue.Queue,
+    stop: threading.Event,
+    *,
+    sink: Any,
+    stats: _StageStats,
+    errors: list[BaseException],
+) -> None:
+    try:
+        while True:
+            item = _queue_get(annotated_frames, stop)
+            if item is _QUEUE_END:
+                break
+            started = time.perf_counter()
+            sink.write(*item)
+            stats.add(time.perf_counter() - started)
+    except BaseException as exc:  # noqa: BLE001
+        errors.append(exc)
+        stop.set()
+
+
+def _process_video(
+    cv2: Any,
+    mp: Any,
+    config: RunnerConfig,
+    *,
+    input_path: Path,
+    output_path: Path,
+    landmark_paths: list[Path],
+    frame_range: _FrameRange,
+    label: str = "",
+    backend: Any | None = None,
+    checkpoint: Checkpoint | None = None,
+    recorder: Any | None = None,
+) -> int:
+    """Runs decode -> pose/draw -> encode as three stages connected by bounded queues.
+
+    Decoding and encoding run on their own threads (OpenCV releases the GIL
+    inside `read`/`write`), inference and drawing stay on the calling thread.
+    At most `2 * queue_size` frames are buffered at any time, and frames are
+    written in decode order because each stage is a single FIFO consumer.
+
+    A caller-owned `backend` is reused (and left open) instead of loading the
+    model again, which is how batch workers share one model across files.
+    With a `checkpoint`, outputs go to segments in `checkpoint_dir(output_path)`
+    instead of `output_path` / `landmark_paths`. `recorder` receives the
+    detection result of every output frame (inference cache).
+    """
     cap = cv2.VideoCapture(str(input_path))
     if not cap.isOpened():
         raise RuntimeError(f"영상 파일을 열 수 없습니다: {input_path}")
 
-    writer = None
-    csv_file, csv_writer = _open_csv_writer(csv_path)
-
     processed_frames = 0
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
     fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
     if fps <= 1e-6:
         fps = 30.0
 
-    backend = _create_backend(mp=mp, config=config, fps=fps)
+    frame_pos = max(0, frame_range.warmup_start)
+    if frame_pos > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
+
+    owns_backend = backend is None
+    sink: Any = None
+    try:
+        if checkpoint is None:
+            sink = _FrameSink(cv2, output_path, fps, landmark_paths)
+        else:
+            sink = _SegmentedSink(cv2, checkpoint_dir(output_path), checkpoint, fps)
+        # Model loading can fail (download, bad model path); the capture and sink must not leak then.
+        if backend is None:
+            backend = _create_backend(mp=mp, config=config, fps=fps)
+        else:
+            backend.begin_video(fps)
+    except BaseException:
+        cap.release()
+        if sink is not None:
+            sink.close()
+        raise
+
+    queue_size = max(1, config.queue_size)
+    decoded_frames: queue.Queue = queue.Queue(maxsize=queue_size)
+    annotated_frames: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    decode_stats = _StageStats()
+    infer_stats = _StageStats()
+    encode_stats = _StageStats()
+
+    decoder = threading.Thread(
+        target=_decode_loop,
+        args=(cv2, cap, decoded_frames, stop),
+        kwargs={
+            "frame_pos": frame_pos,
+            "stop_pos": frame_range.stop,
+            "stats": decode_stats,
+            "errors": errors,
+        },
+        name="make-skeleton-decode",
+        daemon=True,
+    )
+    encoder = threading.Thread(
+        target=_encode_loop,
+        args=(annotated_frames, stop),
+        kwargs={
+            "sink": sink,
+            "stats": encode_stats,
+            "errors": errors,
+        },
+        name="make-skeleton-encode",
+        daemon=True,
+    )
+    decoder.start()
+    encoder.start()
 
     try:
         while True:
-            ok, frame = cap.read()
-            if not ok:
+            item = _queue_get(decoded_frames, stop)
+            if item is _QUEUE_END:
                 break
+            frame_pos, timestamp_ms, frame = item
 
-            if writer is None:
-                height, width = frame.shape[:2]
-                fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-                writer = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
-                if not writer.isOpened():
-                    raise RuntimeError(
-                        f"출력 영상 파일을 열 수 없습니다. 코덱/경로를 확인하세요: {output_path}"
-                    )
-
-            current_frame_index = processed_frames + 1
-            annotated, landmarks = backend.annotate_frame(cv2=cv2, frame=frame, frame_index=current_frame_index)
-
-            if landmarks is not None:
+            started = time.perf_counter()
+            current_frame_index = frame_pos + 1
+            annotated = None
+            if config.no_video or current_frame_index <= frame_range.start:
+                landmarks = backend.detect(cv2=cv2, frame=frame, frame_index=current_frame_index)
+            else:
+                annotated, landmarks = backend.annotate_frame(cv2=cv2, frame=frame, frame_index=current_frame_index)
+            if current_frame_index <= frame_range.start:
+                infer_stats.add(time.perf_counter() - started)
+                continue
+            if recorder is not None:
+                recorder.write(current_frame_index, timestamp_ms, landmarks)
+
+            if annotated is None:
+                pass
+            elif landmarks is not None:
                 _draw_joint_panel(
                     cv2=cv2,
                     frame=annotated,
@@ -338,11 +693,6 @@ def run_pipeline(config: RunnerConfig) -> None:
                     frame_index=current_frame_index,
                     total_frames=total_frames,
                 )
-                _write_landmarks_csv(
-                    writer=csv_writer,
-                    frame_index=current_frame_index,
-                    landmarks=landmarks,
-                )
             else:
                 cv2.putText(
                     annotated,
@@ -354,23 +704,313 @@ def run_pipeline(config: RunnerConfig) -> None:
                     2,
                     cv2.LINE_AA,
                 )
+            infer_stats.add(time.perf_counter() - started)
 
-            writer.write(annotated)
+            if not _queue_put(annotated_frames, (current_frame_index, timestamp_ms, annotated, landmarks), stop):
+                break
             processed_frames += 1
 
             if processed_frames % 30 == 0:
-                print(f"[INFO] processed {processed_frames} frames...")
+                print(
+                    f"[INFO] {label}processed {processed_frames} frames... "
+                    f"({_format_stage_fps(decode_stats, infer_stats, encode_stats, no_video=config.no_video)})"
+                )
 
-            if config.max_frames is not None and processed_frames >= config.max_frames:
-                break
+        _queue_put(annotated_frames, _QUEUE_END, stop)
+        encoder.join()
+        if not errors:
+            sink.finish()
     finally:
+        stop.set()
+        decoder.join()
+        encoder.join()
         cap.release()
-        backend.close()
-        if writer is not None:
-            writer.release()
-        if csv_file is not None:
-            csv_file.close()
-
-    print(f"[DONE] output video: {output_path}")
-    if csv_path is not None:
-        print(f"[DONE] landmarks csv: {csv_path}")
+        if owns_backend:
+            backend.close()
+        sink.close()
+
+    if errors:
+        raise errors[0]
+    print(f"[INFO] {label}stage throughput: {_format_stage_fps(decode_stats, infer_stats, encode_stats, no_video=config.no_video)}")
+    return processed_frames
+
+
+def _run_chunk(job: _ChunkJob) -> int:
+    cv2, mp = _ensure_dependencies()
+    return _process_video(
+        cv2,
+        mp,
+        job.config,
+        input_path=job.input_path,
+        output_path=job.output_path,
+        landmark_paths=list(job.landmark_paths),
+        frame_range=job.frame_range,
+        label=job.label,
+    )
+
+
+def _run_parallel(
+    cv2: Any,
+    config: RunnerConfig,
+    *,
+    input_path: Path,
+    output_path: Path,
+    landmark_paths: list[Path],
+) -> int | None:
+    """Processes keyframe-aligned chunks in worker processes.
+
+    Returns the number of frames written, or None when the video cannot be split.
+    """
+    total_frames, fps = _probe_video(cv2, input_path)
+    if config.max_frames is not None:
+        total_frames = min(total_frames, max(0, config.max_frames))
+    if total_frames <= 0:
+        print("[INFO] frame count unknown, falling back to a single worker")
+        return None
+
+    keyframes = probe_keyframe_indices(input_path, fps)
+    chunks = plan_chunks(
+        total_frames,
+        config.workers,
+        keyframes,
+        min_chunk_frames=max(30, 2 * config.chunk_warmup_frames),
+    )
+    if len(chunks) <= 1:
+        return None
+    print(
+        f"[INFO] workers: {len(chunks)} chunks "
+        f"({'keyframe-aligned' if keyframes else 'even split'}, warm-up {config.chunk_warmup_frames} frames)"
+    )
+
+    parts_dir = output_path.with_name(f".{output_path.stem}.parts")
+    if parts_dir.exists():
+        shutil.rmtree(parts_dir)
+    parts_dir.mkdir(parents=True)
+
+    jobs = [
+        _ChunkJob(
+            config=config,
+            input_path=input_path,
+            output_path=parts_dir / f"chunk_{i:04d}.mp4",
+            landmark_paths=tuple(
+                parts_dir / f"chunk_{i:04d}_{n}{path.suffix.lower()}" for n, path in enumerate(landmark_paths)
+            ),
+            frame_range=_FrameRange(
+                start=start,
+                # The container frame count is an estimate: the last chunk reads to the end.
+                stop=config.max_frames if i == len(chunks) - 1 else stop,
+                warmup_start=max(0, start - config.chunk_warmup_frames),
+            ),
+            label=f"chunk {i + 1}/{len(chunks)} ",
+        )
+        for i, (start, stop) in enumerate(chunks)
+    ]
+
+    try:
+        # spawn: MediaPipe graphs are not fork-safe.
+        with ProcessPoolExecutor(max_workers=len(jobs), mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_run_chunk, job) for job in jobs]
+            try:
+                processed_frames = sum(future.result() for future in futures)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        _merge_parts(
+            cv2,
+            config,
+            video_parts=[job.output_path for job in jobs],
+            landmark_parts=[list(job.landmark_paths) for job in jobs],
+            output_path=output_path,
+            landmark_paths=landmark_paths,
+            fps=fps,
+        )
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    return processed_frames
+
+
+def _merge_parts(
+    cv2: Any,
+    config: RunnerConfig,
+    *,
+    video_parts: list[Path],
+    landmark_parts: list[list[Path]],
+    output_path: Path,
+    landmark_paths: list[Path],
+    fps: float,
+) -> None:
+    """Joins per-part outputs in order; `landmark_parts[i][n]` belongs to `landmark_paths[n]`."""
+    if not config.no_video:
+        concat_video_segments(cv2, video_parts, output_path, fps)
+    for n, path in enumerate(landmark_paths):
+        parts = [paths[n] for paths in landmark_parts]
+        if landmark_format(path) == "csv":
+            concat_text_parts(parts, path)
+        else:
+            merge_landmark_files(parts, path)
+
+
+def _run_checkpointed(
+    cv2: Any,
+    mp: Any,
+    config: RunnerConfig,
+    *,
+    input_path: Path,
+    output_path: Path,
+    landmark_paths: list[Path],
+    backend: Any | None,
+) -> int:
+    """Processes the video in checkpointed segments and joins them at the end.
+
+    Segments and `checkpoint.json` live in `.<output stem>.checkpoint` next to
+    the output. With `resume`, a checkpoint of the same input and settings is
+    continued after its last finished segment (the input is seeked, the
+    earlier segments are kept as they are); otherwise the run starts over.
+    """
+    directory = checkpoint_dir(output_path)
+    fresh = new_checkpoint(
+        input_path,
+        settings=_settings_fingerprint(config),
+        landmark_suffixes=[path.suffix.lower() for path in landmark_paths],
+        segment_frames=config.checkpoint_every or DEFAULT_CHECKPOINT_FRAMES,
+    )
+    checkpoint = load_checkpoint(directory) if config.resume else None
+    if config.resume and checkpoint is None:
+        print(f"[INFO] no checkpoint in {directory}, starting from the first frame")
+    elif checkpoint is not None and not checkpoint.matches(fresh):
+        print("[INFO] checkpoint was made for another input or settings, starting from the first frame")
+        checkpoint = None
+    if checkpoint is None:
+        reset_checkpoint_dir(directory)
+        checkpoint = fresh
+        save_checkpoint(directory, checkpoint)
+    elif checkpoint.segments:
+        print(
+            f"[INFO] resuming at frame {checkpoint.next_frame + 1} "
+            f"({len(checkpoint.segments)} segments, {checkpoint.frames} frames done)"
+        )
+
+    if not checkpoint.complete:
+        start = checkpoint.next_frame
+        _process_video(
+            cv2,
+            mp,
+            config,
+            input_path=input_path,
+            output_path=output_path,
+            landmark_paths=landmark_paths,
+            frame_range=_FrameRange(
+                start=start,
+                stop=config.max_frames,
+                warmup_start=max(0, start - config.chunk_warmup_frames),
+            ),
+            backend=backend,
+            checkpoint=checkpoint,
+        )
+        checkpoint.complete = True
+        save_checkpoint(directory, checkpoint)
+
+    _, fps = _probe_video(cv2, input_path)
+    _merge_parts(
+        cv2,
+        config,
+        video_parts=[directory / segment.video for segment in checkpoint.segments if segment.video],
+        landmark_parts=[[directory / part for part in segment.landmarks] for segment in checkpoint.segments],
+        output_path=output_path,
+        landmark_paths=landmark_paths,
+        fps=fps,
+    )
+    shutil.rmtree(directory, ignore_errors=True)
+    return checkpoint.frames
+
+
+def run_pipeline(config: RunnerConfig, *, backend: Any | None = None, input_sha256: str | None = None) -> int:
+    """Processes one video and returns the number of frames written.
+
+    `backend` lets a caller reuse an already loaded pose backend; chunked
+    `workers` mode is skipped in that case because chunks need their own models.
+    `checkpoint_every` / `resume` switch to segmented output that survives an
+    interrupted run. With `cache_dir`, landmarks of a previous run with the
+    same input content, model and inference parameters are reused and pose
+    inference is skipped; `input_sha256` saves hashing the input again when
+    the caller already has its digest. With `render_from_path`, landmarks come from that
+    file and mediapipe is not imported at all.
+    """
+    input_path, output_path, landmark_paths = _resolve_paths(config)
+    checkpointed = config.checkpoint_every > 0 or config.resume
+
+    if config.render_from_path is not None:
+        cv2, mp = _ensure_cv2(), None
+        render_from = config.render_from_path.expanduser().resolve()
+        track = load_landmarks(render_from)
+        print(f"[INFO] rendering from landmarks: {render_from} ({len(track)} frames with pose)")
+        backend = StoredLandmarksBackend(track)
+    else:
+        cv2, mp = _ensure_dependencies()
+
+    recorder = None
+    if config.cache_dir is not None and config.render_from_path is None:
+        cache = LandmarkCache(config.cache_dir, config.cache_max_bytes)
+        model = _model_identity(mp, config)
+        params = _inference_params(config)
+        key = inference_cache_key(input_sha256 or _file_sha256(input_path), model, params)
+        track = cache.lookup(key, config.max_frames)
+        if track is not None:
+            print(f"[INFO] inference cache hit: {key[:12]} ({len(track)} frames with pose), skipping pose inference")
+            backend = StoredLandmarksBackend(track)
+        else:
+            print(f"[INFO] inference cache miss: {key[:12]}")
+            # Only a single pass from the first frame produces a contiguous entry.
+            if not checkpointed and (backend is not None or config.workers <= 1):
+                recorder = cache.writer(key, {"input": str(input_path), "model": model, "params": params})
+
+    processed_frames = None
+    if checkpointed:
+        if config.workers > 1:
+            print("[INFO] checkpointed runs use a single worker")
+        processed_frames = _run_checkpointed(
+            cv2,
+            mp,
+            config,
+            input_path=input_path,
+            output_path=output_path,
+            landmark_paths=landmark_paths,
+            backend=backend,
+        )
+    elif backend is None and config.workers > 1:
+        processed_frames = _run_parallel(
+            cv2,
+            config,
+            input_path=input_path,
+            output_path=output_path,
+            landmark_paths=landmark_paths,
+        )
+    if processed_frames is None:
+        try:
+            processed_frames = _process_video(
+                cv2,
+                mp,
+                config,
+                input_path=input_path,
+                output_path=output_path,
+                landmark_paths=landmark_paths,
+                frame_range=_FrameRange(start=0, stop=config.max_frames, warmup_start=0),
+                backend=backend,
+                recorder=recorder,
+            )
+        except BaseException:
+            if recorder is not None:
+                recorder.discard()
+            raise
+        if recorder is not None:
+            recorder.commit(complete=config.max_frames is None or processed_frames < config.max_frames)
+
+    if not config.no_video:
+        print(f"[DONE] output video: {output_path}")
+    for path in landmark_paths:
+        kind = "landmarks csv" if landmark_format(path) == "csv" else "landmarks"
+        print(f"[DONE] {kind}: {path}")
+    return processed_frames
+
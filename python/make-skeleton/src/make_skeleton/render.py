@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from .landmarks_io import landmarks_to_array
+
+# MediaPipe Pose topology (same as `mp.solutions.pose.POSE_CONNECTIONS` and
+# `PoseLandmarksConnections.POSE_LANDMARKS`), kept here so drawing does not
+# need mediapipe.
+POSE_CONNECTIONS: tuple[tuple[int, int], ...] = (
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+)  # fmt: skip
+
+TRACKED_JOINTS: tuple[tuple[str, int], ...] = (
+    ("NOSE", 0),
+    ("L_SHOULDER", 11),
+    ("R_SHOULDER", 12),
+    ("L_ELBOW", 13),
+    ("R_ELBOW", 14),
+    ("L_WRIST", 15),
+    ("R_WRIST", 16),
+    ("L_HIP", 23),
+    ("R_HIP", 24),
+    ("L_KNEE", 25),
+    ("R_KNEE", 26),
+    ("L_ANKLE", 27),
+    ("R_ANKLE", 28),
+)
+
+PANEL_X = 12
+PANEL_Y = 12
+PANEL_LINE_HEIGHT = 20
+PANEL_WIDTH = 420
+PANEL_ALPHA = 0.45
+PANEL_FONT_SCALE = 0.5
+LABEL_FONT_SCALE = 0.35
+
+_TRACKED_INDEX = np.asarray([idx for _, idx in TRACKED_JOINTS], dtype=np.int64)
+_PANEL_PREFIXES = tuple(f"{name:<10} " for name, _ in TRACKED_JOINTS)
+_PANEL_HEIGHT = 14 + (len(TRACKED_JOINTS) + 1) * PANEL_LINE_HEIGHT
+
+
+def _as_points(landmarks: Any) -> np.ndarray:
+    if isinstance(landmarks, np.ndarray):
+        return landmarks
+    return landmarks_to_array(landmarks)
+
+
+def _pixel_coords(points: np.ndarray, w: int, h: int) -> tuple[np.ndarray, np.ndarray]:
+    """(N, 2) int32 pixel positions (truncated like `int(x * w)`) and an in-frame mask."""
+    xy = points[:, :2].astype(np.float64) * (w, h)
+    finite = np.isfinite(xy).all(axis=1)
+    px = np.where(finite[:, None], xy, -1.0).astype(np.int32)
+    inside = finite & (px[:, 0] >= 0) & (px[:, 0] < w) & (px[:, 1] >= 0) & (px[:, 1] < h)
+    return px, inside
+
+
+def _connection_index(connections: Any) -> np.ndarray:
+    if isinstance(connections, np.ndarray):
+        return connections
+    pairs = [
+        (int(c.start), int(c.end)) if hasattr(c, "start") else (int(c[0]), int(c[1]))
+        for c in connections
+    ]
+    return np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+
+
+_POSE_CONNECTION_INDEX = _connection_index(POSE_CONNECTIONS)
+
+
+def _draw_connections(cv2: Any, frame: Any, landmarks: Any, connections: Any = _POSE_CONNECTION_INDEX) -> None:
+    """Draws all bones with one `cv2.polylines` call and the joints as dots."""
+    h, w = frame.shape[:2]
+    px, inside = _pixel_coords(_as_points(landmarks), w, h)
+
+    index = _connection_index(connections)
+    if index.size:
+        keep = inside[index[:, 0]] & inside[index[:, 1]]
+        segments = px[index[keep]]  # (K, 2, 2)
+        if segments.shape[0]:
+            cv2.polylines(frame, list(segments), False, (0, 255, 0), 2, cv2.LINE_AA)
+
+    for x, y in px[inside]:
+        cv2.circle(frame, (int(x), int(y)), 3, (0, 140, 255), -1)
+
+
+def _draw_joint_panel(
+    cv2: Any,
+    frame: Any,
+    landmarks: Any,
+    pose_landmark: Any,
+    frame_index: int,
+    total_frames: int,
+) -> None:
+    """Tracked-joint labels plus the translucent coordinate panel.
+
+    Only the panel rectangle is darkened in place (no full-frame overlay copy
+    or blend), and the joint indices and line prefixes are module constants.
+    `pose_landmark` is kept for call compatibility; indices come from
+    `TRACKED_JOINTS`.
+    """
+    _ = pose_landmark
+    points = _as_points(landmarks)
+    h, w = frame.shape[:2]
+    tracked = points[_TRACKED_INDEX]
+    px, inside = _pixel_coords(tracked, w, h)
+
+    for (name, _), (x, y), ok in zip(TRACKED_JOINTS, px, inside):
+        if not ok:
+            continue
+        cv2.circle(frame, (int(x), int(y)), 4, (0, 255, 255), -1)
+        cv2.putText(
+            frame,
+            name,
+            (int(x) + 6, int(y) - 6),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            LABEL_FONT_SCALE,
+            (0, 255, 255),
+            1,
+            cv2.LINE_AA,
+        )
+
+    x1 = min(w, PANEL_X + PANEL_WIDTH + 1)
+    y1 = min(h, PANEL_Y + _PANEL_HEIGHT + 1)
+    if PANEL_X >= x1 or PANEL_Y >= y1:
+        return
+    panel = frame[PANEL_Y:y1, PANEL_X:x1]
+    cv2.addWeighted(panel, 1.0 - PANEL_ALPHA, panel, 0.0, 0, panel)
+
+    lines = [f"frame: {frame_index}/{total_frames}" if total_frames else f"frame: {frame_index}"]
+    for prefix, (x, y, _, visibility) in zip(_PANEL_PREFIXES, tracked.tolist()):
+        lines.append(f"{prefix}x:{x:>6.3f} y:{y:>6.3f} v:{visibility:>5.2f}")
+    for i, line in enumerate(lines):
+        cv2.putText(
+            frame,
+            line,
+            (PANEL_X + 8, PANEL_Y + 18 + i * PANEL_LINE_HEIGHT),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            PANEL_FONT_SCALE,
+            (255, 255, 255),
+            1,
+            cv2.LINE_AA,
+        )
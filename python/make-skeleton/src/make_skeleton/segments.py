@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any
+
+
+def probe_keyframe_indices(input_path: Path, fps: float) -> list[int]:
+    """Returns the frame indices of the video keyframes, or [] when ffprobe is unavailable.
+
+    Only packet headers are read (no decoding), so this is cheap even for long videos.
+    """
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None:
+        return []
+
+    cmd = [
+        ffprobe,
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time,flags",
+        "-of",
+        "csv=p=0",
+        str(input_path),
+    ]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=120)
+    except Exception:  # noqa: BLE001
+        return []
+
+    pts: list[float] = []
+    key_pts: list[float] = []
+    for line in proc.stdout.splitlines():
+        fields = line.strip().split(",")
+        if len(fields) < 2:
+            continue
+        try:
+            value = float(fields[0])
+        except ValueError:
+            continue
+        pts.append(value)
+        if "K" in fields[1]:
+            key_pts.append(value)
+
+    if not key_pts:
+        return []
+    origin = min(pts)
+    return sorted({int(round((value - origin) * fps)) for value in key_pts})
+
+
+def plan_chunks(
+    total_frames: int,
+    workers: int,
+    keyframes: list[int],
+    *,
+    min_chunk_frames: int,
+) -> list[tuple[int, int]]:
+    """Splits [0, total_frames) into up to `workers` contiguous (start, stop) ranges.
+
+    Boundaries are snapped to the nearest keyframe when keyframes are known, so
+    each chunk starts where the decoder can seek without decoding a GOP prefix.
+    """
+    workers = max(1, int(workers))
+    min_chunk_frames = max(1, int(min_chunk_frames))
+    if total_frames <= 0:
+        return []
+    workers = min(workers, max(1, total_frames // min_chunk_frames))
+
+    candidates = [k for k in keyframes if 0 < k < total_frames]
+    boundaries = [0]
+    for i in range(1, workers):
+        target = (total_frames * i) // workers
+        if candidates:
+            target = min(candidates, key=lambda k: abs(k - target))
+        if target - boundaries[-1] < min_chunk_frames or total_frames - target < min_chunk_frames:
+            continue
+        boundaries.append(target)
+    boundaries.append(total_frames)
+    return [(boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)]
+
+
+def concat_video_segments(cv2: Any, segments: list[Path], output_path: Path, fps: float) -> None:
+    """Joins mp4 segments into `output_path`.
+
+    Uses the ffmpeg concat demuxer with stream copy when ffmpeg is installed;
+    otherwise the segments are decoded and re-encoded with OpenCV.
+    """
+    segments = [path for path in segments if path.exists() and path.stat().st_size > 0]
+    if not segments:
+        raise RuntimeError("병합할 영상 조각이 없습니다.")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if len(segments) == 1:
+        shutil.copyfile(segments[0], output_path)
+        return
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is not None:
+        list_path = segments[0].parent / "concat.txt"
+        list_path.write_text(
+            "".join(f"file '{path.resolve().as_posix()}'\n" for path in segments),
+            encoding="utf-8",
+        )
+        cmd = [
+            ffmpeg,
+            "-y",
+            "-v",
+            "error",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(list_path),
+            "-c",
+            "copy",
+            str(output_path),
+        ]
+        try:
+            subprocess.run(cmd, check=True, capture_output=True, timeout=3600)
+            return
+        except Exception as exc:  # noqa: BLE001
+            print(f"[INFO] ffmpeg concat failed, re-encoding segments with OpenCV ({exc})")
+
+    writer = None
+    try:
+        for path in segments:
+            cap = cv2.VideoCapture(str(path))
+            try:
+                while True:
+                    ok, frame = cap.read()
+                    if not ok:
+                        break
+                    if writer is None:
+                        height, width = frame.shape[:2]
+                        writer = cv2.VideoWriter(
+                            str(output_path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height)
+                        )
+                        if not writer.isOpened():
+                            raise RuntimeError(
+                                f"출력 영상 파일을 열 수 없습니다. 코덱/경로를 확인하세요: {output_path}"
+                            )
+                    writer.write(frame)
+            finally:
+                cap.release()
+    finally:
+        if writer is not None:
+            writer.release()
+
+
+def concat_text_parts(parts: list[Path], output_path: Path, *, header_lines: int = 1) -> None:
+    """Concatenates text files in order, keeping the header of the first part only."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("w", encoding="utf-8", newline="") as out:
+        header_written = False
+        for path in parts:
+            if not path.exists():
+                continue
+            with path.open("r", encoding="utf-8", newline="") as src:
+                for line_no, line in enumerate(src):
+                    if line_no < header_lines:
+                        if not header_written:
+                            out.write(line)
+                        continue
+                    out.write(line)
+            header_written = True